@@ -46,9 +46,17 @@ import sys
 from lib import sgg  # import the nc-logic
 from lib import widgets  # import widgets
 from lib import guiclasses  # import gui for nc-objects
+from lib import outputview  # viewer of the generated g-code
 from lib import utils  # import utility module
 from lib import ncclasses  # import the module for version info only
 from lib import gcode  # import the module for version info only
+from lib import toolpath  # import the module for version info only
+from lib import formatter  # import the module for version info only
+from lib import arcfit  # import the module for version info only
+from lib import simplify  # import the module for version info only
+from lib import ordering  # import the module for version info only
+from lib import projectfile  # import the module for version info only
+from lib import resultcache  # import the module for version info and the cache state
 from lib import mathutils  # import the module for version info only
 from lib import font2vector  # import the module for version info only
 from lib import tooltable  # import the module for version info only
@@ -56,11 +64,11 @@ from lib import ngcsub  # import the module for version info only
 from lib import counterbore  # import the module for version info only
 from lib import nclib  # import the module for version info only
 from lib import feedsnspeeds  # import the module for version info only
+from lib import settings  # import the module for version info only
 
 VERSION = "230206"  # version of this file (jjmmdd)
 APP_VERSION = "3.7.0"  # overall application version
 APP_NAME = sgg.APP + " " + APP_VERSION  # application name
-TIME_UPDATE = 500  # polling interval to update the generated g-code
 
 
 class MainGUI(tk.Frame, widgets.Widgets):  # ===================================
@@ -74,15 +82,21 @@ class MainGUI(tk.Frame, widgets.Widgets):  # ===================================
         master.protocol("WM_DELETE_WINDOW", self.QuitHandler)
         self.sgg = sgg.sgg()  # create instance of the logic
         self.numlinesoutput = tk.StringVar(self, 0, "")  # number of lines of current g-code output
-        self.output = ""  # copy of the current g-code output
+        self.progress = tk.StringVar(self, "", "")  # state of the generation in the background
+        self.worker = sgg.Worker()  # creates the changed objects in the background, see <CheckForUpdate>
+        self.prepared = set()  # (id of the ncobject, version) created by the last job
+        self.when_updated = []  # functions called, when the output is up to date, see <WhenUpdated>
         self.CreateWidgets()  # populate the main gui with widgets
         self.lb_ncClasses.delete(0, tk.END)  # initialise the gui (fill the <create objects> listbox)
         for o in ncclasses.NCCLASSES:
             self.lb_ncClasses.insert(tk.END, o.name)
         self.ObjectListbox_update()  # update the <generated objects> listbox with generated objects
         self.SetTitle()  # set the title of the application window
-        self.InitGuiList()
-        self.CheckForUpdate()  # start polling for updates
+        self.editors = {}  # one gui per nc-class (class index -> gui), bound to the edited object, see <ObjectEdit>
+        self.editor = None  # gui of the edited object
+        self.update_pending = None  # scheduled <CheckForUpdate>
+        master.bind(guiclasses.EVENT_CHANGED, self.RequestUpdate)  # sent by the gui of the nc-objects
+        self.CheckForUpdate()  # show the initial output
 
     def SetTitle(self, filename=""):
         """Sets the title of the application"""
@@ -90,31 +104,82 @@ class MainGUI(tk.Frame, widgets.Widgets):  # ===================================
         if not filename == "": s += " - [" + filename + " ]"
         self.master.title(s)
 
-    def InitGuiList(self):
-        """Initialie the list that holds the gui of each created object"""
-        try: self.guilist[self.gui_active_index].Destroy()
+    def EditorHide(self):
+        """Hides the gui of the edited object, e.g. before the objects are replaced"""
+        try: self.editor.Hide()
         except: pass
-        self.gui_active_index = None
-        self.guilist = []  # list that holds all reated gui for nc-objects
-        for i in range(len(self.sgg.objlist)):  # fill the the list with dummies
-            self.guilist.append(None)
+        self.editor = None
+
+    def RequestUpdate(self, *dummy):
+        """Schedules <CheckForUpdate>, all changes until the application is idle are handled at once"""
+        if self.update_pending is None: self.update_pending = self.after_idle(self.CheckForUpdate)
 
     def CheckForUpdate(self):
-        """Updates the output if neccessary every n milliseconds"""
-        new = self.sgg.GetGcode()
-        if not new == self.output:
-            self.output = new
-            self.tbOutput.delete(1.0, tk.END)
-            self.tbOutput.insert(tk.END, self.output)
-            self.tbOutput.yview(tk.END)
-            self.numlinesoutput.set(str(self.output.count("\n")) + " lines of code")
+        """Updates the output after a change. The changed objects are created in the background from copies
+        (see <sgg.Snapshot>), then only the changed objects are replaced in the output."""
+        self.update_pending = None
+        if not list(self.lb_ncObjects.get(0, tk.END)) == list(self.sgg.GetObjectNames()):  # e.g. a new object name
             indexes = self.lb_ncObjects.curselection()
             if indexes: self.ObjectListbox_update(indexes)
             else: self.ObjectListbox_update()
-        self.after(TIME_UPDATE, self.CheckForUpdate)
+        if self.worker.Busy(): return  # checked again by <GenerationFinished>
+        snapshots = self.sgg.Snapshot(self.prepared)  # without the objects created, but not kept by the cache
+        if snapshots:
+            self.GenerationProgress(0, len(snapshots))
+            self.bt_cancel.configure(state=tk.NORMAL)
+            self.worker.Start(lambda cancel: self.sgg.Prepare(snapshots, cancel, self.Progress), self.Generated)
+            return
+        self.prepared = set()
+        diffs = self.sgg.UpdateAssembly()
+        if diffs:
+            self.tbOutput.End()  # only the visible lines are read from the output
+            self.numlinesoutput.set(str(self.sgg.assembly.Lines()) + " lines of code")
+        functions, self.when_updated = self.when_updated, []
+        for f in functions: f()
+
+    def Progress(self, n, total):
+        """Called by the worker thread after each created object"""
+        try: self.after_idle(self.GenerationProgress, n, total)
+        except RuntimeError: pass  # the application has been closed
+
+    def Generated(self, results):
+        """Called by the worker thread with the results of <sgg.Prepare>"""
+        try: self.after_idle(self.GenerationFinished, results)
+        except RuntimeError: pass  # the application has been closed
+
+    def GenerationProgress(self, n, total):
+        """Shows the progress of the generation"""
+        self.progress.set("Creating object %d of %d" % (min(n + 1, total), total))
+
+    def GenerationFinished(self, results):
+        """Takes the results of the worker and updates the output, if all objects are up to date"""
+        self.bt_cancel.configure(state=tk.DISABLED)
+        if isinstance(results, Exception):
+            self.progress.set("Error")
+            self.when_updated = []
+            tkinter.messagebox.showerror("ERROR", "Error creating the g-code:\n" + str(results))
+            return
+        self.sgg.Apply(results)
+        self.prepared = set((id(o), version) for o, version, gcode in results)
+        if self.worker.cancel.is_set():
+            self.progress.set("Cancelled, the output is not up to date")
+            self.when_updated = []
+            return
+        self.progress.set("")
+        self.CheckForUpdate()  # objects changed in the meantime are created again
+
+    def GenerationCancel(self):
+        """Cancels the generation in the background"""
+        self.worker.Cancel()
+
+    def WhenUpdated(self, function):
+        """Calls the function, when the output is up to date (e.g. to save it)"""
+        self.when_updated.append(function)
+        self.RequestUpdate()
 
     def QuitHandler(self):
         """Handles quit of the application"""
+        self.worker.Cancel()  # stops the generation after the current object
         self.master.destroy()  # destroy root window
         self.master.quit()  # Quit main loop
 
@@ -124,49 +189,39 @@ class MainGUI(tk.Frame, widgets.Widgets):  # ===================================
         target_index = self.lb_ncObjects.curselection()  # determine list position to insert the new object
         if target_index: target_index = int(target_index[0])
         else: target_index = int(self.lb_ncObjects.index(tk.END))
-        obj = self.sgg.ObjectCreate(class_selected, target_index)  # create new object
+        self.sgg.ObjectCreate(class_selected, target_index)  # create new object
         self.ObjectListbox_update()  # update listbox of created objects
         self.lb_ncObjects.selection_set(target_index + 1)  # select the newly generated object in the listbox
         self.lb_ncObjects.see(target_index + 1)  # adjust the the listbox to show the active item
-        try: self.guilist[self.gui_active_index].Hide()  # hide the current gui
-        except: pass
-        self.guilist.insert(target_index + 1, guiclasses.GUICLASSES[class_selected](root, obj))  # create gui and hand over a reference of the nc-object
-        self.gui_active_index = target_index + 1
+        self.ObjectEdit()  # the gui of the new object
+        self.RequestUpdate()
 
     def ObjectDelete(self, *dummy):
         """Deletes the selected object"""
         indexes = self.lb_ncObjects.curselection()
         if indexes and \
            tkinter.messagebox.askokcancel("Delete", "Delete selected object(s)?"):
-            indexes2 = sorted(list(map(int, indexes)), reverse=True)
-            for i in indexes2:
-                try: self.guilist[int(i)].Destroy()
-                except: pass
-                self.guilist.pop(int(i))
+            if self.editor is not None and any(self.editor.nco is self.sgg.GetObject(int(i)) for i in indexes):
+                self.EditorHide()
             self.sgg.ObjectsDelete(indexes)
             self.ObjectListbox_update(indexes)
+            self.RequestUpdate()
 
     def ObjectsMoveUp(self, *dummy):
         """Changes the ordner of the cerated objects"""
         indexes = self.lb_ncObjects.curselection()
         if indexes:
-            utils.ListItemsMoveUp(self.guilist, indexes)
             indexes = self.sgg.ObjectsMoveUp(indexes)
             self.ObjectListbox_update(indexes)
-            if self.gui_active_index > 1: self.gui_active_index -= 1
-        try: self.guilist[self.gui_active_index].lift()
-        except: pass
+            self.RequestUpdate()
 
     def ObjectsMoveDown(self, *dummy):
         """Changes the ordner of the cerated objects"""
         indexes = self.lb_ncObjects.curselection()
         if indexes:
-            utils.ListItemsMoveDown(self.guilist, indexes)
             indexes = self.sgg.ObjectsMoveDown(indexes)
             self.ObjectListbox_update(indexes)
-            if self.gui_active_index < len(self.guilist): self.gui_active_index += 1
-        try: self.guilist[self.gui_active_index].lift()
-        except: pass
+            self.RequestUpdate()
 
     def ObjectDublicate(self, *dummy):
         """Dublicates the selected object"""
@@ -175,24 +230,29 @@ class MainGUI(tk.Frame, widgets.Widgets):  # ===================================
            tkinter.messagebox.askokcancel("Dublicate", "Dublictae selected object?"):
             index = int(index[0])
             i = self.sgg.ObjectDublicate(index)
-            self.guilist.insert(index + 1, None)
             self.ObjectListbox_update(i)
+            self.RequestUpdate()
             self.ObjectEdit()
 
     def ObjectEdit(self, *dummy):
-        """Edits the selected object, by creating the corresponding gui"""
+        """Edits the selected object with the gui of its class. The gui is created once and
+        bound to the edited object (see <guiclasses.Changes.Bind>)."""
         oi = self.lb_ncObjects.curselection()
         if oi:
             oi = int(oi[0])
-            if not self.gui_active_index == oi:
-                try: self.guilist[self.gui_active_index].Hide()
-                except: pass
-            try:
-                self.guilist[oi].Show()
-            except:
-                ci = self.sgg.GetClassIndex(oi)
-                self.guilist[oi] = guiclasses.GUICLASSES[ci](root, self.sgg.GetObject(oi))
-            self.gui_active_index = oi
+            ci = self.sgg.GetClassIndex(oi)
+            editor = self.editors.get(ci)
+            if self.editor is not None and self.editor is not editor: self.EditorHide()
+            if editor is None:
+                editor = self.editors[ci] = guiclasses.GUICLASSES[ci](root, self.sgg.GetObject(oi))
+            else:
+                editor.Bind(self.sgg.GetObject(oi))
+            self.editor = editor
+
+    def ObjectShowGcode(self, *dummy):
+        """Shows the g-code of the selected object in the output"""
+        indexes = self.lb_ncObjects.curselection()
+        if indexes: self.tbOutput.See(self.sgg.assembly.FirstLine(int(indexes[0]) + 1))  # segment 0 is the header
 
     def ObjectListbox_update(self, indexes=None):
         """Update the displayed objectlist in the widget"""
@@ -215,8 +275,9 @@ class MainGUI(tk.Frame, widgets.Widgets):  # ===================================
         if not filename: return
         self.sgg.LoadProject(filename, None)
         self.ObjectListbox_update()
+        self.RequestUpdate()
         self.SetTitle(filename)
-        self.InitGuiList()
+        self.EditorHide()
 
     def ProjectInsert(self):
         """Loads a project"""
@@ -227,8 +288,9 @@ class MainGUI(tk.Frame, widgets.Widgets):  # ===================================
         if not filename: return
         self.sgg.LoadProject(filename, index)
         self.ObjectListbox_update(index)
+        self.RequestUpdate()
         self.SetTitle(filename)
-        self.InitGuiList()
+        self.EditorHide()
 
     def ProjectSave(self):
         """Saves a project"""
@@ -252,15 +314,20 @@ class MainGUI(tk.Frame, widgets.Widgets):  # ===================================
     def GcodeSave(self):
         """Saves the g-code to the current file"""
         if not self.sgg.fn_output == "" and tkinter.messagebox.askokcancel("Save", "Overwrite existing file?"):
-            if not self.sgg.SaveGcode(self.sgg.fn_output):
-                tkinter.messagebox.showerror("ERROR", "Error saving gcode")
+            self.WhenUpdated(lambda: self.GcodeWrite(self.sgg.fn_output))
 
     def GcodeSaveAs(self):
         """Saves the g-code under a name to a file"""
         filename = widgets.AskSaveFile("Save G-code", "~", self.sgg.fn_output, "LinuxCNC-G-code-file", "*." + sgg.GCODEFILE_EXTENSION)
         if not filename: return
-        if not self.sgg.SaveGcode(filename):
+        self.WhenUpdated(lambda: self.GcodeWrite(filename))
+
+    def GcodeWrite(self, filename, indexes=None):
+        """Writes the g-code of all or the selected objects to a file, the objects are up to date (see <WhenUpdated>)"""
+        if not self.sgg.SaveGcode(filename, indexes=indexes):
             tkinter.messagebox.showerror("ERROR", "Error saving gcode")
+            return False
+        return True
 
     def GcodeSaveSelection(self):
         """Save the g-code of the selected objects to a file"""
@@ -270,33 +337,44 @@ class MainGUI(tk.Frame, widgets.Widgets):  # ===================================
             if not filename: return
         else:
             return
-        if not self.sgg.SaveGcode(filename, indexes=selected):
-            tkinter.messagebox.showerror("ERROR", "Error saving gcode")
+        self.WhenUpdated(lambda: self.GcodeWrite(filename, selected))
+
+    def GcodeProduction(self):
+        """Switches the production output (no redundant words and comments) on or off"""
+        self.sgg.production = self.production.get()
+        self.RequestUpdate()
 
     def LCNC_WriteToAxisAndQuit(self):
         """Write the g-code to AXIS and quit the application"""
         if sgg.IN_AXIS:
             if tkinter.messagebox.askokcancel("Write to AXIS and quit", "Are you sure?"):
-                self.sgg.WriteGcodeToStdout()
-                self.QuitHandler()
+                self.WhenUpdated(self.LCNC_WriteAndQuit)
+
+    def LCNC_WriteAndQuit(self):
+        """Writes the g-code to stdout and quits, the objects are up to date (see <WhenUpdated>)"""
+        self.sgg.WriteGcodeToStdout()
+        self.QuitHandler()
 
     def LCNC_SaveAndLoad(self):
         """Saves the g-code to the current file and forces AXIS to load the last saved file"""
-        if self.sgg.fn_output:
-            if self.sgg.SaveGcode(self.sgg.fn_output):
-                retval = self.sgg.AxisLoad()
-                if not retval == 0:
-                    tkinter.messagebox.showerror("ERROR", "LinuxCNC reload error.\nReturncode:" + str(retval))
-            else:
-                tkinter.messagebox.showerror("Error saving gcode")
-        try: self.guilist[self.gui_active_index].lift()
+        if self.sgg.fn_output: self.WhenUpdated(self.LCNC_Load)
+        try: self.editor.win.lift()
         except: pass
 
+    def LCNC_Load(self):
+        """Saves the g-code and lets AXIS load it, the objects are up to date (see <WhenUpdated>)"""
+        if self.GcodeWrite(self.sgg.fn_output):
+            retval = self.sgg.AxisLoad()
+            if not retval == 0:
+                tkinter.messagebox.showerror("ERROR", "LinuxCNC reload error.\nReturncode:" + str(retval))
+
     def ProjectReset(self):
         """Resets the whole project"""
         if tkinter.messagebox.askokcancel("Reset", "Reset application?"):
             self.sgg.ResetProject()
+            self.EditorHide()
             self.ObjectListbox_update()
+            self.RequestUpdate()
             self.SetTitle()
 
     def Info(self):
@@ -307,6 +385,7 @@ class MainGUI(tk.Frame, widgets.Widgets):  # ===================================
         v += "gui\t\t" + VERSION + "\n"
         v += "guiclasses\t" + guiclasses.VERSION + "\n"
         v += "widgets\t\t" + widgets.VERSION + "\n"
+        v += "outputview\t" + outputview.VERSION + "\n"
         v += "sgg\t\t" + sgg.VERSION + "\n"
         v += "tooltable\t\t" + tooltable.VERSION + "\n"
         v += "feedsnspeeds\t" + feedsnspeeds.VERSION + "\n"
@@ -316,7 +395,15 @@ class MainGUI(tk.Frame, widgets.Widgets):  # ===================================
         v += "ngcsub\t\t" + ngcsub.VERSION + "\n"
         v += "counterbore\t" + counterbore.VERSION + "\n"
         v += "gcode\t\t" + gcode.VERSION + "\n"
+        v += "toolpath\t\t" + toolpath.VERSION + "\n"
+        v += "formatter\t\t" + formatter.VERSION + "\n"
+        v += "arcfit\t\t" + arcfit.VERSION + "\n"
+        v += "simplify\t\t" + simplify.VERSION + "\n"
+        v += "ordering\t\t" + ordering.VERSION + "\n"
+        v += "resultcache\t" + resultcache.VERSION + "\n"
+        v += "projectfile\t" + projectfile.VERSION + "\n"
         v += "mathutils\t\t" + mathutils.VERSION + "\n"
+        v += "settings\t\t" + settings.VERSION + "\n"
         v += "utils\t\t" + utils.VERSION + "\n\n"
         v += "For further information,\nplease read the CHANGELOG file.\n"
         tkinter.messagebox.showinfo("Info", v)
@@ -333,6 +420,8 @@ class MainGUI(tk.Frame, widgets.Widgets):  # ===================================
         v += "Path LinuxCNC tool-table: " + tooltable.PATH + "\n\n"
         v += "Preamble loaded: " + str(self.sgg.preamble_found) + "\n"
         v += "Postamble loaded: " + str(self.sgg.postamble_found) + "\n\n"
+        v += "Cache: " + resultcache.CACHE.Text() + "\n"
+        v += "Disk cache: " + resultcache.DISK.Text() + "\n\n"
         v += "Python:" + sys.version + "\n\n"
         tkinter.messagebox.showinfo("Status", v)
 
@@ -353,6 +442,8 @@ class MainGUI(tk.Frame, widgets.Widgets):  # ===================================
         tk.Button(self.menu, text="Save", command=self.GcodeSave).grid(column=2, row=1, sticky="ew")
         tk.Button(self.menu, text="Save as", command=self.GcodeSaveAs).grid(column=2, row=2, sticky="ew")
         tk.Button(self.menu, text="Save selection", command=self.GcodeSaveSelection).grid(column=2, row=3, rowspan=1, sticky="ewns")
+        self.production = tk.BooleanVar(self, self.sgg.production)
+        tk.Checkbutton(self.menu, text="Production output", variable=self.production, command=self.GcodeProduction).grid(column=2, row=4, sticky="w")
         tk.Label(self.menu, text="LinuxCNC", font="bold", bg="SeaGreen3").grid(column=3, row=0, sticky="EW", padx=1)
         tk.Button(self.menu, text="Write to AXIS & quit", command=self.LCNC_WriteToAxisAndQuit, state=state).grid(column=3, row=1, rowspan=1, sticky="ewns")
         tk.Button(self.menu, text="Save G-code & AXIS Load", command=self.LCNC_SaveAndLoad).grid(column=3, row=2, rowspan=1, sticky="ewns")
@@ -378,6 +469,7 @@ class MainGUI(tk.Frame, widgets.Widgets):  # ===================================
         self.lb_ncObjects.bind("<Control-Next>", self.ObjectsMoveDown)
         self.lb_ncObjects.bind("<Control-Delete>", self.ObjectDelete)
         self.lb_ncObjects.bind("<Control-Insert>", self.ObjectDublicate)
+        self.lb_ncObjects.bind("<<ListboxSelect>>", self.ObjectShowGcode)
         tk.Button(self.edit, text="Move up", command=self.ObjectsMoveUp).grid(column=2, row=1, sticky="ew")
         tk.Button(self.edit, text="Move down", command=self.ObjectsMoveDown).grid(column=2, row=2, sticky="ew")
         tk.Button(self.edit, text="Delete", command=self.ObjectDelete).grid(column=2, row=3, sticky="ew")
@@ -388,9 +480,12 @@ class MainGUI(tk.Frame, widgets.Widgets):  # ===================================
         self.output = tk.Frame(self, bd=5)
         self.output.grid(column=0, row=2, rowspan=1, sticky="NEW")
         tk.Label(self.output, text="Generated G-Code", font="bold", bg="cornflower blue").grid(column=0, columnspan=3, sticky="EW", padx=1)
-        self.tbOutput = widgets.TextboxWithScrollbar(self.output, column=0, row=1, columnspan=3, rowspan=1, width=80, height=30, sticky="nsew")
-        self.tbOutput.configure(font=("Courier New", "10", "normal"))
+        self.tbOutput = outputview.OutputView(self.output, self.sgg.assembly, width=80, height=30, font=("Courier New", "10", "normal"))
+        self.tbOutput.grid(column=0, row=1, columnspan=3, rowspan=1, sticky="nsew")
+        tk.Label(self.output, textvariable=self.progress).grid(column=0, row=2, sticky="w")
         tk.Label(self.output, textvariable=self.numlinesoutput).grid(column=1, row=2, sticky="ew")
+        self.bt_cancel = tk.Button(self.output, text="Cancel", command=self.GenerationCancel, state=tk.DISABLED)
+        self.bt_cancel.grid(column=2, row=2, sticky="e")
 
         self.rowconfigure(1, weight=2)
 
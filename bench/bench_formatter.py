@@ -0,0 +1,71 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""
+Purpose of the file:
+Benchmark of the g-code output: per object <GetGcode> versus <formatter.GetGcode>.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+Usage: python3 bench/bench_formatter.py [number of lines]
+"""
+
+import os
+import sys
+import time
+import math
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from lib import gcode as gc
+from lib import toolpath as tp
+from lib import formatter as fmt
+
+
+def Path(n):  # ================================================================
+    """Returns a toolpath with n lines, similar to the output of the ncclasses"""
+    path = tp.Toolpath()
+    path.append(gc.COMMENT("benchmark"))
+    path.G00(z=5.0, c="To safety height")
+    for r in range(n - 2):
+        a = r * 0.001
+        if r % 100 == 0:   path.G00(x=50 * math.cos(a), y=50 * math.sin(a))
+        elif r % 10 == 0:  path.G02(x=50 * math.cos(a), y=50 * math.sin(a), i=-3.5, j=2.25, f=800)
+        else:              path.G01(x=50 * math.cos(a), y=50 * math.sin(a), z=-0.001 * r, f=800, c=(str(r) if r % 50 == 0 else None))
+    return path
+
+
+def Measure(f, lines):  # ======================================================
+    """Calls f, returns its result and prints the lines per second"""
+    t = time.perf_counter()
+    result = f()
+    t = time.perf_counter() - t
+    print("%-12s %8.3f s %12.0f lines/s" % (f.__name__, t, lines / t))
+    return result
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    path = Path(n)
+    ol = list(path)                                                             # the same moves as g-code objects
+
+    def objects():
+        return "".join(o.GetGcode() + "\n" for o in ol)                       # as <Basemethods.GetGcode> did it
+
+    def formatter():
+        return fmt.GetGcode(path)
+
+    print("%d lines" % n)
+    a = Measure(objects, n)
+    b = Measure(formatter, n)
+    print("identical" if a == b else "DIFFERENT")
+    sys.exit(0 if a == b else 1)
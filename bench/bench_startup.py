@@ -0,0 +1,78 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""
+Purpose of the file:
+Measures the cold start of the headless generation (imports, <sgg.sgg> and the
+g-code of the default project) and checks it against a time budget.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+Each run is a new python process in the application directory, the median of
+all runs is compared with the budget. The exit code is 1, if it is exceeded
+(e.g. for a CI job). With --profile the slowest imports are listed (python -X importtime),
+e.g. to find a module, which should be loaded on first use only.
+Usage: python3 bench/bench_startup.py [--profile] [budget in s] [number of runs]
+"""
+
+import os
+import sys
+import subprocess
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+BUDGET = 0.5                                                                    # max. startup time (s)
+RUNS = 5                                                                        # number of measured processes
+
+CHILD = """
+import time
+t = time.perf_counter()
+from lib import sgg
+t1 = time.perf_counter()
+s = sgg.sgg()
+t2 = time.perf_counter()
+gcode = "".join(s.GetGcodeChunks())
+t3 = time.perf_counter()
+print("%f %f %f" % (t1 - t, t2 - t1, t3 - t2))
+"""
+PROFILE = 15                                                                    # number of listed imports
+
+
+def Measure():  # ==============================================================
+    """Returns the time of the imports, of the initialisation and of the generation of a new process"""
+    out = subprocess.run([sys.executable, "-c", CHILD], cwd=APP_DIR, capture_output=True, text=True, check=True).stdout
+    return [float(v) for v in out.split()[-3:]]                                 # the last line, the modules may print warnings
+
+
+def Profile(n=PROFILE):  # =====================================================
+    """Returns the n imports with the longest cumulative time as [(seconds, module), ...]"""
+    err = subprocess.run([sys.executable, "-X", "importtime", "-c", CHILD], cwd=APP_DIR, capture_output=True, text=True, check=True).stderr
+    imports = []
+    for line in err.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line: continue
+        self_us, cumulative_us, module = line[12:].split("|")
+        imports.append((int(cumulative_us) / 1e6, module.rstrip()))
+    return sorted(imports, reverse=True)[:n]
+
+
+if __name__ == "__main__":
+    args = [a for a in sys.argv[1:] if a != "--profile"]
+    budget = float(args[0]) if len(args) > 0 else BUDGET
+    runs = int(args[1]) if len(args) > 1 else RUNS
+    if "--profile" in sys.argv:
+        for seconds, module in Profile():
+            print("%8.3f s  %s" % (seconds, module))
+    times = sorted((Measure() for r in range(runs)), key=sum)
+    imports, init, generation = times[len(times) // 2]
+    total = imports + init + generation
+    print("startup %.3f s (imports %.3f s, init %.3f s, generation %.3f s), budget %.3f s" % (total, imports, init, generation, budget))
+    sys.exit(0 if total <= budget else 1)
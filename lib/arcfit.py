@@ -0,0 +1,231 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""
+Purpose of the file:
+Replaces runs of short G01 moves of a <toolpath.Toolpath> by arcs (G02/G03) or longer lines.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+Only G01 moves with the same feed rate are combined. The circle through the
+first, the middle and the last point of a run is accepted, if all points and
+the midpoints of all moves are within the tolerance, all points are passed in
+the same direction and the arc is less than a full circle. If z changes (e.g.
+a ramp), it must change linearly with the angle (helix) within the tolerance.
+Collinear points are combined into one G01 move, z must change linearly, too.
+Starting at each point, the longest possible run is searched by doubling its
+length and bisection.
+"""
+
+import math
+import numpy
+
+from . import toolpath as tp
+
+VERSION = "261017"                                                              # version of this file (jjmmtt)
+
+MIN_MOVES = 2                                                                   # min. number of moves to be combined
+MAX_RADIUS = 10000.0                                                            # larger arcs are not used (mm,in)
+MAX_ANGLE = 2 * math.pi - 0.01                                                  # max. angle of an arc (rad)
+
+
+class Stats(object):  # ========================================================
+    """Result of the arc fitting of one nc-object"""
+
+    def __init__(self):
+        self.lines = 0                                                          # number of lines before the fitting
+        self.saved = 0                                                          # number of removed lines
+        self.arcs = 0                                                           # number of created arcs
+        self.deviation = 0.0                                                    # max. deviation of all arcs and lines
+
+    def Text(self):
+        """Returns the result as text, e.g. for a comment"""
+        return "Arc fitting: %d of %d lines saved, %d arcs, max. deviation %.4f" % (self.saved, self.lines, self.arcs, self.deviation)
+
+
+def Positions(path):  # ========================================================
+    """Returns the modal positions x, y, z and the feed rate after each row (nan: unknown).
+    Other g-code objects (TEXT, G83, ...) may move the machine, the position is unknown after them."""
+    n = path.n
+    idx = numpy.arange(n)
+    lastobj = numpy.maximum.accumulate(numpy.where(path.op[:n] == tp.OP_OBJECT, idx, -1))
+    result = []
+    for w in [tp.X, tp.Y, tp.Z, tp.F]:
+        last = numpy.maximum.accumulate(numpy.where(path.mask[:n] & (1 << w), idx, -1))
+        v = path.Column(w)[numpy.maximum(last, 0)]
+        result.append(numpy.where(last > lastobj, v, numpy.nan))
+    return result
+
+
+def Triples(px, py, pz, tol):  # ===============================================
+    """Returns for each point i, if the points i, i+1, i+2 may be combined (vectorized, simplified <Check>)"""
+    bx, by = px[1:-1] - px[:-2], py[1:-1] - py[:-2]
+    cx, cy = px[2:] - px[:-2], py[2:] - py[:-2]
+    cross = bx * cy - by * cx
+    chord = numpy.hypot(cx, cy)
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        if pz is not None:                                                      # z of the middle point, interpolated by the length of the moves
+            l1, l2 = numpy.hypot(bx, by), numpy.hypot(cx - bx, cy - by)
+            zok = numpy.abs(pz[:-2] + (pz[2:] - pz[:-2]) * l1 / (l1 + l2) - pz[1:-1]) <= 2 * tol
+        else:
+            zok = True
+        line = (numpy.abs(cross) / chord <= tol) & (bx * cx + by * cy > 0) & ((cx - bx) * cx + (cy - by) * cy > 0)
+        b2, c2 = bx * bx + by * by, cx * cx + cy * cy
+        ux = (cy * b2 - by * c2) / (2 * cross)
+        uy = (bx * c2 - cx * b2) / (2 * cross)
+        r = numpy.hypot(ux, uy)
+        m1 = numpy.abs(numpy.hypot(bx / 2 - ux, by / 2 - uy) - r)              # deviation at the midpoints of both moves
+        m2 = numpy.abs(numpy.hypot((bx + cx) / 2 - ux, (by + cy) / 2 - uy) - r)
+        arc = (r <= MAX_RADIUS) & (m1 <= tol) & (m2 <= tol)
+    return (line | arc) & (chord > tol) & zok
+
+
+def Check(px, py, pz, tol):  # =================================================
+    """Checks, if the points can be replaced by one move (pz=None: z does not change).
+    Returns None or (deviation, arc center x, y, counter clockwise) with a center of None for a line."""
+    n = len(px) - 1
+    if n < 1: return None
+    dx, dy = px[-1] - px[0], py[-1] - py[0]
+    chord = math.hypot(dx, dy)
+    if chord <= tol: return None                                                # (nearly) closed, no full circles
+    qx, qy = px - px[0], py - py[0]
+    dist = numpy.abs(dx * qy - dy * qx) / chord
+    if dist.max() <= tol:                                                       # line
+        t = (qx * dx + qy * dy) / chord
+        if (numpy.diff(t) > 0).all():
+            dev = dist.max()
+            if pz is not None: dev = max(dev, numpy.abs(pz[0] + (pz[-1] - pz[0]) * t / chord - pz).max())
+            if dev <= tol: return (float(dev), None, None, None)
+    m = n // 2
+    bx, by, cx, cy = qx[m], qy[m], dx, dy                                       # circle through the first, middle and last point
+    cross = bx * cy - by * cx
+    if cross == 0: return None
+    b2, c2 = bx * bx + by * by, cx * cx + cy * cy
+    ux = (cy * b2 - by * c2) / (2 * cross)
+    uy = (bx * c2 - cx * b2) / (2 * cross)
+    r = math.hypot(ux, uy)
+    if r > MAX_RADIUS: return None
+    vx, vy = qx - ux, qy - uy
+    dev = numpy.abs(numpy.hypot(vx, vy) - r).max()                              # points
+    mx, my = (vx[:-1] + vx[1:]) / 2, (vy[:-1] + vy[1:]) / 2
+    dev = max(dev, numpy.abs(numpy.hypot(mx, my) - r).max())                    # midpoints of the moves
+    if dev > tol: return None
+    turn = vx[:-1] * vy[1:] - vy[:-1] * vx[1:]                                  # direction of each move around the center
+    if not ((turn > 0).all() if cross > 0 else (turn < 0).all()): return None
+    angle = numpy.cumsum(numpy.abs(numpy.arctan2(turn, vx[:-1] * vx[1:] + vy[:-1] * vy[1:])))
+    if angle[-1] > MAX_ANGLE: return None
+    if pz is not None:                                                          # helix: z changes linearly with the angle
+        dev = max(dev, numpy.abs(pz[0] + (pz[-1] - pz[0]) * angle / angle[-1] - pz[1:]).max())
+        if dev > tol: return None
+    return (float(dev), px[0] + ux, py[0] + uy, cross > 0)
+
+
+def Longest(px, py, pz, i, tol):  # ============================================
+    """Returns the last point and the result of <Check> of the longest run starting at point i"""
+    n = len(px) - 1
+    lo = i + MIN_MOVES
+    best = Check(px[i:lo + 1], py[i:lo + 1], Part(pz, i, lo), tol)
+    if best is None: return i, None
+    step = MIN_MOVES
+    hi = None
+    while lo < n:                                                               # double the length until it fails
+        j = min(lo + step, n)
+        c = Check(px[i:j + 1], py[i:j + 1], Part(pz, i, j), tol)
+        if c is None:
+            hi = j
+            break
+        lo, best = j, c
+        step *= 2
+    while hi is not None and hi - lo > 1:                                       # bisection between lo (ok) and hi (failed)
+        j = (lo + hi) // 2
+        c = Check(px[i:j + 1], py[i:j + 1], Part(pz, i, j), tol)
+        if c is None: hi = j
+        else:         lo, best = j, c
+    return lo, best
+
+
+def Part(pz, i, j):  # ==========================================================
+    """Returns the z-values of the points i..j, None if z does not change"""
+    if pz is None: return None
+    z = pz[i:j + 1]
+    if (z == z[0]).all(): return None
+    return z
+
+
+def Runs(path):  # =============================================================
+    """Returns the positions and the runs (first row, last row) of G01 moves, which may be combined"""
+    n = path.n
+    x, y, z, f = Positions(path)
+    px, py = numpy.concatenate(([numpy.nan], x[:-1])), numpy.concatenate(([numpy.nan], y[:-1]))  # position before each row
+    pz, pf = numpy.concatenate(([numpy.nan], z[:-1])), numpy.concatenate(([numpy.nan], f[:-1]))
+    known_z = numpy.isnan(z) == numpy.isnan(pz)                                 # z is known before and after the move or not at all
+    ok = (path.op[:n] == tp.OP_G01) & path.Has(tp.M_X | tp.M_Y) & ~numpy.isnan(px) & ~numpy.isnan(py) & known_z
+    cont = ok & numpy.concatenate(([False], ok[:-1])) & ((f == pf) | (numpy.isnan(f) & numpy.isnan(pf)))
+    starts = numpy.flatnonzero(ok & ~cont)
+    ends = numpy.flatnonzero(ok & ~numpy.concatenate((cont[1:], [False])))
+    return (x, y, z, f, px, py, pz), list(zip(starts, ends))
+
+
+def Fit(path, tol, stats=None):  # =============================================
+    """Returns a new toolpath with arcs and lines instead of runs of short G01 moves.
+    The given toolpath is not modified."""
+    path = tp.FromObjects(path)
+    if stats is None: stats = Stats()
+    stats.lines += path.n
+    if path.n < MIN_MOVES + 1: return path
+    (x, y, z, f, px, py, pz), runs = Runs(path)
+    segments = []                                                               # (first row, last row, start x, y, deviation, center x, y, ccw)
+    for a, b in runs:
+        if b - a + 1 < MIN_MOVES: continue
+        qx = numpy.concatenate(([px[a]], x[a:b + 1]))                           # start point and the end points of the moves
+        qy = numpy.concatenate(([py[a]], y[a:b + 1]))
+        qz = numpy.concatenate(([pz[a]], z[a:b + 1]))
+        if numpy.isnan(qz[0]) or (qz == qz[0]).all(): qz = None                # z unknown or constant
+        candidate = Triples(qx, qy, qz, tol)
+        i, n = 0, b - a + 1
+        while i + MIN_MOVES <= n:
+            if not candidate[i]:
+                i += 1
+                continue
+            j, c = Longest(qx, qy, qz, i, tol)
+            if c is None:
+                i += 1
+                continue
+            segments.append((a + i, a + j - 1, qx[i], qy[i]) + c)
+            i = j
+    if not segments: return path
+
+    keep = numpy.ones(path.n, dtype=bool)
+    for first, last, sx, sy, dev, cx, cy, ccw in segments:
+        keep[first:last] = False                                                # the last move of a run is replaced by the new one
+    rows = numpy.flatnonzero(keep)
+    result = path.Select(rows)
+    new = numpy.cumsum(keep) - 1                                                # new row of each kept row
+    hasf = numpy.concatenate(([0], numpy.cumsum((path.mask[:path.n] & tp.M_F) > 0)))
+    hasz = numpy.concatenate(([0], numpy.cumsum((path.mask[:path.n] & tp.M_Z) > 0)))
+    for first, last, sx, sy, dev, cx, cy, ccw in segments:
+        r = new[last]
+        if cx is not None:
+            result.op[r] = tp.OP_G03 if ccw else tp.OP_G02
+            for w, v in [(tp.I, cx - sx), (tp.J, cy - sy)]:
+                (result.values[w] if result.values[w] is not None else result.NewColumn(w))[r] = v
+            result.mask[r] |= tp.M_I | tp.M_J
+            stats.arcs += 1
+        if hasf[last + 1] > hasf[first]:                                        # a feed rate was set within the run
+            (result.values[tp.F] if result.values[tp.F] is not None else result.NewColumn(tp.F))[r] = f[last]
+            result.mask[r] |= tp.M_F
+        if hasz[last + 1] > hasz[first]:                                        # z was set within the run (ramp, helix)
+            (result.values[tp.Z] if result.values[tp.Z] is not None else result.NewColumn(tp.Z))[r] = z[last]
+            result.mask[r] |= tp.M_Z
+        stats.deviation = max(stats.deviation, dev)
+    stats.saved += path.n - result.n
+    return result
@@ -29,22 +29,31 @@ Handling of different number formats in <DrillTable> needs improvement.
 
 import csv
 import glob
-import configparser
+
+from . import settings                                                                 # parsed ini-files
 
 VERSION = "230206"                                                              # version of this file (jjmmtt)
 
 DIR = ""                                                                        # Directory of the counterbore tables
-TABLES = []                                                                     # List of instances of <Table>
+# TABLES: list of instances of <Table>, loaded on first use (see <__getattr__>)
 
 
 def Init():  # =================================================================
-    """Initialises the module"""
-    config = configparser.ConfigParser()
-    config.read('sgg.ini')
+    """Initialises the module, the tables are loaded on first use"""
     global DIR
-    DIR = config.get('SIMPLEGCODEGENERATOR', 'SGG_COUNTERBORE_DIR')
-    if not LoadAllTables(""):
-        print("Error loading counter bore table. Check path in the file <sgg.ini>.")
+    DIR = settings.Get().get('SIMPLEGCODEGENERATOR', 'SGG_COUNTERBORE_DIR')
+    globals().pop("TABLES", None)                                               # load them again on the next use
+
+
+def __getattr__(name):  # ======================================================
+    """Loads the tables, when <TABLES> is used the first time (PEP 562)"""
+    if name == "TABLES":
+        global TABLES
+        TABLES = []
+        if not LoadAllTables(""):
+            print("Error loading counter bore table. Check path in the file <sgg.ini>.")
+        return TABLES
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
 
 
 class Data():  # ===============================================================
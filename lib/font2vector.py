@@ -31,21 +31,22 @@ Implement correct version recognition.
 Implement parsing chinese, etc. Does not work yet.
 """
 
+import os
 import math
 import re
-import configparser
+
+from . import settings                                                                 # parsed ini-files
 
 VERSION = "230206"                                                              # version of this file (jjmmtt)
 DIR = ""                                                                        # path to cxf-fonts
 DEBUG = False
+FONTS = {}                                                                      # (file name, arc resolution) -> (modification time, font)
 
 
 def Init():  # =================================================================
     """Initialises the module"""
-    config = configparser.ConfigParser()
-    config.read('sgg.ini')
     global DIR
-    DIR = config.get('SIMPLEGCODEGENERATOR', 'SGG_CXF_FONTS_DIR')
+    DIR = settings.Get().get('SIMPLEGCODEGENERATOR', 'SGG_CXF_FONTS_DIR')
 
 
 class Stroke(object):  # =======================================================
@@ -125,11 +126,16 @@ def CharToKey(c):  # ===========================================================
 
 
 def LoadFont(fn, arcres):  # ===================================================
-    """Load and parse the file and return an instance of <Font>"""
+    """Load and parse the file and return an instance of <Font>.
+    A file is parsed only once, the fonts are not modified by the nc-objects."""
     try:
+        key = (os.path.abspath(fn), arcres)
+        mtime = os.path.getmtime(fn)
+        if key in FONTS and FONTS[key][0] == mtime: return FONTS[key][1]
         file = open(fn, 'r')
         font = ParseCXF(file, arcres)
         file.close()
+        FONTS[key] = (mtime, font)
         return font
     except:
         if DEBUG: print("<LoadFont> : Error loading and/or parsing font file.")
@@ -0,0 +1,352 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""
+Purpose of the file:
+Converts a whole <toolpath.Toolpath> into g-code text at once.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+The output is byte by byte the same as the one of <GetGcode> of the single
+g-code objects (see <gcode.py>), but all numbers of a block of rows are
+converted with numpy and written directly into a preallocated buffer.
+Only numbers, where the rounding of '%4.4f' can not be decided exactly with
+floating point arithmetic, are formatted by python itself.
+
+With a <Modal> instance the production output is created instead: words, which
+do not change the modal state (G00..G03, X, Y, Z, F), and all comments of moves
+and commands are left out. The number of decimals is configurable, trailing
+zeros can be removed. The modal state is passed from block to block and from
+object to object, any g-code object which may change the state (TEXT, G, G83,
+M6, ...) resets it.
+"""
+
+import re
+import copy
+import numpy
+
+from . import gcode as gc
+from . import toolpath as tp
+
+VERSION = "261017"                                                              # version of this file (jjmmtt)
+
+DECIMALS = 4                                                                    # number of decimals, see <gcode.FORMAT.FV>
+BLOCKSIZE = 65536                                                               # rows per block, limits the temporary memory
+OPWORDS = {tp.OP_G00: b"G00", tp.OP_G01: b"G01", tp.OP_G02: b"G02", tp.OP_G03: b"G03"}
+LETTERS = numpy.frombuffer("".join(tp.WORDS).encode(), dtype=numpy.uint8)
+CMT_PREFIX = gc.FORMAT().CMT("").split("(")[0].encode() + b"( "                # "\t\t\t\t\t\t( "
+CMT_SUFFIX = b" )"
+POW10 = 10 ** numpy.arange(19, dtype=numpy.int64)
+LIMIT = 2.0 ** 52                                                               # larger values (* 10^decimals) are formatted by python
+MODAL_WORDS = [tp.X, tp.Y, tp.Z, tp.F]                                          # words, which keep their value until changed
+DISTANCE_MODE = re.compile(r"G0*9([01])(?![0-9.])", re.IGNORECASE)             # G90 absolute, G91 incremental
+
+
+def Numbers(v, decimals=DECIMALS):  # ==========================================
+    """Prepares the formatting of an array of floats.
+    Returns sign (bool), integer part, decimal part and number of integer digits.
+    Values, which have to be formatted by python, are marked in <slow>."""
+    a = numpy.abs(v)
+    neg = numpy.signbit(v)
+    with numpy.errstate(invalid="ignore"):
+        t = a * 10 ** decimals
+        fl = numpy.floor(t)
+        frac = t - fl
+        slow = ~(t < LIMIT) | (numpy.abs(frac - 0.5) <= (t + 1) * 1e-12)    # non finite, too large or close to a tie
+    t = numpy.where(slow, 0, t)
+    q = numpy.floor(t + 0.5).astype(numpy.int64)
+    ip = q // 10 ** decimals
+    dp = q % 10 ** decimals
+    nd = numpy.maximum(numpy.searchsorted(POW10, ip, side="right"), 1)
+    return neg, ip, dp, nd, slow
+
+
+def Trim(dp, decimals):  # =====================================================
+    """Removes the trailing zeros of the decimal parts, returns the new decimal parts and their number of digits"""
+    nz = numpy.full(dp.shape, decimals, dtype=numpy.int64)
+    for i in range(decimals):
+        sel = dp % 10 == 0
+        sel &= nz > 0
+        if not sel.any(): break
+        dp = numpy.where(sel, dp // 10, dp)
+        nz -= sel
+    return dp, nz
+
+
+def WriteNumbers(buf, p, neg, ip, dp, nd, nz):  # ==============================
+    """Writes the numbers to the positions p of the buffer (nz: number of decimals, 0=no decimal point, int=all the same)"""
+    if len(p) == 0: return
+    buf[p[neg]] = ord("-")
+    p = p + neg
+    for i in range(int(nd.max())):                                             # integer part, most significant digit first
+        sel = nd > i
+        buf[p[sel] + i] = 48 + (ip[sel] // POW10[nd[sel] - 1 - i]) % 10
+    p = p + nd
+    if isinstance(nz, int):                                                     # the same number of decimals for all numbers
+        buf[p] = ord(".")
+        for i in range(nz):
+            buf[p + 1 + i] = 48 + (dp // POW10[nz - 1 - i]) % 10
+        return
+    sel = nz > 0
+    buf[p[sel]] = ord(".")
+    for i in range(int(nz.max())):
+        sel = nz > i
+        buf[p[sel] + 1 + i] = 48 + (dp[sel] // POW10[nz[sel] - 1 - i]) % 10
+
+
+def Python(v, decimals, trim):  # ==============================================
+    """Formats a single number with python"""
+    s = "%.*f" % (decimals, v)
+    if trim and "." in s: s = s.rstrip("0").rstrip(".")
+    if trim and s == "-0": s = "0"
+    return s
+
+
+def Lengths(chunks):  # ========================================================
+    """Returns the lengths of the byte strings as an array"""
+    return numpy.fromiter((len(c) for c in chunks), dtype=numpy.int64, count=len(chunks))
+
+
+def Scatter(buf, starts, chunks):  # ===========================================
+    """Copies the byte strings <chunks> to the positions <starts> of the buffer"""
+    if len(chunks) == 0: return
+    lens = Lengths(chunks)
+    blob = numpy.frombuffer(b"".join(chunks), dtype=numpy.uint8)
+    offs = numpy.cumsum(lens) - lens
+    buf[numpy.repeat(numpy.asarray(starts, dtype=numpy.int64) - offs, lens) + numpy.arange(blob.shape[0])] = blob
+
+
+def Format(path, start=0, end=None, modal=None):  # ============================
+    """Returns the g-code of the rows start..end of the toolpath as bytes (one line per row).
+    With <modal> the production output is returned, see <FormatModal>."""
+    if modal is not None: return FormatModal(path, modal, start, end)
+    if end is None or end > path.n: end = path.n
+    n = end - start
+    if n <= 0: return b""
+    op = path.op[start:end]
+    mask = path.mask[start:end].astype(numpy.int64)
+    lens = numpy.ones(n, dtype=numpy.int64)                                     # line break
+
+    objrows = numpy.flatnonzero(op == tp.OP_OBJECT)
+    objtext = [path.objects[r + start].GetGcode().encode() for r in objrows]
+    lens[objrows] += Lengths(objtext)
+    for o, word in OPWORDS.items():
+        lens[op == o] += len(word)
+
+    numbers = []                                                                # per word: rows, sign, integer, decimals, digits, python strings
+    for w in range(len(tp.WORDS)):
+        rows = numpy.flatnonzero(mask & (1 << w))
+        if len(rows) == 0: continue
+        v = path.values[w][start:end][rows]
+        neg, ip, dp, nd, slow = Numbers(v)
+        length = 2 + neg + nd + 1 + DECIMALS                                    # " X" + sign + integer + "." + decimals
+        text = {}
+        for s in numpy.flatnonzero(slow):
+            text[s] = gc.FORMAT().FV(float(v[s])).encode()
+            length[s] = 2 + len(text[s])
+        lens[rows] += length
+        numbers.append((w, rows, neg, ip, dp, nd, slow, text, length))
+
+    cmtrows = numpy.flatnonzero(mask & tp.M_C)
+    cmttext = [CMT_PREFIX + str(path.comments[r + start]).encode() + CMT_SUFFIX for r in cmtrows]
+    lens[cmtrows] += Lengths(cmttext)
+
+    ends = numpy.cumsum(lens)
+    buf = numpy.empty(ends[-1], dtype=numpy.uint8)
+    pos = ends - lens                                                           # write position of each line
+
+    Scatter(buf, pos[objrows], objtext)
+    for o, word in OPWORDS.items():
+        rows = numpy.flatnonzero(op == o)
+        for i, ch in enumerate(word):
+            buf[pos[rows] + i] = ch
+        pos[rows] += len(word)
+
+    for w, rows, neg, ip, dp, nd, slow, text, length in numbers:
+        p = pos[rows]
+        buf[p] = ord(" ")
+        buf[p + 1] = LETTERS[w]
+        fast = ~slow                                                            # no placeholder digits for the slow rows, e.g. "nan" is shorter
+        WriteNumbers(buf, p[fast] + 2, neg[fast], ip[fast], dp[fast], nd[fast], DECIMALS)
+        Scatter(buf, p[slow] + 2, list(text.values()))
+        pos[rows] += length
+
+    Scatter(buf, pos[cmtrows], cmttext)
+    buf[ends - 1] = ord("\n")
+    return buf.tobytes()
+
+
+class Modal(object):  # =========================================================
+    """Settings and modal state of the production output"""
+
+    def __init__(self, decimals=DECIMALS, trim=True):
+        """Initialise the settings and an unknown modal state"""
+        self.decimals = decimals                                                # number of decimals
+        self.trim = trim                                                        # remove trailing zeros
+        self.Reset()
+
+    def Reset(self):
+        """The modal state is unknown"""
+        self.op = None                                                          # last motion mode (opcode)
+        self.words = dict((w, None) for w in MODAL_WORDS)                       # last value of each modal word (* 10^decimals)
+        self.absolute = True                                                    # distance mode G90, nothing is left out in G91
+
+    def GetState(self):
+        """Returns the modal state and the settings, e.g. to check if cached g-code is still valid"""
+        return (self.decimals, self.trim, self.op, tuple(self.words[w] for w in MODAL_WORDS), self.absolute)
+
+    def SetState(self, state):
+        """Restores a state returned by <GetState>"""
+        self.decimals, self.trim, self.op, words, self.absolute = state
+        self.words = dict(zip(MODAL_WORDS, words))
+
+
+def Barrier(o):  # =============================================================
+    """Returns True, if the g-code object may change the modal state"""
+    if isinstance(o, (gc.COMMENT, gc.T)): return False
+    if isinstance(o, gc.M) and not o.n == 6: return False                      # a tool change may move the machine
+    return True
+
+
+def Modalize(present, key, valid, barrier, state):  # ===========================
+    """Returns the rows of a modal word or code, which do not change the modal state, and the new state.
+    present: rows which contain the word, key: value to compare, valid: value is comparable,
+    barrier: rows which reset the modal state, state: value before the first row (None=unknown)."""
+    n = len(present)
+    idx = numpy.arange(n)
+    last = numpy.maximum.accumulate(numpy.where(present, idx, -1))            # last row with the word up to each row
+    prev = numpy.concatenate(([-1], last[:-1]))
+    lastbar = numpy.maximum.accumulate(numpy.where(barrier, idx, -1))
+    inside = prev > lastbar                                                     # previous value known, no reset since then
+    p = numpy.maximum(prev, 0)
+    same = present & valid & inside & valid[p] & (key[p] == key)
+    if state is not None:
+        same |= present & valid & (prev < 0) & (lastbar < 0) & (key == state)
+    if last[-1] > lastbar[-1]:   state = int(key[last[-1]]) if valid[last[-1]] else None
+    elif lastbar[-1] >= 0:       state = None
+    return same, state
+
+
+def FormatModal(path, modal, start=0, end=None):  # ============================
+    """Returns the production output of the rows start..end of the toolpath as bytes and updates the modal state"""
+    if end is None or end > path.n: end = path.n
+    n = end - start
+    if n <= 0: return b""
+    d, trim = modal.decimals, modal.trim
+    op = path.op[start:end]
+    mask = path.mask[start:end].astype(numpy.int64)
+    isobj = op == tp.OP_OBJECT
+    objrows = numpy.flatnonzero(isobj)
+    objtext = []
+    barrier = numpy.zeros(n, dtype=bool)
+    incremental = []                                                            # rows, where G91 starts and ends
+    absolute = modal.absolute                                                   # distance mode at the first row
+    for r in objrows:
+        o = path.objects[r + start]
+        barrier[r] = Barrier(o)
+        if not isinstance(o, gc.COMMENT) and getattr(o, "c", None) is not None:
+            o = copy.copy(o)
+            o.c = None                                                          # no comments in the production output
+        g = o.GetGcode()
+        if barrier[r]:
+            mode = DISTANCE_MODE.findall(g)
+            if mode and (mode[-1] == "0") != modal.absolute:
+                modal.absolute = not modal.absolute
+                incremental.append(r)
+        objtext.append(g.encode())
+    if incremental or not absolute:                                             # every row in G91 resets the modal state
+        switch = numpy.zeros(n, dtype=numpy.int64)
+        switch[incremental] = 1
+        barrier |= numpy.cumsum(switch) % 2 == (1 if absolute else 0)
+
+    arc = (op == tp.OP_G02) | (op == tp.OP_G03)
+    numbers = []                                                                # per word: kept rows (all rows), numbers of the present rows
+    keep = numpy.zeros(n, dtype=bool)                                           # rows with at least one word
+    for w in range(len(tp.WORDS)):
+        present = (mask & (1 << w)) > 0
+        rows = numpy.flatnonzero(present)
+        if len(rows) == 0: continue
+        v = path.values[w][start:end][rows]
+        neg, ip, dp, nd, slow = Numbers(v, d)
+        q = ip * 10 ** d + dp
+        neg &= slow | (q > 0)                                                   # no "-0"
+        if trim: dp, nz = Trim(dp, d)
+        else:    nz = numpy.full(len(rows), d)
+        kept = present
+        if w in MODAL_WORDS:
+            key = numpy.zeros(n, dtype=numpy.int64)
+            key[rows] = numpy.where(neg, -q, q)
+            valid = numpy.zeros(n, dtype=bool)
+            valid[rows] = ~slow
+            same, modal.words[w] = Modalize(present, key, valid, barrier, modal.words[w])
+            if not w == tp.F: same &= ~arc                                      # arcs without axis words are not allowed
+            kept = present & ~same
+        keep |= kept
+        sel = kept[rows]                                                        # numbers of the kept rows only
+        text = [Python(float(x), d, trim).encode() for x in v[sel & slow]]
+        numbers.append((w, rows[sel], neg[sel], ip[sel], dp[sel], nd[sel], nz[sel], slow[sel], text))
+
+    motion = keep & ~isobj                                                      # moves without any word are left out
+    same, modal.op = Modalize(motion, op.astype(numpy.int64), motion, barrier, modal.op)
+    opkept = motion & ~same
+
+    lens = numpy.zeros(n, dtype=numpy.int64)
+    lens[motion | isobj] = 1                                                    # line break
+    lens[objrows] += Lengths(objtext)
+    first = numpy.ones(n, dtype=bool)                                           # no word written yet, no space needed
+    for o, word in OPWORDS.items():
+        sel = opkept & (op == o)
+        lens[sel] += len(word)
+        first[sel] = False
+    spaces = []
+    for i, (w, rows, neg, ip, dp, nd, nz, slow, text) in enumerate(numbers):
+        length = 1 + neg + nd + (nz > 0) + nz                                   # letter + sign + integer + "." + decimals
+        if len(text): length[slow] = 1 + Lengths(text)
+        space = ~first[rows]
+        first[rows] = False
+        lens[rows] += space + length
+        spaces.append((space, length))
+
+    ends = numpy.cumsum(lens)
+    if ends[-1] == 0: return b""
+    buf = numpy.empty(ends[-1], dtype=numpy.uint8)
+    pos = ends - lens
+
+    Scatter(buf, pos[objrows], objtext)
+    for o, word in OPWORDS.items():
+        rows = numpy.flatnonzero(opkept & (op == o))
+        for i, ch in enumerate(word):
+            buf[pos[rows] + i] = ch
+        pos[rows] += len(word)
+    for (w, rows, neg, ip, dp, nd, nz, slow, text), (space, length) in zip(numbers, spaces):
+        p = pos[rows]
+        buf[p[space]] = ord(" ")
+        p = p + space
+        buf[p] = LETTERS[w]
+        fast = ~slow
+        WriteNumbers(buf, p[fast] + 1, neg[fast], ip[fast], dp[fast], nd[fast], nz[fast])
+        Scatter(buf, p[slow] + 1, text)
+        pos[rows] = p + length
+    lines = numpy.flatnonzero(lens)
+    buf[ends[lines] - 1] = ord("\n")
+    return buf.tobytes()
+
+
+def FormatBlocks(path, blocksize=BLOCKSIZE, modal=None):  # ====================
+    """Generator, returns the g-code of the toolpath block by block as bytes"""
+    for start in range(0, path.n, blocksize):
+        yield Format(path, start, start + blocksize, modal)
+
+
+def GetGcode(path, modal=None):  # =============================================
+    """Returns the g-code of the whole toolpath as a string"""
+    return b"".join(FormatBlocks(path, modal=modal)).decode("utf-8")
@@ -26,7 +26,6 @@ ToDo:
 """
 
 import math
-import numpy
 
 from . import mathutils as mu
 
@@ -34,7 +33,7 @@ VERSION = "230206"
 
 # FORMAT
 # TEXT, COMMENT
-# T, F, M, G00, G01, G02, G03, G83
+# T, F, M, G00, G01, G02, G03, G73, G81, G83, XY
 
 class FORMAT(object):  # =======================================================
     """Formatting of g-code"""
@@ -333,6 +332,7 @@ class G83(FORMAT):  # ====================================================
         if self.x is not None: self.x += o[0]
         if self.y is not None: self.y += o[1]
         if self.z is not None: self.z += o[2]
+        if self.r is not None: self.r += o[2]                                   # the R-plane is absolute like z
 
     def Rotate(self, c, d):  # p=[x,y,z], d=n°
         if not self.x==None and not self.y==None:
@@ -350,3 +350,81 @@ class G83(FORMAT):  # ====================================================
         if self.f is not None: g += " F" + self.FV(self.f)
         if self.c is not None: g += self.CMT(self.c)
         return g
+
+
+class G81(FORMAT):  # ====================================================
+    """Implements the g-code G81, drilling cycle"""
+
+    name = "G81"
+    description = "Drilling cycle"
+
+    def __init__(self, x=None, y=None, z=None, r=None, l=None, f=None, c=None):
+        self.x = x
+        self.y = y
+        self.z = z
+        self.r = r
+        self.l = l
+        self.f = f
+        self.c = c
+
+    def AddOffset(self, o):
+        if self.x is not None: self.x += o[0]
+        if self.y is not None: self.y += o[1]
+        if self.z is not None: self.z += o[2]
+        if self.r is not None: self.r += o[2]                                   # the R-plane is absolute like z
+
+    def Rotate(self, c, d):  # p=[x,y,z], d=n°
+        if not self.x==None and not self.y==None:
+            [self.x, self.y] = mu.PointRotate([self.x, self.y], c, d)
+
+    def GetGcode(self):
+        """Retuns the g-code as a string"""
+        g = "G81"
+        if self.x is not None: g += " X" + self.FV(self.x)
+        if self.y is not None: g += " Y" + self.FV(self.y)
+        if self.z is not None: g += " Z" + self.FV(self.z)
+        if self.r is not None: g += " R" + self.FV(self.r)
+        if self.l is not None: g += " L" + self.FV(self.l)
+        if self.f is not None: g += " F" + self.FV(self.f)
+        if self.c is not None: g += self.CMT(self.c)
+        return g
+
+
+class G73(G83):  # ======================================================
+    """Implements the g-code G73, drilling cycle with chip breaking"""
+
+    name = "G73"
+    description = "Drilling cycle, chip breaking"
+
+    def GetGcode(self):
+        """Retuns the g-code as a string"""
+        return "G73" + G83.GetGcode(self)[3:]
+
+
+class XY(FORMAT):  # ===========================================================
+    """Implements a position without g-code, e.g. the next hole of a canned cycle"""
+
+    name = "XY"
+    description = "Position, repeats the current motion mode"
+
+    def __init__(self, x=None, y=None, c=None):
+        self.x = x
+        self.y = y
+        self.c = c
+
+    def AddOffset(self, o):
+        if self.x is not None: self.x += o[0]
+        if self.y is not None: self.y += o[1]
+
+    def Rotate(self, c, d):  # p=[x,y,z], d=n°
+        if not self.x==None and not self.y==None:
+            [self.x, self.y] = mu.PointRotate([self.x, self.y], c, d)
+
+    def GetGcode(self):
+        """Retuns the g-code as a string"""
+        g = []
+        if self.x is not None: g.append("X" + self.FV(self.x))
+        if self.y is not None: g.append("Y" + self.FV(self.y))
+        g = " ".join(g)
+        if self.c is not None: g += self.CMT(self.c)
+        return g
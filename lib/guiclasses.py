@@ -42,9 +42,11 @@ ToDo:
 - The tooltip sometimes flickers. Moving the window "solves" it.
 """
 
+import math
 import tkinter as tk
 import tkinter.messagebox
 import tkinter.filedialog
+import numpy
 
 from . import widgets
 from . import widgets as wi  # imports pre-defined widgets class
@@ -61,7 +63,101 @@ VERSION = "230206"  # version of this file (jjmmdd)
 
 WINPOSX = 6  # x-position in root window, where to put the child window
 WINPOSY = 383  # y-position in root window, where to put the child window
-TIME_UPDATE = 500  # interval to update the corresponding ncclass in [ms]
+TIME_CHANGE = 300  # delay after the last change in the gui, until the ncclass is updated [ms]
+EVENT_CHANGED = "<<ObjectChanged>>"  # virtual event of the root window, when a gui has updated its ncclass
+PLUNGE = [["linear", "G01 / G81"], ["peck", "G83"], ["chip breaking", "G73"]]  # plunge strategies of the drilling classes
+RETRACT = [["initial level", "G98"], ["R-plane", "G99"]]  # retract modes of the canned cycles
+PREVIEW_ITEMS = 2000  # max. number of canvas items of a preview, more are drawn as one image (see <DrawHoles>)
+PREVIEW_SAMPLES = 4000000  # max. number of pixels set for the lines of an image (see <DrawLines>)
+
+
+def Notify(root):  # ===========================================================
+    """Tells the main window, that an ncclass has been changed (see <EVENT_CHANGED>)"""
+    root.event_generate(EVENT_CHANGED, when="tail")
+
+
+def DrawHoles(canvas, holes, r, s, ox=0, oy=0):  # ============================
+    """Draws the holes (array of x, y) with the radius r, scaled by s around the canvas point ox, oy.
+    Up to <PREVIEW_ITEMS> holes are drawn as circles, more holes as an image (a ring or a point each)."""
+    x, y, rp = ox + holes[:, 0] * s, oy - holes[:, 1] * s, r * s
+    if len(holes) <= PREVIEW_ITEMS:
+        for cx, cy in zip(x.tolist(), y.tolist()):
+            canvas.create_oval((cx - rp, cy - rp, cx + rp, cy + rp))
+        return
+    a = numpy.linspace(0, 2 * math.pi, max(1, int(2 * math.pi * rp)), endpoint=False)  # about one pixel per step
+    ring = numpy.unique(numpy.round(numpy.column_stack((numpy.cos(a), numpy.sin(a))) * rp), axis=0)
+    DrawPixels(canvas, (x[:, None] + ring[:, 0]).ravel(), (y[:, None] + ring[:, 1]).ravel())
+
+
+def DrawLines(canvas, lines, s, ox=0, oy=0):  # ================================
+    """Draws the lines (array of x0, y0, x1, y1), scaled by s around the canvas point ox, oy.
+    Up to <PREVIEW_ITEMS> lines are drawn as canvas lines, more lines as an image."""
+    x0, y0, x1, y1 = ox + lines[:, 0] * s, oy - lines[:, 1] * s, ox + lines[:, 2] * s, oy - lines[:, 3] * s
+    if len(lines) <= PREVIEW_ITEMS:
+        for line in zip(x0.tolist(), y0.tolist(), x1.tolist(), y1.tolist()):
+            canvas.create_line(line)
+        return
+    n = int(numpy.hypot(x1 - x0, y1 - y0).max()) + 2 if len(lines) else 2  # about one sample per pixel
+    t = numpy.linspace(0, 1, max(2, min(n, PREVIEW_SAMPLES // len(lines))))
+    DrawPixels(canvas, (x0[:, None] + (x1 - x0)[:, None] * t).ravel(), (y0[:, None] + (y1 - y0)[:, None] * t).ravel())
+
+
+def DrawPixels(canvas, x, y):  # ===============================================
+    """Draws black pixels at the canvas points as one image below all other items"""
+    if not len(x): return
+    left, top = int(math.floor(x.min())), int(math.floor(y.min()))
+    w, h = int(x.max()) - left + 1, int(y.max()) - top + 1
+    pixels = numpy.full((h, w), 255, dtype=numpy.uint8)
+    pixels[(y - top).astype(int), (x - left).astype(int)] = 0
+    canvas.preview = tk.PhotoImage(master=canvas, data=b"P5 %d %d 255\n" % (w, h) + pixels.tobytes(), format="PPM")  # keep a reference
+    canvas.tag_lower(canvas.create_image(left, top, anchor=tk.NW, image=canvas.preview))
+
+
+class Changes(object):  # ======================================================
+    """Updates the ncclass, when a variable or a text of the gui has been changed (no polling)"""
+
+    def Watch(self, variables=None, texts=()):
+        """Traces the variables (default: the variables of <parlist>) and the text widgets"""
+        self.after = None  # pending update of the ncclass
+        if variables is None: variables = [getattr(self, p) for p in self.parlist if hasattr(self, p)]
+        for v in variables:
+            v.trace_add("write", self.Changed)
+        for t in texts:
+            t.edit_modified(False)
+            t.bind("<<Modified>>", self.TextChanged, add="+")
+
+    def TextChanged(self, event):
+        """Handles the modified flag of a text widget"""
+        if event.widget.edit_modified():
+            event.widget.edit_modified(False)  # sends <<Modified>> again, but the flag is not set
+            self.Changed()
+
+    def Changed(self, *dummy):
+        """Updates the ncclass after a pause, e.g. only once after typing a number"""
+        if self.after is not None: self.win.after_cancel(self.after)
+        self.after = self.win.after(TIME_CHANGE, self.Commit)
+
+    def Commit(self):
+        """Updates the ncclass and notifies the main window"""
+        self.after = None
+        self.WriteDataToLogic()
+        Notify(self.root)
+
+    def Flush(self):
+        """Updates the ncclass at once, if a change is pending"""
+        if self.after is None: return
+        self.win.after_cancel(self.after)
+        self.Commit()
+
+    def Bind(self, ncclass_instance):
+        """Edits another object of the same ncclass with this window (one window per ncclass)"""
+        self.Flush()  # a pending change belongs to the previous object
+        self.nco = ncclass_instance
+        self.GetDataFromLogic()
+        if self.after is not None:  # the variables have only been loaded
+            self.win.after_cancel(self.after)
+            self.after = None
+        self.Show()
 
 
 class FeedAndSpeed():  # =======================================================
@@ -228,7 +324,8 @@ class PrePostamble():
 
     def __init__(self, rootwin, plane, preamble_gcode, postamble_gcode, preamble_tool,
                  preamble_zsh, preamble_plane, preamble_spindle_cw, preamble_spindle_ccw,
-                 preamble_mist, preamble_flood, postamble_zsh, postamble_spindle_off, postamble_coolant_off):
+                 preamble_mist, preamble_flood, postamble_zsh, postamble_spindle_off, postamble_coolant_off,
+                 arcfit=None, arcfit_tol=None, simplify=None, simplify_tol=None):
         self.rootwin = rootwin
 
         self.plane = plane
@@ -244,6 +341,10 @@ class PrePostamble():
         self.postamble_zsh = postamble_zsh
         self.postamble_spindle_off = postamble_spindle_off
         self.postamble_coolant_off = postamble_coolant_off
+        self.arcfit = arcfit
+        self.arcfit_tol = arcfit_tol
+        self.simplify = simplify
+        self.simplify_tol = simplify_tol
 
     def show(self):
         """Creates a popup window for the configuration of the per- and postamble"""
@@ -273,9 +374,16 @@ class PrePostamble():
             wi.Optionbutton(self.winpp, self.postamble_spindle_off, "Turn spindle off", "M5", column=0, row=13)
             wi.Optionbutton(self.winpp, self.postamble_coolant_off, "Turn coolant off", "M9", column=0, row=14)
             wi.LabelEntry(self.winpp, self.postamble_gcode, "Individual g-code", "", column=0, row=15, width=20)
+            if self.arcfit is not None:
+                tk.Label(self.winpp, text="Toolpath", font="bold", bg="Dark grey").grid(column=0, row=16, columnspan=2, sticky="EW", padx=1)
+                wi.Optionbutton(self.winpp, self.arcfit, "Fit arcs", "G01 -> G02/G03, in the XY plane (G17) only", column=0, row=17)
+                wi.LabelEntry(self.winpp, self.arcfit_tol, "Arc tolerance", "mm,in", column=0, row=18, width=10)
+            if self.simplify is not None:
+                wi.Optionbutton(self.winpp, self.simplify, "Simplify lines", "G01", column=0, row=19)
+                wi.LabelEntry(self.winpp, self.simplify_tol, "Simplify tolerance", "mm,in", column=0, row=20, width=10)
 
 
-class Baseclass(widgets.Widgets):  # ===========================================
+class Baseclass(widgets.Widgets, Changes):  # ==================================
     """Implements the basic variables, logic and widgets for the different gui"""
 
     def __init__(self, root, ncclass_instance, winoffsetx=WINPOSX, winoffsety=WINPOSY):
@@ -317,10 +425,15 @@ class Baseclass(widgets.Widgets):  # ===========================================
         self.postamble_zsh = tk.BooleanVar(self.root, False)
         self.postamble_spindle_off = tk.BooleanVar(self.root, False)
         self.postamble_coolant_off = tk.BooleanVar(self.root, False)
+        self.arcfit = tk.BooleanVar(self.root, False)
+        self.arcfit_tol = tk.DoubleVar(self.root, 0.01)
+        self.simplify = tk.BooleanVar(self.root, False)
+        self.simplify_tol = tk.DoubleVar(self.root, 0.01)
 
         self.parlist = ["objectname", "tn", "td", "so", "frtd", "frso", "frz", "ss", "zsh", "z0", "z1", "zi", "posx", "posy", "rx", "ry", "deg", "plane", "preamble_gcode",
         "postamble_gcode", "preamble_tool", "preamble_zsh", "preamble_plane", "preamble_spindle_cw", "preamble_spindle_ccw", "preamble_mist", "preamble_flood",
-        "postamble_zsh", "postamble_spindle_off", "postamble_coolant_off"]  # list of relevant parameters (must be the same as in the ncclass)
+        "postamble_zsh", "postamble_spindle_off", "postamble_coolant_off", "arcfit", "arcfit_tol",
+        "simplify", "simplify_tol"]  # list of relevant parameters (must be the same as in the ncclass)
 
         self.win = tk.Toplevel(root)  # create the class-window
         self.win.wm_title(self.nco.name)
@@ -335,7 +448,8 @@ class Baseclass(widgets.Widgets):  # ===========================================
 
         self.prepostamble = PrePostamble(self.win, self.plane, self.preamble_gcode, self.postamble_gcode, self.preamble_tool, self.preamble_zsh,
                                          self.preamble_plane, self.preamble_spindle_cw, self.preamble_spindle_ccw, self.preamble_mist,
-                                         self.preamble_flood, self.postamble_zsh, self.postamble_spindle_off, self.postamble_coolant_off)
+                                         self.preamble_flood, self.postamble_zsh, self.postamble_spindle_off, self.postamble_coolant_off,
+                                         self.arcfit, self.arcfit_tol, self.simplify, self.simplify_tol)
 
         self.CreateBasewidgets(self.win)
         return self.win
@@ -351,13 +465,13 @@ class Baseclass(widgets.Widgets):  # ===========================================
 
     def Destroy(self):
         """Destroy the current window and update the ncclass before"""
-        self.WriteDataToLogic()
+        self.Flush()
         self.win.destroy()
 
     def Hide(self, *dummy):
         """Hide the current window"""
         self.win.withdraw()
-        self.win.after_cancel(self.after)
+        self.Flush()
 
     def GetDataFromLogic(self):
         """Update the gui with the data from the ncclass"""
@@ -399,7 +513,7 @@ class Baseclass(widgets.Widgets):  # ===========================================
         tk.Button(f, text="Set pre- and postamble", command=self.prepostamble.show).grid(column=0, row=19, columnspan=2, sticky="ew")
 
 
-class CustomGcode(widgets.Widgets):  # =========================================
+class CustomGcode(widgets.Widgets, Changes):  # ================================
     """Gui for <CustomCode> ncclass"""
 
     def __init__(self, root, ncclass_instance, winoffsetx=WINPOSX, winoffsety=WINPOSY):
@@ -431,6 +545,7 @@ class CustomGcode(widgets.Widgets):  # =========================================
 
         self.GetDataFromLogic()
         self.WriteDataToLogic()
+        self.Watch([self.objectname], texts=[self.textwidget])
 
     def Show(self):
         """Show the hidden window"""
@@ -443,11 +558,11 @@ class CustomGcode(widgets.Widgets):  # =========================================
     def Hide(self, *dummy):
         """Hide the window"""
         self.win.withdraw()
-        self.win.after_cancel(self.after)
+        self.Flush()
 
     def Destroy(self):
         """Destroy the current window and update the ncclass before"""
-        self.WriteDataToLogic()
+        self.Flush()
         self.win.destroy()
 
     def GetDataFromLogic(self):
@@ -461,7 +576,6 @@ class CustomGcode(widgets.Widgets):  # =========================================
         """Update the ncclass with the data from the gui"""
         self.nco.objectname = self.objectname.get()
         self.nco.text = self.textwidget.get(1.0, tk.END)[:-1]
-        self.after = self.win.after(TIME_UPDATE, self.WriteDataToLogic)
 
     def CopyToClipboard(self):
         """Copy the content to the system clipboard"""
@@ -518,6 +632,7 @@ class OutlineRectangle(Baseclass, widgets.Widgets):  # =========================
 
         self.GetDataFromLogic()
         self.WriteDataToLogic()
+        self.Watch()
 
     def WriteDataToLogic(self):
         """Update the ncclass with the data from the gui"""
@@ -528,7 +643,6 @@ class OutlineRectangle(Baseclass, widgets.Widgets):  # =========================
         else:
             self.entry_brw.configure(state=tk.DISABLED)
             self.entry_brh.configure(state=tk.DISABLED)
-        self.after = self.win.after(TIME_UPDATE, self.WriteDataToLogic)
 
 
 class OutlineCircle(Baseclass, widgets.Widgets):  # ============================
@@ -556,6 +670,7 @@ class OutlineCircle(Baseclass, widgets.Widgets):  # ============================
 
         self.GetDataFromLogic()
         self.WriteDataToLogic()
+        self.Watch()
 
     def WriteDataToLogic(self):
         """Update the ncclass with the data from the gui"""
@@ -566,7 +681,6 @@ class OutlineCircle(Baseclass, widgets.Widgets):  # ============================
         else:
             self.entry_brw.configure(state=tk.DISABLED)
             self.entry_brh.configure(state=tk.DISABLED)
-        self.after = self.win.after(TIME_UPDATE, self.WriteDataToLogic)
 
 
 class OutlineEllipse(Baseclass, widgets.Widgets):  # ===========================
@@ -595,11 +709,11 @@ class OutlineEllipse(Baseclass, widgets.Widgets):  # ===========================
 
         self.GetDataFromLogic()
         self.WriteDataToLogic()
+        self.Watch()
 
     def WriteDataToLogic(self):
         """Update the ncclass with the data from the gui"""
         self.WriteBaseDataToLogic()
-        self.after = self.win.after(TIME_UPDATE, self.WriteDataToLogic)
 
 
 class OutlinePolygon(Baseclass, widgets.Widgets):  # ===========================
@@ -644,12 +758,16 @@ class OutlinePolygon(Baseclass, widgets.Widgets):  # ===========================
 
         self.GetDataFromLogic()
         self.WriteDataToLogic()
+        self.Watch()
+
+    def GetDataFromLogic(self):
+        """Update the gui with the data from the ncclass"""
+        super(OutlinePolygon, self).GetDataFromLogic()
         self.ListboxUpdate()
 
     def WriteDataToLogic(self):
         """Update the ncclass with the data from the gui"""
         self.WriteBaseDataToLogic()
-        self.after = self.win.after(TIME_UPDATE, self.WriteDataToLogic)
 
     def Import(self):
         """Import a dat file (eg. for airfoils"""
@@ -720,10 +838,11 @@ class OutlinePolygon(Baseclass, widgets.Widgets):  # ===========================
             self.lb.see(i)
 
     def ListboxUpdate(self):
-        """Update the content of the listbox"""
+        """Update the content of the listbox, the positions of the ncclass have been changed"""
         self.lb.delete(0, tk.END)
         for n in self.nco.GetObjectNames():
             self.lb.insert(tk.END, n)
+        Notify(self.root)
 
 
 class PocketRectangle(Baseclass, widgets.Widgets):  # ==========================
@@ -747,11 +866,11 @@ class PocketRectangle(Baseclass, widgets.Widgets):  # ==========================
 
         self.GetDataFromLogic()
         self.WriteDataToLogic()
+        self.Watch()
 
     def WriteDataToLogic(self):
         """Update the ncclass with the data from the gui"""
         self.WriteBaseDataToLogic()
-        self.after = self.win.after(TIME_UPDATE, self.WriteDataToLogic)
 
 
 class PocketCircle(Baseclass, widgets.Widgets):  # =============================
@@ -773,11 +892,11 @@ class PocketCircle(Baseclass, widgets.Widgets):  # =============================
 
         self.GetDataFromLogic()
         self.WriteDataToLogic()
+        self.Watch()
 
     def WriteDataToLogic(self):
         """Update the ncclass with the data from the gui"""
         self.WriteBaseDataToLogic()
-        self.after = self.win.after(TIME_UPDATE, self.WriteDataToLogic)
 
 
 class Grill(Baseclass, widgets.Widgets):  # ====================================
@@ -791,44 +910,42 @@ class Grill(Baseclass, widgets.Widgets):  # ====================================
         self.h = tk.DoubleVar(self.win, 40.0)
         self.shape = tk.IntVar(self.win, 0)
         self.dist = tk.DoubleVar(self.win, 2.0)
-        self.peck = tk.BooleanVar(self.win, False)
+        self.peck = tk.IntVar(self.win, 0)
+        self.cycle = tk.BooleanVar(self.win, False)
+        self.retract = tk.IntVar(self.win, 1)
+        self.order = tk.BooleanVar(self.win, False)
 
-        self.parlist += ["w", "h", "shape", "dist", "peck"]
+        self.parlist += ["w", "h", "shape", "dist", "peck", "cycle", "retract", "order"]
 
         self.LabelEntry(self.win, 4, 3, 1, 10, self.w, "Width, Radius, A", "mm,in")
         self.LabelEntry(self.win, 4, 4, 1, 10, self.h, "Height, B", "mm,in")
         self.LabelEntry(self.win, 4, 5, 1, 10, self.dist, "Hole distance", "mm,in")
         wi.Radiobuttons(self.win, self.shape, "Shape", [["rectangle", ""], ["circle", ""], ["ellipse", ""]], columns=1, column=4, row=6)
-        wi.Radiobuttons(self.win, self.peck, "Plunge\nstrategy", [["linear", ""], ["peck", ""]], columns=1, column=4, row=9)
+        wi.Radiobuttons(self.win, self.peck, "Plunge\nstrategy", PLUNGE, columns=1, column=4, row=9)
+        wi.Optionbutton(self.win, self.cycle, "Canned cycle", "One drilling cycle for all holes", column=4, row=12)
+        wi.Radiobuttons(self.win, self.retract, "Retract", RETRACT, columns=1, column=4, row=13)
+        wi.Optionbutton(self.win, self.order, "Optimize order", "Less rapid travel between the holes", column=4, row=15)
         self.canvas = tk.Canvas(self.win, height=200, width=200, bg="white", bd=1, relief="sunken")
-        self.canvas.grid(column=4, row=11, columnspan=2, rowspan=10, sticky="NE")
+        self.canvas.grid(column=4, row=16, columnspan=2, rowspan=10, sticky="NE")
+        self.canvas_version = None  # ncclass and its version shown in the canvas
 
         self.GetDataFromLogic()
         self.WriteDataToLogic()
+        self.Watch()
 
     def WriteDataToLogic(self):
         """Update the ncclass with the data from the gui"""
         self.WriteBaseDataToLogic()
         self.UpdateCanvas()
-        self.after = self.win.after(TIME_UPDATE, self.WriteDataToLogic)
 
     def UpdateCanvas(self):
         """Display the result ina the canvas"""
+        if self.canvas_version == (self.nco, self.nco.GetVersion()): return  # unchanged
+        self.canvas_version = (self.nco, self.nco.GetVersion())
         self.canvas.delete("all")
-        x = y = x_ = y_ = None
-        r = self.nco.td / 2
+        preview = self.nco.GetPreview()
         s = 200 / (max([self.nco.w, self.nco.h]))
-        for o in self.nco.Update():
-            try:
-                if not o.x == None: x = o.x
-                if not o.y == None: y = o.y
-                if not x == None and not y == None and not o.z == None and (o.name == "G01" or o.name == "G83"):
-                    self.canvas.create_oval((x - r, y - r, x + r, y + r))
-            except:
-                pass
-            x_ = x
-            y_ = y
-        self.canvas.scale("all", 0, 0, s, -s)
+        DrawHoles(self.canvas, preview.holes, preview.radius, s)
         self.canvas.config(scrollregion=self.canvas.bbox(tk.ALL), offset="center")
 
 
@@ -846,8 +963,9 @@ class Bezel(Baseclass, widgets.Widgets):  # ====================================
         self.a1 = tk.DoubleVar(self.win, 50.0)
         self.div = tk.IntVar(self.win, 50)
         self.divmaj = tk.IntVar(self.win, 50)
+        self.order = tk.BooleanVar(self.win, False)
 
-        self.parlist += ["ri", "romaj", "romin", "a0", "a1", "div", "divmaj"]
+        self.parlist += ["ri", "romaj", "romin", "a0", "a1", "div", "divmaj", "order"]
 
         self.LabelEntry(self.win, 4, 3, 1, 10, self.ri, "Inner radius", "mm,in")
         self.LabelEntry(self.win, 4, 4, 1, 10, self.romaj, "Outer radius major tick", "mm,in")
@@ -856,40 +974,32 @@ class Bezel(Baseclass, widgets.Widgets):  # ====================================
         self.LabelEntry(self.win, 4, 7, 1, 10, self.a1, "End angle", "°")
         self.LabelEntry(self.win, 4, 8, 1, 10, self.div, "Divisions", "#")
         self.LabelEntry(self.win, 4, 9, 1, 10, self.divmaj, "Divisions major tick", "#")
+        wi.Optionbutton(self.win, self.order, "Optimize order", "Less rapid travel between the ticks", column=4, row=10)
         self.canvas = tk.Canvas(self.win, height=200, width=200, bg="white", bd=1, relief="sunken")
-        self.canvas.grid(column=4, row=10, columnspan=2, rowspan=10, sticky="NE")
+        self.canvas.grid(column=4, row=11, columnspan=2, rowspan=10, sticky="NE")
+        self.canvas_version = None  # ncclass and its version shown in the canvas
 
         self.GetDataFromLogic()
         self.WriteDataToLogic()
+        self.Watch()
 
     def WriteDataToLogic(self):
         """Update the ncclass with the data from the gui"""
         self.WriteBaseDataToLogic()
         self.UpdateCanvas()
-        self.after = self.win.after(TIME_UPDATE, self.WriteDataToLogic)
 
     def UpdateCanvas(self):
         """Display the result in the canvas"""
+        if self.canvas_version == (self.nco, self.nco.GetVersion()): return  # unchanged
+        self.canvas_version = (self.nco, self.nco.GetVersion())
         self.canvas.delete("all")
         self.canvas.create_line(80, 100, 120, 100, fill='green')
         self.canvas.create_line(100, 80, 100, 120, fill='green')
-        x = y = x_ = y_ = None
         s = 200 / (max([self.nco.ri, self.nco.romaj, self.nco.romin]) * 2)
-        for o in self.nco.Update():
-            try:
-                if not o.x == None:
-                    x = o.x
-                if not o.y == None:
-                    y = o.y
-                if not x == None and not y == None and not x_ == None and not y_ == None and o.name == "G01":
-                    p = mu.PointRotate([x, y], [self.rx.get(), self.ry.get()], self.deg.get())
-                    x1, y1 = p[0], p[1]
-                    p = mu.PointRotate([x_, y_], [self.rx.get(), self.ry.get()], self.deg.get())
-                    x1_, y1_ = p[0], p[1]
-                    self.canvas.create_line((100 + x1_ * s, 100 + y1_ * s * -1, 100 + x1 * s, 100 + y1 * s * -1))
-                x_, y_ = x, y
-            except:
-                pass
+        lines = self.nco.GetPreview().lines.reshape(-1, 2) - (self.nco.rx, self.nco.ry)  # rotate the ticks like the object
+        sin, cos = math.sin(math.radians(self.nco.deg)), math.cos(math.radians(self.nco.deg))
+        lines = numpy.column_stack((lines[:, 0] * cos - lines[:, 1] * sin, lines[:, 0] * sin + lines[:, 1] * cos)) + (self.nco.rx, self.nco.ry)
+        DrawLines(self.canvas, lines.reshape(-1, 4), s, 100, 100)
         self.canvas.config(scrollregion=self.canvas.bbox(tk.ALL), offset="center")
 
 
@@ -904,48 +1014,47 @@ class DrillMatrix(Baseclass, widgets.Widgets):  # ==============================
         self.ny = tk.IntVar(self.win, 2)
         self.dx = tk.DoubleVar(self.win, 2.54)
         self.dy = tk.DoubleVar(self.win, 5.08)
-        self.peck = tk.BooleanVar(self.win, False)
+        self.peck = tk.IntVar(self.win, 0)
         self.center = tk.BooleanVar(self.win, True)
+        self.cycle = tk.BooleanVar(self.win, False)
+        self.retract = tk.IntVar(self.win, 1)
+        self.order = tk.BooleanVar(self.win, False)
 
-        self.parlist += ["nx", "ny", "dx", "dy", "peck", "center"]
+        self.parlist += ["nx", "ny", "dx", "dy", "peck", "center", "cycle", "retract", "order"]
 
         self.LabelEntry(self.win, 4, 3, 1, 10, self.nx, "n-x", "#, number of holes in x")
         self.LabelEntry(self.win, 4, 4, 1, 10, self.ny, "n-y", "#, number of holes in y")
         self.LabelEntry(self.win, 4, 5, 1, 10, self.dx, "x distance", "mm/in")
         self.LabelEntry(self.win, 4, 6, 1, 10, self.dy, "y-distance", "mm/in")
         self.Optionbutton(self.win, 4, 7, 1, self.center, "Center", "")
-        wi.Radiobuttons(self.win, self.peck, "Plunge\nstrategy", [["linear", ""], ["peck", ""]], columns=1, column=4, row=8)
+        wi.Radiobuttons(self.win, self.peck, "Plunge\nstrategy", PLUNGE, columns=1, column=4, row=8)
+        wi.Optionbutton(self.win, self.cycle, "Canned cycle", "One drilling cycle for all holes", column=4, row=11)
+        wi.Radiobuttons(self.win, self.retract, "Retract", RETRACT, columns=1, column=4, row=12)
+        wi.Optionbutton(self.win, self.order, "Optimize order", "Less rapid travel between the holes", column=4, row=14)
         self.canvas = tk.Canvas(self.win, height=200, width=200, bg="white", bd=1, relief="sunken")
-        self.canvas.grid(column=4, row=10, columnspan=2, rowspan=10, sticky="NE")
+        self.canvas.grid(column=4, row=15, columnspan=2, rowspan=10, sticky="NE")
+        self.canvas_version = None  # ncclass and its version shown in the canvas
 
         self.GetDataFromLogic()
         self.WriteDataToLogic()
+        self.Watch()
 
     def WriteDataToLogic(self):
         """Update the ncclass with the data from the gui"""
         self.WriteBaseDataToLogic()
         self.UpdateCanvas()
-        self.after = self.win.after(TIME_UPDATE, self.WriteDataToLogic)
 
     def UpdateCanvas(self):
         """Display the rsult in the canvas"""
+        if self.canvas_version == (self.nco, self.nco.GetVersion()): return  # unchanged
+        self.canvas_version = (self.nco, self.nco.GetVersion())
         self.canvas.delete("all")
         self.canvas.create_line((-10, 0, 10), fill="red")  # Paint cross at origin
         self.canvas.create_line((0, 10, 0, -10), fill="red")
-        s = 5
         if self.nco.ParametersOk():
-            x = y = x_ = y_ = None
-            r = self.nco.td / 2.0
+            preview = self.nco.GetPreview()
             s = 200 / max([self.nco.nx * self.nco.dx, self.nco.ny * self.nco.dy])
-            for o in self.nco.Update():
-                try:
-                    if not o.x == None: x = o.x
-                    if not o.y == None: y = o.y
-                    if (o.name == "G01" or o.name == "G83"):
-                        self.canvas.create_oval(((x - r) * s, (y - r) * s * -1, (x + r) * s, (y + r) * s * -1))
-                except:
-                    pass
-        # self.canvas.scale("all", 0, 0, s, -s)
+            DrawHoles(self.canvas, preview.holes, preview.radius, s)
         self.canvas.config(scrollregion=self.canvas.bbox(tk.ALL), offset="center")
 
 
@@ -968,11 +1077,11 @@ class Slot(Baseclass, widgets.Widgets):  # =====================================
 
         self.GetDataFromLogic()
         self.WriteDataToLogic()
+        self.Watch()
 
     def WriteDataToLogic(self):
         """Update the ncclass with the data from the gui"""
         self.WriteBaseDataToLogic()
-        self.after = self.win.after(TIME_UPDATE, self.WriteDataToLogic)
 
 
 class PocketCircularArc(Baseclass, widgets.Widgets):  # ========================
@@ -996,11 +1105,11 @@ class PocketCircularArc(Baseclass, widgets.Widgets):  # ========================
 
         self.GetDataFromLogic()
         self.WriteDataToLogic()
+        self.Watch()
 
     def WriteDataToLogic(self):
         """Update the ncclass with the data from the gui"""
         self.WriteBaseDataToLogic()
-        self.after = self.win.after(TIME_UPDATE, self.WriteDataToLogic)
 
 
 class OutlineCircularArc(Baseclass, widgets.Widgets):  # =======================
@@ -1033,11 +1142,11 @@ class OutlineCircularArc(Baseclass, widgets.Widgets):  # =======================
 
         self.GetDataFromLogic()
         self.WriteDataToLogic()
+        self.Watch()
 
     def WriteDataToLogic(self):
         """Update the ncclass with the data from the gui"""
         self.WriteBaseDataToLogic()
-        self.after = self.win.after(TIME_UPDATE, self.WriteDataToLogic)
 
 
 class Text(Baseclass, widgets.Widgets):  # =====================================
@@ -1086,10 +1195,15 @@ class Text(Baseclass, widgets.Widgets):  # =====================================
         self.textwidget = wi.TextboxWithScrollbar(self.win, column=4, row=12, columnspan=4, rowspan=8, width=55, height=14, sticky="nsew")
 
         self.GetDataFromLogic()
+        self.WriteDataToLogic()
+        self.Watch(texts=[self.textwidget])
+
+    def GetDataFromLogic(self):
+        """Update the gui with the data from the ncclass"""
+        super(Text, self).GetDataFromLogic()
         self.textwidget.delete(1.0, tk.END)
         self.textwidget.insert(tk.END, self.nco.text)
         self.textwidget.yview(tk.END)
-        self.WriteDataToLogic()
 
     def WriteDataToLogic(self):
         """Update the ncclass with the data from the gui"""
@@ -1098,7 +1212,6 @@ class Text(Baseclass, widgets.Widgets):  # =====================================
             self.nco.text = self.textwidget.get(1.0, tk.END)[:-1]
         except:
             pass
-        self.after = self.win.after(TIME_UPDATE, self.WriteDataToLogic)
 
     def ShowFont(self):
         """Write all available characters of the font to the text widget"""
@@ -1112,6 +1225,7 @@ class Text(Baseclass, widgets.Widgets):  # =====================================
         if not fn:
             return
         self.nco.LoadFont(fn)
+        self.fontfile.set(self.nco.fontfile)  # updates the ncclass, see <Changes>
         self.win.lift()
 
 
@@ -1138,17 +1252,26 @@ class Relief(Baseclass, widgets.Widgets):  # ===================================
         widget.configure(state=tk.DISABLED)
         wi.LabelEntry(self.win, self.scale, "Scale", help="mm/px, in/px", column=4, row=6)
         tk.Button(self.win, command=self.LoadImage, text="Load\nImage").grid(column=6, row=3, rowspan=3)
-        tk.Button(self.win, command=self.nco.Calc, text="Calc").grid(column=6, row=6, rowspan=1)
+        tk.Button(self.win, command=lambda: self.nco.Calc(), text="Calc").grid(column=6, row=6, rowspan=1)  # the bound ncclass
         self.canvas = tk.Canvas(self.win, height=320, width=320, bg="white", bd=1, relief="sunken")
         self.canvas.grid(column=4, row=8, columnspan=3, rowspan=12, sticky="NE")
 
         self.GetDataFromLogic()
         self.WriteDataToLogic()
+        self.Watch()
+
+    def GetDataFromLogic(self):
+        """Update the gui with the data from the ncclass, the image is shown after loading only"""
+        super(Relief, self).GetDataFromLogic()
+        self.image = self.nco.image
+        w, h = self.image.size if self.image is not None else (0, 0)
+        self.image_width.set(w)
+        self.image_height.set(h)
+        self.canvas.delete("all")
 
     def WriteDataToLogic(self):
         """Update the ncclass with the data from the gui"""
         self.WriteBaseDataToLogic()
-        self.after = self.win.after(TIME_UPDATE, self.WriteDataToLogic)
 
     def LoadImage(self):
         """Load a CXF font"""
@@ -1168,7 +1291,7 @@ class Relief(Baseclass, widgets.Widgets):  # ===================================
         self.win.lift()
 
 
-class Subroutine(object):  # ===================================================
+class Subroutine(Changes):  # ==================================================
     """Gui for <Subroutine> ncclass"""
 
     def __init__(self, root, ncclass_instance, winoffsetx=WINPOSX, winoffsety=WINPOSY):
@@ -1215,12 +1338,14 @@ class Subroutine(object):  # ===================================================
                 r = -15
         self.GetDataFromLogic()
         self.WriteDataToLogic()
+        self.Watch([self.objectname, self.incsub] + self.valuelist)
 
     def SelectSubroutine(self):
         oi = self.lb.curselection()
         if oi:
             self.number = int(oi[0])
             self.UpdateWidgets(self.number)
+            self.Changed()
 
     def UpdateWidgets(self, num):
         if num == None: return
@@ -1247,15 +1372,23 @@ class Subroutine(object):  # ===================================================
     def Hide(self):
         """Hide the window"""
         self.win.withdraw()
-        self.win.after_cancel(self.after)
+        self.Flush()
 
     def Destroy(self):
         """Destroy the current window and update the ncclass before"""
-        self.WriteDataToLogic()
+        self.Flush()
         self.win.destroy()
 
     def GetDataFromLogic(self):
-        """Update the gui with the data from the ncclass"""
+        """Update the gui with the data from the ncclass, nothing of the previous object is kept (see <Bind>)"""
+        self.number = None
+        self.name.set("")
+        for p in range(30):
+            self.parlist[p].set("Parameter" + str(p + 1))
+            self.valuelist[p].set("")
+            self.helplist[p].text = "#" + str(p + 1)
+        self.lb.selection_clear(0, tk.END)
+        if self.nco.number is not None: self.lb.selection_set(self.nco.number)
         self.objectname.set(self.nco.objectname)
         self.number = self.nco.number
         self.incsub.set(self.nco.incsub)
@@ -1268,13 +1401,10 @@ class Subroutine(object):  # ===================================================
         try:
             self.nco.objectname = self.objectname.get()
             self.nco.number = self.number
-            self.nco.valuelist = []
             self.nco.incsub = self.incsub.get()
-            for v in self.valuelist:
-                self.nco.valuelist.append(v.get())
+            self.nco.valuelist = [v.get() for v in self.valuelist]              # assign as a whole, see <ncclasses.Basemethods.__setattr__>
         except:
             pass
-        self.after = self.win.after(TIME_UPDATE, self.WriteDataToLogic)
 
 
 class Counterbore(Baseclass):  # =========================================
@@ -1319,6 +1449,7 @@ class Counterbore(Baseclass):  # =========================================
 
         self.GetDataFromLogic()
         self.WriteDataToLogic()
+        self.Watch()
 
     def FillDrillData(self, n):
         self.lb_drilldata.delete(0, tk.END)
@@ -1355,17 +1486,16 @@ class Counterbore(Baseclass):  # =========================================
     def Hide(self):
         """Hide the window"""
         self.win.withdraw()
-        self.win.after_cancel(self.after)
+        self.Flush()
 
     def Destroy(self):
         """Destroy the current window and update the ncclass before"""
-        self.WriteDataToLogic()
+        self.Flush()
         self.win.destroy()
 
     def WriteDataToLogic(self):
         """Update the ncclass with the data from the gui"""
         self.WriteBaseDataToLogic()
-        self.after = self.win.after(TIME_UPDATE, self.WriteDataToLogic)
 
 
 class TEMPLATE(Baseclass):  # ==================================================
@@ -1385,12 +1515,12 @@ class TEMPLATE(Baseclass):  # ==================================================
         wi.LabelEntry(self.win, self.w, "Width", help="mm,in", column=4, row=3)
 
         self.GetDataFromLogic()  # remove if Baseclass it not derived
-        self.WriteDataToLogic()  # mandatory to periodically update the logic module
+        self.WriteDataToLogic()
+        self.Watch()  # mandatory to update the logic module after changes
 
     def WriteDataToLogic(self):
         """Update the ncclass with the data from the gui"""
         self.WriteBaseDataToLogic()
-        self.after = self.win.after(TIME_UPDATE, self.WriteDataToLogic)
 
 
 # ==============================================================================
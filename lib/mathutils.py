@@ -24,7 +24,6 @@ Version   Author          Changes:
 """
 
 import math
-import numpy
 
 VERSION = "230206"                                                              # version of this file (jjmmtt)
 
@@ -51,16 +50,15 @@ def ArcLength(a, r):
 
 def PointsDistance(p1, p2):
     """Calulate the distance between two points"""
-    d = numpy.array(p2) - numpy.array(p1)
-    return numpy.sqrt((d * d).sum())
+    dx, dy = p2[0] - p1[0], p2[1] - p1[1]
+    return math.sqrt(dx * dx + dy * dy)
 
 def GetPointOnLine(p0, p1, d):
     """Calculate the coordinates of a point on a line with a given distance from first point"""
-    v = numpy.array(p1) - numpy.array(p0)
-    v_abs = numpy.sqrt((v * v).sum())
-    v1 = numpy.array(v) * 1/v_abs
-    p2 = numpy.array(v1) * d + numpy.array(p0)
-    return p2
+    vx, vy = p1[0] - p0[0], p1[1] - p0[1]
+    v_abs = math.sqrt(vx * vx + vy * vy)
+    if v_abs == 0: return [math.nan, math.nan]                                  # like the former numpy version
+    return [vx / v_abs * d + p0[0], vy / v_abs * d + p0[1]]
 
 def PointEllipse(a, b, t):
     """Calculates the coordinates for an ellipse"""
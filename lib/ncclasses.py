@@ -46,25 +46,29 @@ ToDo:
 - Finalise <Relief> class.
 """
 
-import tkinter as tk
 import math
-import string
 import copy
-import numpy
 import re
-import unicodedata
-from PIL import Image
-import configparser
+import weakref
+import numpy
 
 from . import mathutils as mu                                                          # import math helper functions
 from . import gcode as gc                                                              # import basic g-code classes
+from . import settings                                                                 # parsed ini-files
 from . import font2vector as f2v                                                       # import module for class "Text"
 from . import ngcsub
 from . import utils                                                                    # common utility functions
 from . import nclib as ncl                                                             # nc library functions
+from . import toolpath as tp                                                           # column oriented list of moves
+from . import formatter as fmt                                                         # converts a toolpath into g-code at once
+from . import arcfit as af                                                             # replaces runs of G01 moves by arcs
+from . import simplify as sp                                                           # removes points of runs of G01 moves
+from . import ordering as od                                                           # orders holes to reduce the rapid travel
+from . import resultcache as rc                                                        # project wide cache of the <Update> results
 
 VERSION = "230206"                                                              # version of this file (jjmmtt)
 DEFAULTS = {}                                                                   # default parameters
+PREVIEWS = weakref.WeakKeyDictionary()                                          # nc-object -> (version, preview), see <Basemethods.GetPreview>
 
 
 def Init():  # =================================================================
@@ -74,13 +78,22 @@ def Init():  # =================================================================
           "preamble_gcode","preamble_tool","preamble_zsh","preamble_plane",\
           "preamble_spindle_cw","preamble_spindle_ccw","preamble_mist","preamble_flood",\
           "postamble_gcode","postamble_zsh","postamble_spindle_off","postamble_coolant_off"]
-    config = configparser.ConfigParser()
-    config.read('defaults.ini')
+    config = settings.Get(settings.DEFAULTS)
     global DEFAULTS
     for p in pl:
         DEFAULTS[p] = config.get('PARAMETERS', p)
 
 
+class Preview(object):  # ======================================================
+    """Lightweight geometry of an nc-object for the canvases of the gui, without the placement"""
+
+    def __init__(self, holes=None, radius=0.0, lines=None):
+        """Initialise the geometry, empty by default"""
+        self.holes = numpy.asarray(holes if holes is not None else [], dtype=float).reshape(-1, 2)  # centers of the holes: x, y
+        self.radius = radius                                                    # radius of the holes
+        self.lines = numpy.asarray(lines if lines is not None else [], dtype=float).reshape(-1, 4)  # lines: x0, y0, x1, y1
+
+
 class Basedata(object):  # =====================================================
     """Implements the basic class for most nc classes"""
 
@@ -139,20 +152,135 @@ class Basedata(object):  # =====================================================
 class Basemethods(object): # ===================================================
     """Implements the basic methods for most nc-classes"""
 
+    _version = 0                                                                # number of changes of the variables, see <__setattr__>
+    arcfit = False                                                              # replace runs of G01 moves by arcs, see <arcfit.py>
+    arcfit_tol = 0.01                                                           # max. deviation of the arcs (mm,in)
+    simplify = False                                                            # remove points of runs of G01 moves, see <simplify.py>
+    simplify_tol = 0.01                                                         # max. distance of a removed point (mm,in)
+    uncached = ("_version", "objectname", "posx", "posy", "posz", "rx", "ry", "rz", "deg", "rsx", "rsy", "rsdeg",
+                "arcfit", "arcfit_tol", "simplify", "simplify_tol")              # variables not used by <Update>, see <CacheKey>
+    unsaved = ()                                                                # variables not stored in project files, see <Restore>
+    files = ()                                                                  # variables with names of files, which are read by <Restore>
+
+    def __setattr__(self, name, value):
+        """Sets the variable and counts the change, if the value is different (dirty tracking).
+        The gui writes all variables periodically, writing the same value is no change."""
+        try:    same = self.__dict__[name] is value or (type(self.__dict__[name]) is type(value) and bool(self.__dict__[name] == value))
+        except: same = False                                                    # new variable or not comparable
+        object.__setattr__(self, name, value)
+        if not same: object.__setattr__(self, "_version", self._version + 1)
+
+    def Touch(self):
+        """Marks the object as changed, needed after changing the content of a variable (e.g. a list)"""
+        object.__setattr__(self, "_version", self._version + 1)
+
+    def GetVersion(self):
+        """Returns the number of changes, a different number means the g-code has to be created again"""
+        return self._version
+
+    def CacheKey(self):
+        """Returns the key of the <Update> result for the project wide cache (see <resultcache.py>).
+        Objects, which differ only in the variables <uncached> (name, placement), get the same key."""
+        v = {k: v for k, v in vars(self).items() if k not in self.uncached}
+        return rc.Key(self.__class__.__name__, v, self.CacheReferences())
+
+    def CacheReferences(self):
+        """Returns the data used by <Update>, which is not part of the variables (e.g. a subroutine)"""
+        return None
+
+    def Restore(self):
+        """Creates the variables <unsaved> again after loading a project file (see <projectfile.py>)"""
+        pass
+
+    def GetPreview(self):
+        """Returns the geometry for the gui (see <Preview>), it is created again only after a change"""
+        version, preview = PREVIEWS.get(self, (None, None))
+        if not version == self._version:
+            preview = self.CreatePreview()
+            PREVIEWS[self] = (self._version, preview)
+        return preview
+
+    def CreatePreview(self):
+        """Returns the geometry for the gui without running <Update>, overridden by the nc-classes with a preview"""
+        return Preview()
+
+    def Snapshot(self):
+        """Returns a copy for the generation in the background, later changes do not modify it.
+        The variables <unsaved> (a font, an image) are shared, they are not modified after loading."""
+        obj = copy.copy(self)
+        for k, v in vars(self).items():
+            if k not in self.unsaved and isinstance(v, (list, dict)): object.__setattr__(obj, k, copy.deepcopy(v))
+        return obj
+
     def GetGcode(self, objectlist):
         """Returns the g-code of all generated objects as a string, adds offset and rotates."""
-        ol = copy.deepcopy(objectlist)                                          # copy the objects, we do not want to modify the original data
-        for o in ol:
-            try:    o.AddOffset([self.posx, self.posy, self.posz])              # try to add the offset to the gcode object
-            except: pass                                                        # not all gcode objects support AddOffset ;-)
-        for o in ol:
-            try:    o.Rotate([self.rx, self.ry, 0], self.deg)                   # try to rotate the gcode object
-            except: pass                                                        # not all gcode objects support Rotate ;-)
-        gcode = "( " + self.objectname + " )\n"                                 # insert the object name a a comment
-        for o in ol:                                                            # insert g-code of the object
-            gcode += o.GetGcode() + "\n"
-        gcode += "\n"                                                           # final line break
-        return gcode
+        return "".join(self.GetGcodeChunks(objectlist))
+
+    def GetGcodeChunks(self, objectlist, modal=None):
+        """Generator, returns the g-code of all generated objects block by block, places and rotates.
+        <objectlist> may be a toolpath, a list or a generator (e.g. an <Update> with yield).
+        With <modal> (see <formatter.Modal>) the production output is returned."""
+        yield "( " + self.objectname + " )\n"                                   # insert the object name a a comment
+        t = self.GetTransform()
+        stats = af.Stats() if self.arcfit else None
+        if stats is not None and self.preamble_plane and not self.plane == 0:  # G02/G03 with I and J are arcs in the xy-plane
+            stats = None
+            yield gc.COMMENT("Arc fitting skipped, only in the XY plane (G17)").GetGcode() + "\n"
+        spstats = sp.Stats() if self.simplify else None
+        for ol in tp.Blocks(objectlist, fmt.BLOCKSIZE):
+            if stats is not None: ol = af.Fit(ol, self.arcfit_tol, stats)       # before the transform, the arcs are not distorted
+            if spstats is not None: ol = sp.Simplify(ol, self.simplify_tol, spstats)  # the remaining G01 moves
+            yield fmt.Format(t.Apply(ol), modal=modal).decode("utf-8")          # every line ends with a line break
+        if stats is not None: yield gc.COMMENT(stats.Text()).GetGcode() + "\n"
+        if spstats is not None: yield gc.COMMENT(spstats.Text()).GetGcode() + "\n"
+        yield "\n"                                                              # final line break
+
+    def GetTransform(self):
+        """Returns the placement of the object: shape rotation, offset and rotation"""
+        t = tp.Transform()
+        try:    t.Rotate([self.rsx, self.rsy, 0], self.rsdeg)                   # rotate the shape
+        except: pass                                                            # not all nc-classes support a shape rotation ;-)
+        try:    t.AddOffset([self.posx, self.posy, self.posz])                  # add the offset
+        except: pass                                                            # not all nc-classes have a position ;-)
+        try:    t.Rotate([self.rx, self.ry, 0], self.deg)                       # rotate the object
+        except: pass                                                            # not all nc-classes have a rotation ;-)
+        return t
+
+    def Drill(self, plist):
+        """Drills the holes [[x,y],...] one by one and returns an object list"""
+        ol = []
+        for xy in plist:
+            ol.append(gc.G00(z=self.zsh))
+            ol.append(gc.G00(x=xy[0], y=xy[1]))
+            ol.append(gc.G00(z=self.z0 + self.zsh0))
+            if self.peck == 0:
+                ol.append(gc.G01(z=self.z1, f=self.frz))
+            elif self.peck == 2:
+                ol.append(gc.G73(x=xy[0], y=xy[1], z=self.z1, r=0, q=self.zi, f=self.frz))
+            else:
+                ol.append(gc.G83(x=xy[0], y=xy[1], z=self.z1, r=0, q=self.zi, f=self.frz))
+        return ol
+
+    def DrillCycle(self, plist):
+        """Drills the holes [[x,y],...] with one canned cycle (G81, G83 or G73) and returns an object list.
+        The first hole contains the whole cycle, all other holes only their position."""
+        ol = []
+        if len(plist) == 0: return ol
+        r = self.z0 + self.zsh0                                                 # retract plane of the cycle
+        ol.append(gc.G00(z=self.zsh, c="To safety height"))                     # initial level for G98
+        if self.retract == 0: ol.append(gc.G(98, c="Retract to the initial level"))
+        else:                 ol.append(gc.G(99, c="Retract to the R-plane"))
+        x, y = plist[0]
+        if self.peck == 0:
+            ol.append(gc.G81(x=x, y=y, z=self.z1, r=r, f=self.frz))
+        elif self.peck == 2:
+            ol.append(gc.G73(x=x, y=y, z=self.z1, r=r, q=self.zi, f=self.frz))
+        else:
+            ol.append(gc.G83(x=x, y=y, z=self.z1, r=r, q=self.zi, f=self.frz))
+        for x, y in plist[1:]:
+            ol.append(gc.XY(x=x, y=y))
+        ol.append(gc.G(80, c="Cancel canned cycle"))
+        return ol
 
     def DefaultPreamble(self):
         """Creates a default preamble and returns an object list"""
@@ -286,11 +414,7 @@ class OutlineRectangle(Basedata, Basemethods):  # ==============================
 
         #ol.append(gc.G00(z=self.zsh, c="To safety height"))
         ol += self.DefaultPostamble()
-
-        for o in ol:
-            try:    o.Rotate([self.rsx, self.rsy, 0], self.rsdeg)               # rotate the gcode object
-            except: pass                                                        # not all gcode objects support Rotate ;-)
-        return ol
+        return ol                                                               # the shape rotation is done by <GetTransform>
 
 
 class OutlineCircle(Basedata, Basemethods):  # =================================
@@ -446,8 +570,8 @@ class OutlineEllipse(Basedata, Basemethods):  # ================================
                 rng = list(range(360,0,-ai))
                 x, y = mu.PointEllipse(a, b, ai) #define start point
 
-        ol = self.DefaultPreamble()
-        ol.append(gc.G00(x=x, y=y, c="Rapid move to start point"))
+        ol = tp.Toolpath(self.DefaultPreamble())
+        ol.G00(x=x, y=y, c="Rapid move to start point")
         ol.append(gc.G(64,p=0.05))
         z = self.z0
         while z > ze:
@@ -457,14 +581,14 @@ class OutlineEllipse(Basedata, Basemethods):  # ================================
             for r in rng:
                 z -= self.zi / (360 / ai)
                 x, y = mu.PointEllipse(a, b, r)
-                ol.append(gc.G01(x=x, y=y, z=z, c=str(r)))
+                ol.G01(x=x, y=y, z=z, c=str(r))
         for r in rng:  # final pass
             x, y = mu.PointEllipse(a, b, r)
-            ol.append(gc.G01(x=x, y=y, c=str(r)))
+            ol.G01(x=x, y=y, c=str(r))
         i = 0
         for r in rng:  # lead out
             x, y = mu.PointEllipse(a, b, r)
-            ol.append(gc.G01(x=x, y=y, z=z, c=str(r)))
+            ol.G01(x=x, y=y, z=z, c=str(r))
             if z > self.z0:
                 break
             if i > 0:
@@ -552,13 +676,7 @@ class OutlinePolygon(Basedata, Basemethods):  # ================================
         if not self.cc==0:
             ol.append(gc.G(40, c="cutter compensation off"))
         ol.append(gc.G(61, c="Exact path mode"))
-        for o in ol:
-            try:
-                # try to rotate the gcode object
-                o.Rotate([self.rsx, self.rsy, 0], self.rsdeg)
-            except:
-                pass
-        return ol
+        return ol                                                               # the shape rotation is done by <GetTransform>
 
     def Import(self, filename):
         handle = open(filename, 'rb')
@@ -572,6 +690,7 @@ class OutlinePolygon(Basedata, Basemethods):  # ================================
                 except ValueError:
                     pass
         handle.close()
+        self.Touch()
 
     def GetPoly(self, index):
         if len(self.poly)>=index:
@@ -581,20 +700,27 @@ class OutlinePolygon(Basedata, Basemethods):  # ================================
         if len(self.poly)>=index:
             self.poly[index].x = x
             self.poly[index].y = y
+            self.Touch()
 
     def ObjectInsert(self, index, x, y):
         self.poly.insert(index, gc.G01(x=x, y=y))
+        self.Touch()
 
     def ObjectDelete(self, index):
         utils.ListItemsDelete(self.poly, index)
+        self.Touch()
 
     def ObjectsMoveUp(self, indexes):
         """Moves up the selected objects in the objectlist"""
-        return utils.ListItemsMoveUp(self.poly, indexes)
+        indexes = utils.ListItemsMoveUp(self.poly, indexes)
+        self.Touch()
+        return indexes
 
     def ObjectsMoveDown(self, indexes):
         """Moves down the selected objects in the objectlist"""
-        return utils.ListItemsMoveDown(self.poly, indexes)
+        indexes = utils.ListItemsMoveDown(self.poly, indexes)
+        self.Touch()
+        return indexes
 
     def GetObjectNames(self):  # ok
         l = []
@@ -604,6 +730,7 @@ class OutlinePolygon(Basedata, Basemethods):  # ================================
 
     def AddG01(self):
         self.poly.append(gc.G01(x=self.x, y=self.y))
+        self.Touch()
 
 
 class PocketRectangle(Basedata, Basemethods):  # ===============================
@@ -756,6 +883,9 @@ class Grill(Basedata, Basemethods):  # =========================================
     name="Grill"
     description="Drilling a grill"
     i = 0
+    cycle = False                                                               # drill with one canned cycle, see <Basemethods.DrillCycle>
+    retract = 1                                                                 # retract of the canned cycle: 0=G98 initial level, 1=G99 R-plane
+    order = False                                                               # order the holes to reduce the rapid travel, see <ordering.py>
 
     def __init__(self):
         self.__class__.i += 1
@@ -764,7 +894,7 @@ class Grill(Basedata, Basemethods):  # =========================================
         self.h = 40         # height or b
         self.shape = 0      # shape of the grill: 0=rectangle, 1=circle, 2=ellipse
         self.dist = 2.0     # distance between holes
-        self.peck = False   # plunge strategy (linear or peck)
+        self.peck = 0       # plunge strategy (0=linear, 1=peck, 2=chip breaking)
 
     def ParametersOk(self):
         """Check the variables for plausibility, e.g. avoid endless loops"""
@@ -778,18 +908,22 @@ class Grill(Basedata, Basemethods):  # =========================================
         if not self.ParametersOk(): return [gc.COMMENT("PARAMETER ERROR")]
         ol = self.DefaultPreamble()
         ol.append(gc.G00(x=0, y=0, c="Rapid move to start point"))
-        for xy in self.GetPlist():
-            ol.append(gc.G00(z=self.zsh))
-            ol.append(gc.G00(x=xy[0], y=xy[1]))
-            ol.append(gc.G00(z=self.z0 + self.zsh0))
-            if self.peck == 0:
-                ol.append(gc.G01(z=self.z1, f=self.frz))
-            else:
-                ol.append(gc.G83(x=xy[0], y=xy[1], z=self.z1, r=0, q=self.zi, f=self.frz))
+        plist, stats = self.GetPlist(), None
+        if self.order:
+            stats = od.Stats()
+            plist = od.Order(plist, [0, 0], stats=stats)                        # from the start point
+        if self.cycle: ol += self.DrillCycle(plist)
+        else:          ol += self.Drill(plist)
+        if stats is not None: ol.append(gc.COMMENT(stats.Text()))
         #ol.append(gc.G00(z=self.zsh, c="To safety height"))
         ol += self.DefaultPostamble()
         return ol
 
+    def CreatePreview(self):
+        """Returns the holes"""
+        if not self.ParametersOk(): return Preview()
+        return Preview(holes=self.GetPlist(), radius=self.td / 2.0)
+
     def GetPlist(self):
         dxy = self.td + self.dist
         nx = self.w / 2 / dxy
@@ -823,6 +957,7 @@ class Bezel(Basedata, Basemethods):  # =========================================
     name="Bezel"
     description="Engraving a bezel"
     i = 0
+    order = False                                                               # order and reverse the ticks to reduce the rapid travel, see <ordering.py>
 
     def __init__(self):
         self.__class__.i += 1
@@ -852,16 +987,26 @@ class Bezel(Basedata, Basemethods):  # =========================================
         if not self.ParametersOk(): return [gc.COMMENT("PARAMETER ERROR")]
         ol = self.DefaultPreamble()
         ol.append(gc.G00(x=0, y=0, c="Rapid move to start point"))
-        for xy in self.GetPlist():
+        plist, stats = self.GetPlist(), None
+        if self.order:
+            stats = od.Stats()
+            plist = od.OrderSegments(plist, [0, 0], stats=stats)
+        for xy in plist:
             ol.append(gc.G00(z=self.zsh))
             ol.append(gc.G00(x=xy[0], y=xy[1]))
             ol.append(gc.G00(z=self.z0 + self.zsh0))
             ol.append(gc.G01(z=self.z1, f=self.frz))
             ol.append(gc.G01(x=xy[2], y=xy[3]))
+        if stats is not None: ol.append(gc.COMMENT(stats.Text()))
         #ol.append(gc.G00(z=self.zsh, c="To safety height"))
         ol += self.DefaultPostamble()
         return ol
 
+    def CreatePreview(self):
+        """Returns the ticks as lines"""
+        if not self.ParametersOk(): return Preview()
+        return Preview(lines=self.GetPlist())
+
     def GetPlist(self):
         a = (self.a1 - self.a0) / (self.div - 1)  # delta angle
         plist = []
@@ -885,6 +1030,9 @@ class DrillMatrix(Basedata, Basemethods):  # ===================================
     name="DrillMatrix"
     description="Drilling a matrix"
     i = 0
+    cycle = False                                                               # drill with one canned cycle, see <Basemethods.DrillCycle>
+    retract = 1                                                                 # retract of the canned cycle: 0=G98 initial level, 1=G99 R-plane
+    order = False                                                               # order the holes to reduce the rapid travel, see <ordering.py>
 
     def __init__(self):
         self.__class__.i += 1
@@ -893,7 +1041,7 @@ class DrillMatrix(Basedata, Basemethods):  # ===================================
         self.dy = 2.54*4
         self.nx = 5
         self.ny = 2
-        self.peck = False   # plunge strategy (linear or peck)
+        self.peck = 0       # plunge strategy (0=linear, 1=peck, 2=chip breaking)
         self.center = True
 
     def ParametersOk(self):
@@ -910,18 +1058,22 @@ class DrillMatrix(Basedata, Basemethods):  # ===================================
         if not self.ParametersOk(): return [gc.COMMENT("PARAMETER ERROR")]
         ol = self.DefaultPreamble()
         ol.append(gc.G00(x=0, y=0, c="Rapid move to start point"))
-        for xy in self.GetPlist():
-            ol.append(gc.G00(z=self.zsh))
-            ol.append(gc.G00(x=xy[0], y=xy[1]))
-            ol.append(gc.G00(z=self.z0 + self.zsh0))
-            if self.peck == 0:
-                ol.append(gc.G01(z=self.z1, f=self.frz))
-            else:
-                ol.append(gc.G83(x=xy[0], y=xy[1], z=self.z1, r=0, q=self.zi, f=self.frz))
+        plist, stats = self.GetPlist(), None
+        if self.order:
+            stats = od.Stats()
+            plist = od.Order(plist, [0, 0], stats=stats)                        # from the start point
+        if self.cycle: ol += self.DrillCycle(plist)
+        else:          ol += self.Drill(plist)
+        if stats is not None: ol.append(gc.COMMENT(stats.Text()))
         #ol.append(gc.G00(z=self.zsh, c="To safety height"))
         ol += self.DefaultPostamble()
         return ol
 
+    def CreatePreview(self):
+        """Returns the holes"""
+        if not self.ParametersOk(): return Preview()
+        return Preview(holes=self.GetPlist(), radius=self.td / 2.0)
+
     def GetPlist(self):
         plist = []
         if self.center:
@@ -1163,6 +1315,9 @@ class Text(Basedata, Basemethods):  # ==========================================
     name="Text"
     description="Engrave text"
     i = 0
+    uncached = Basemethods.uncached + ("font",)                                 # the font is part of <CacheReferences>
+    unsaved = ("font",)                                                         # loaded from <fontfile>, see <Restore>
+    files = ("fontfile",)
 
     def __init__(self):         # ==== MANDATORY METHOD ====
         self.__class__.i += 1
@@ -1198,21 +1353,15 @@ class Text(Basedata, Basemethods):  # ==========================================
     def Update(self):           # ==== MANDATORY METHOD ====
         """Calculates the path for the nc-object and returns it as a list of gcode-objects"""
         if not self.ParametersOk(): return [gc.COMMENT("PARAMETER ERROR")]  # ==== RECOMMENDED CALL ====
-        ol = self.DefaultPreamble()
+        ol = tp.Toolpath(self.DefaultPreamble())
         #ol.append(gc.G00(x=0, y=0, c="Rapid move to start point!!!"))
         #ol.append(gc.G00(z=self.z0 + self.zsh0, c="Rapid down to workpiece"))
         ol.append(gc.G(64, p=self.g64, c="Blend path mode"))
         if self.parsed and not self.text=="":
             scalex, scaley = self.GetScale()
             ol2 = self.GetTextGcode(self.text, scalex, scaley)
-            if self.mirrorv:
-                for o in ol2:
-                    try:     o.x = o.x * -1
-                    except:  pass
-            if self.mirrorh:
-                for o in ol2:
-                    try:     o.y = o.y * -1
-                    except:  pass
+            if self.mirrorv: ol2.Scale(sx=-1)
+            if self.mirrorh: ol2.Scale(sy=-1)
             ol += ol2
         ol.append(gc.G(61, c="Exact path mode"))
         ol += self.DefaultPostamble()
@@ -1220,7 +1369,7 @@ class Text(Basedata, Basemethods):  # ==========================================
 
     def GetTextGcode(self, text, scalex, scaley):
         """Generates the g-code for the whole text"""
-        ol = []
+        ol = tp.Toolpath()
         if scaley==1: ch = self.font.ymax
         else:         ch = self.char_height
         if self.arcjust==0: r = self.radius - ch
@@ -1244,12 +1393,10 @@ class Text(Basedata, Basemethods):  # ==========================================
                 o = self.GetCharGcode(c, scalex, scaley)
                 if not self.radius==0 and not self.radius=="" and not self.radius==None:    # circular text
                     a = mu.ArcAngle(x+self.font.chars[c].xmax*scalex/2,r)
-                    for oo in o:
-                        oo.Rotate([0+self.font.chars[c].xmax*scalex/2,-r],-a)
-                        oo.AddOffset([-self.font.chars[c].xmax*scalex/2,r,0])
+                    o.Rotate([0+self.font.chars[c].xmax*scalex/2,-r],-a)
+                    o.AddOffset([-self.font.chars[c].xmax*scalex/2,r,0])
                 else:                                                                       # normal text
-                    for oo in o:
-                        oo.AddOffset([x,row,0])
+                    o.AddOffset([x,row,0])
                 ol += o
                 x += self.font.chars[c].xmax * scalex + self.char_space
             r -= self.line_space
@@ -1258,7 +1405,7 @@ class Text(Basedata, Basemethods):  # ==========================================
 
     def GetCharGcode(self, char, scalex, scaley):
         """Returns the g-code of the given character aligned to 0,0"""
-        ol = []
+        ol = tp.Toolpath()
         if char==" ": return ol
         if not self.font.HasChar(char): return ol
 
@@ -1274,12 +1421,12 @@ class Text(Basedata, Basemethods):  # ==========================================
                 dist = mu.PointsDistance([x0,y0],[x1,y1])
                 if dist>0.001 or first_stroke:
                     first_stroke = False
-                    ol.append(gc.G00(z=self.zsh))                   # up
-                    ol.append(gc.G00(x=x0, y=y0))                   # rapid move to start
-                    ol.append(gc.G00(z=z+0.1))                      # rapid move down
-                    ol.append(gc.G01(z=z, f=self.frtd))             # down
+                    ol.G00(z=self.zsh)                              # up
+                    ol.G00(x=x0, y=y0)                              # rapid move to start
+                    ol.G00(z=z+0.1)                                 # rapid move down
+                    ol.G01(z=z, f=self.frtd)                        # down
                 x1, y1 = stroke.x1 * scalex, stroke.y1 * scaley
-                ol.append(gc.G01(x=x1, y=y1))                       # engrave
+                ol.G01(x=x1, y=y1)                                  # engrave
         return ol
 
     def GetTextWidth(self, text, scalex):
@@ -1314,6 +1461,14 @@ class Text(Basedata, Basemethods):  # ==========================================
             scaley = self.char_height / self.font.hmax
         return scalex, scaley
 
+    def CacheReferences(self):
+        """Returns the hash of the loaded font for the cache key"""
+        return rc.Reference(self.font)
+
+    def Restore(self):
+        """Loads the font file"""
+        self.LoadFont(self.fontfile)
+
     def LoadFont(self, fn):
         """Loads the given fontfile"""
         self.font = f2v.LoadFont(fn, self.arcres)
@@ -1345,6 +1500,9 @@ class Relief(Basedata, Basemethods):  # ========================================
     name="Relief"
     description="Milling an image"
     i = 0
+    uncached = tuple(v for v in Basemethods.uncached if v not in ("posx", "posy")) + ("image",)  # <Update> uses the position
+    unsaved = ("image",)                                                        # loaded from <fn_image>, see <Restore>
+    files = ("fn_image",)
 
     def __init__(self):         # ==== MANDATORY METHOD ====
         self.__class__.i += 1
@@ -1368,19 +1526,28 @@ class Relief(Basedata, Basemethods):  # ========================================
     def Update(self):           # ==== MANDATORY METHOD ====
         """Calculates the path for the nc-object and returns it as a list of gcode-objects"""
         if not self.ParametersOk(): return [gc.COMMENT("PARAMETER ERROR")]  # ==== RECOMMENDED CALL ====
-        ol = self.DefaultPreamble()
-        ol.append(gc.G00(x=0, y=0, c="Rapid move to start point"))
-        ol.append(gc.G00(z=self.z0 + self.zsh0, c="Rapid down to workpiece"))
-        ol.append(gc.G01(z=0, f=self.frtd))
+        ol = tp.Toolpath(self.DefaultPreamble())
+        ol.G00(x=0, y=0, c="Rapid move to start point")
+        ol.G00(z=self.z0 + self.zsh0, c="Rapid down to workpiece")
+        ol.G01(z=0, f=self.frtd)
         ol.append(gc.G(64, p=0.1, c="Blend path mode"))
         ol += self.Gif2Gcode(self.posx, self.posy, self.z0)
         ol.append(gc.G(61, c="Exact path mode"))
         ol += self.DefaultPostamble()
         return ol
 
+    def CacheReferences(self):
+        """Returns the hash of the loaded image for the cache key"""
+        return rc.Reference(self.image)
+
+    def Restore(self):
+        """Loads the image file"""
+        if self.fn_image: self.LoadImage(self.fn_image)
+        else:             self.image = None
+
     def Gif2Gcode(self, x0, y0, z0):
         if self.image==None: return []
-        ol = []
+        ol = tp.Toolpath()
         colmax = max(list(self.image.getdata()))
         factor = self.z1 / colmax
 
@@ -1392,46 +1559,48 @@ class Relief(Basedata, Basemethods):  # ========================================
         if self.cuth:
             pix_= pix__ = 1000
             reverse = False
-            ol.append(gc.G00(x=x0, y=y0, z=z0))
+            ol.G00(x=x0, y=y0, z=z0)
             x = 0
             for y in range(self.image_height):
-                ol.append(gc.G01(x=x0+x*f, y=y0+y*f))
+                ol.G01(x=x0+x*f, y=y0+y*f)
                 for x in range(self.image_width):
                     if reverse: x = self.image_width - x - 1
-                    if pix_==pix[x,y]:
-                        ol.append(gc.G01(x=x0+x*f, y=y0+y*f))
+                    p = pix[x,y]
+                    if pix_==p:
+                        ol.G01(x=x0+x*f, y=y0+y*f)
                     else:
-                        ol.append(gc.G01(x=x0+x*f, y=y0+y*f, z=self.z1-pix[x,y]*factor))
-                    if pix_==pix__==pix[x,y]:
-                        ol.pop(-2)
+                        ol.G01(x=x0+x*f, y=y0+y*f, z=self.z1-p*factor)
+                    if pix_==pix__==p:
+                        ol.Delete(-2)
                     pix__ = pix_
-                    pix_ = pix[x,y]
+                    pix_ = p
                 if reverse:  reverse = False
                 else:        reverse = True
                 pix_= 1000
-                ol.append(gc.G01(z=z0))
+                ol.G01(z=z0)
 
         if self.cutv:
             pix_= pix__ = 1000
             reverse = False
-            ol.append(gc.G00(x=x0, y=y0, z=z0))
+            ol.G00(x=x0, y=y0, z=z0)
             y = 0
             for x in range(self.image_width):
-                ol.append(gc.G01(x=x0+x*f, y=y0+y*f))
+                ol.G01(x=x0+x*f, y=y0+y*f)
                 for y in range(self.image_height):
                     if reverse: y = self.image_height - y - 1
-                    if pix_==pix[x,y]:
-                        ol.append(gc.G01(x=x0+x*f, y=y0+y*f))
+                    p = pix[x,y]
+                    if pix_==p:
+                        ol.G01(x=x0+x*f, y=y0+y*f)
                     else:
-                        ol.append(gc.G01(x=x0+x*f, y=y0+y*f, z=self.z1-pix[x,y]*factor))
-                    if pix_==pix__==pix[x,y]:
-                        ol.pop(-2)
+                        ol.G01(x=x0+x*f, y=y0+y*f, z=self.z1-p*factor)
+                    if pix_==pix__==p:
+                        ol.Delete(-2)
                     pix__ = pix_
-                    pix_ = pix[x,y]
+                    pix_ = p
                 if reverse:  reverse = False
                 else:        reverse = True
                 pix_= 1000
-                ol.append(gc.G01(z=z0))
+                ol.G01(z=z0)
         return ol
 
     def Calc(self):
@@ -1450,6 +1619,7 @@ class Relief(Basedata, Basemethods):  # ========================================
     def LoadImage(self, fn):
         """Loads the given image file"""
         try:
+            from PIL import Image                                               # loaded on first use (startup time)
             self.image = Image.open(fn)
             self.image = self.image.rotate(180)
             self.image_width, self.image_height = self.image.size
@@ -1495,6 +1665,11 @@ class Subroutine(Basemethods):  # ==============================================
         ol.append(gc.TEXT(command))
         return ol
 
+    def CacheReferences(self):
+        """Returns the name and the code of the subroutine for the cache key"""
+        try:    return [ngcsub.SUBROUTINES[self.number].name, ngcsub.SUBROUTINES[self.number].code]
+        except: return None
+
 
 class Counterbore(Basedata, Basemethods):  # ===================================
     """Generate g-code for TEMPLATE"""
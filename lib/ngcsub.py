@@ -28,22 +28,31 @@ ToDo
 
 import re
 import glob
-import configparser
+
+from . import settings                                                                 # parsed ini-files
 
 VERSION = "230206"                                                              # version of this file (jjmmtt)
 
 PATH = ""                                                                       # path where to find the subroutines
-SUBROUTINES = []                                                                # list of instances of <Sub>
+# SUBROUTINES: list of instances of <Sub>, loaded on first use (see <__getattr__>)
 
 
 def Init():  # =================================================================
-    """Initialises the module"""
-    config = configparser.ConfigParser()
-    config.read('sgg.ini')
+    """Initialises the module, the subroutines are loaded on first use"""
     global PATH
-    PATH = config.get('SIMPLEGCODEGENERATOR', 'SGG_SUBROUTINES_DIR')
-    if not LoadAllSubroutines(""):
-        print("Error loading subroutines. Check path in the file <sgg.ini>.")
+    PATH = settings.Get().get('SIMPLEGCODEGENERATOR', 'SGG_SUBROUTINES_DIR')
+    globals().pop("SUBROUTINES", None)                                          # load them again on the next use
+
+
+def __getattr__(name):  # ======================================================
+    """Loads the subroutines, when <SUBROUTINES> is used the first time (PEP 562)"""
+    if name == "SUBROUTINES":
+        global SUBROUTINES
+        SUBROUTINES = []
+        if not LoadAllSubroutines(""):
+            print("Error loading subroutines. Check path in the file <sgg.ini>.")
+        return SUBROUTINES
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
 
 
 class Param(object):  # ========================================================
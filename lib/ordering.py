@@ -0,0 +1,242 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""
+Purpose of the file:
+Orders holes and other plunges to reduce the rapid travel between them.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+<Order> sorts a list of points [[x,y,...],...], the path starts at a given point
+and ends at the last hole (open path):
+- Points on a grid (e.g. a grill or a drill matrix) are ordered row by row in
+  alternating direction (serpentine), which is optimal for full grids.
+- All other point lists are ordered by nearest neighbour and improved by 2-opt
+  (reverse a part of the path) and or-opt (move 1..3 points to another place)
+  until no move helps or a number of tries is used up. Only the nearest
+  neighbours of each point are tried as new connections. The result does not
+  depend on the speed of the machine, the time budget is only a safety limit.
+<OrderSegments> does the same for cuts from a start to an end point (e.g. the
+ticks of a bezel), each cut may be reversed.
+"""
+
+import math
+import time
+import numpy
+
+VERSION = "261017"                                                              # version of this file (jjmmtt)
+
+WORK = 5000                                                                     # max. number of points tried by 2-opt and or-opt (about 1 s)
+BUDGET = 10.0                                                                   # max. time for 2-opt and or-opt, safety limit only (s)
+NEIGHBOURS = 8                                                                  # number of candidates per point for 2-opt and or-opt
+GRID = 0.5                                                                      # min. ratio of points to grid positions for the serpentine order
+SEGMENT = 3                                                                     # max. number of points moved by or-opt
+
+
+class Stats(object):  # ========================================================
+    """Result of the ordering of one nc-object"""
+
+    def __init__(self):
+        self.before = 0.0                                                       # rapid distance before ordering
+        self.after = 0.0                                                        # rapid distance after ordering
+        self.method = ""                                                        # method used
+
+    def Text(self):
+        """Returns the result as text, e.g. for a comment"""
+        return "Order (%s): rapid distance %.1f -> %.1f" % (self.method, self.before, self.after)
+
+
+def Length(x, y, order, start):  # =============================================
+    """Returns the length of the path from the start point through the points in the given order"""
+    if len(order) == 0: return 0.0
+    px = numpy.concatenate(([start[0]], x[order]))
+    py = numpy.concatenate(([start[1]], y[order]))
+    return float(numpy.hypot(numpy.diff(px), numpy.diff(py)).sum())
+
+
+def Serpentine(x, y, start):  # ================================================
+    """Returns the serpentine order of points on a grid or None, if the points are not on a grid.
+    Rows (same y) and columns (same x) are tried, starting at every corner."""
+    n = len(x)
+    best, blen = None, None
+    for a, b in [(y, x), (x, y)]:                                               # rows, columns
+        keys, row = numpy.unique(numpy.round(a, 6), return_inverse=True)
+        if len(keys) * len(numpy.unique(numpy.round(b, 6))) * GRID > n: return None
+        for first in [1, -1]:                                                   # first row
+            for flip in [0, 1]:                                                 # direction of the first row
+                r = row if first == 1 else len(keys) - 1 - row
+                d = numpy.where(r % 2 == flip, b, -b)                           # alternating direction
+                order = numpy.lexsort((d, r))
+                l = Length(x, y, order, start)
+                if blen is None or l < blen: best, blen = order, l
+    return best
+
+
+def Neighbours(x, y, k):  # ====================================================
+    """Returns the k nearest neighbours of each point (approximated within a grid of cells, -1=none)"""
+    n = len(x)
+    nb = numpy.full((n, k), -1, dtype=numpy.int64)
+    if n < 2: return nb
+    w, h = x.max() - x.min(), y.max() - y.min()
+    area = max(w * h, max(w, h) ** 2 / n, 1e-12)                               # points on a line: the length
+    size = math.sqrt(area * (k + 1) / n) or 1.0                                 # about k+1 points per cell
+    cx = numpy.floor((x - x.min()) / size).astype(numpy.int64)
+    cy = numpy.floor((y - y.min()) / size).astype(numpy.int64)
+    cells = {}
+    for i, c in enumerate(zip(cx.tolist(), cy.tolist())):
+        cells.setdefault(c, []).append(i)
+    for (i, j), points in cells.items():
+        cand = [p for di in (-1, 0, 1) for dj in (-1, 0, 1) for p in cells.get((i + di, j + dj), [])]
+        cand = numpy.array(cand)
+        points = numpy.array(points)
+        d = numpy.hypot(x[points][:, None] - x[cand][None, :], y[points][:, None] - y[cand][None, :])
+        d[points[:, None] == cand[None, :]] = numpy.inf                         # not the point itself
+        m = min(k, len(cand) - 1)
+        if m <= 0: continue
+        nearest = numpy.argsort(d, axis=1)[:, :m]
+        nb[points, :m] = cand[nearest]
+    return nb
+
+
+def NearestNeighbour(x, y, start, nb):  # ======================================
+    """Returns the nearest neighbour order starting at the start point"""
+    n = len(x)
+    free = numpy.ones(n, dtype=bool)
+    order = numpy.empty(n, dtype=numpy.int64)
+    c = int(numpy.argmin(numpy.hypot(x - start[0], y - start[1])))
+    for i in range(n):
+        order[i] = c
+        free[c] = False
+        if i == n - 1: break
+        cand = nb[c][nb[c] >= 0]
+        cand = cand[free[cand]]
+        if len(cand):                                                           # a neighbour is still free
+            c = int(cand[numpy.argmin(numpy.hypot(x[cand] - x[c], y[cand] - y[c]))])
+        else:
+            rest = numpy.flatnonzero(free)
+            c = int(rest[numpy.argmin(numpy.hypot(x[rest] - x[c], y[rest] - y[c]))])
+    return order
+
+
+def Improve(x, y, order, start, nb, deadline, work=WORK):  # ===================
+    """Improves the order by 2-opt and or-opt until no move helps, <work> points have been
+    tried or the deadline is reached"""
+    px = [start[0]] + x.tolist()                                                # node 0 is the start point, node i+1 is point i
+    py = [start[1]] + y.tolist()
+    nb = [[]] + [[c + 1 for c in cand if c >= 0] for cand in nb.tolist()]      # neighbours of each node
+    t = [0] + (order + 1).tolist()                                              # path of nodes
+    pos = [0] * len(t)                                                          # position of each node in the path
+    m = len(t)
+
+    def d(a, b):
+        if b is None: return 0.0                                                # behind the end of the path
+        return math.hypot(px[a] - px[b], py[a] - py[b])
+
+    def At(i):
+        return t[i] if i < m else None
+
+    def Update(i, j):
+        for p in range(i, j): pos[t[p]] = p
+
+    def TwoOpt(a):
+        """Tries to connect a with one of its neighbours by reversing a part of the path"""
+        for c in nb[a]:
+            i, j = sorted((pos[a], pos[c]))
+            if j == i + 1: continue
+            gain = d(t[i], t[i + 1]) + d(t[j], At(j + 1)) - d(t[i], t[j]) - d(t[i + 1], At(j + 1))
+            if gain > 1e-9:
+                t[i + 1:j + 1] = t[i + 1:j + 1][::-1]
+                Update(i + 1, j + 1)
+                return True
+        return False
+
+    def OrOpt(a):
+        """Tries to move up to SEGMENT points starting with a next to a neighbour"""
+        i = pos[a]
+        for l in range(1, min(SEGMENT, m - i) + 1):
+            seg = t[i:i + l]
+            gain = d(t[i - 1], seg[0]) + d(seg[-1], At(i + l)) - d(t[i - 1], At(i + l))
+            for c in nb[seg[0]] + nb[seg[-1]]:
+                for k in (pos[c] - 1, pos[c]):                                  # insert between k and k+1
+                    if k < 0 or i - 1 <= k < i + l: continue
+                    for ins in (seg, seg[::-1]):
+                        cost = d(t[k], ins[0]) + d(ins[-1], At(k + 1)) - d(t[k], At(k + 1))
+                        if gain - cost > 1e-9:
+                            if k < i: t[k + 1:i + l] = ins + t[k + 1:i]
+                            else:     t[i:k + 1] = t[i + l:k + 1] + ins
+                            Update(min(i, k + 1), max(i + l, k + 1))
+                            return True
+        return False
+
+    Update(0, m)
+    improved = True
+    while improved and work > 0 and time.perf_counter() < deadline:
+        improved = False
+        for a in range(1, m):
+            if TwoOpt(a) or OrOpt(a): improved = True
+            work -= 1
+            if work <= 0: break                                                 # reproducible limit
+            if a % 100 == 0 and time.perf_counter() > deadline: break
+    return numpy.array(t[1:], dtype=numpy.int64) - 1
+
+
+def Order(plist, start=(0, 0), budget=BUDGET, stats=None, work=WORK):  # =======
+    """Returns the points [[x,y,...],...] in an order with less rapid travel, starting at <start>"""
+    if stats is None: stats = Stats()
+    n = len(plist)
+    p = numpy.array([[q[0], q[1]] for q in plist], dtype=float).reshape(-1, 2)
+    x, y = p[:, 0], p[:, 1]
+    stats.before = Length(x, y, numpy.arange(n), start)
+    order = Serpentine(x, y, start) if n > 2 else None
+    if order is not None:
+        stats.method = "serpentine"
+    elif n > 2:
+        stats.method = "2-opt"
+        deadline = time.perf_counter() + budget
+        nb = Neighbours(x, y, min(NEIGHBOURS, n - 1))
+        order = Improve(x, y, NearestNeighbour(x, y, start, nb), start, nb, deadline, work)
+    else:
+        order = numpy.arange(n)
+    stats.after = Length(x, y, order, start)
+    if stats.after > stats.before:                                              # e.g. an already good order
+        order, stats.after, stats.method = numpy.arange(n), stats.before, "unchanged"
+    return [plist[i] for i in order]
+
+
+def SegmentsLength(slist, start):  # ===========================================
+    """Returns the rapid distance between the cuts [[x0,y0,x1,y1],...]"""
+    l, x, y = 0.0, start[0], start[1]
+    for s in slist:
+        l += math.hypot(s[0] - x, s[1] - y)
+        x, y = s[2], s[3]
+    return l
+
+
+def OrderSegments(slist, start=(0, 0), stats=None):  # =========================
+    """Returns the cuts [[x0,y0,x1,y1],...] in an order and direction with less rapid travel.
+    Tries alternating directions and nearest neighbour."""
+    if stats is None: stats = Stats()
+    stats.before = SegmentsLength(slist, start)
+    candidates = [("unchanged", list(slist))]
+    candidates.append(("alternating", [s if i % 2 == 0 else [s[2], s[3], s[0], s[1]] + list(s[4:]) for i, s in enumerate(slist)]))
+    rest, x, y, nn = list(slist), start[0], start[1], []
+    while rest:                                                                 # nearest start or end point
+        i, rev = min(((i, rev) for i in range(len(rest)) for rev in (0, 1)),
+                     key=lambda c: math.hypot(rest[c[0]][2 * c[1]] - x, rest[c[0]][2 * c[1] + 1] - y))
+        s = rest.pop(i)
+        if rev: s = [s[2], s[3], s[0], s[1]] + list(s[4:])
+        nn.append(s)
+        x, y = s[2], s[3]
+    candidates.append(("nearest neighbour", nn))
+    stats.method, result = min(candidates, key=lambda c: SegmentsLength(c[1], start))
+    stats.after = SegmentsLength(result, start)
+    return result
@@ -0,0 +1,142 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""
+Purpose of the file:
+Viewer of the generated g-code, which shows only the visible lines
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+The text widget holds only the lines of the window, they are read from the
+source (e.g. <sgg.Assembly>) on each scroll. The source provides:
+Lines()                     number of lines
+GetLines(first, n)          n lines as a string
+Find(text, line)            next line with the text or None
+So programs with millions of lines (e.g. a relief) are shown without copying
+them into Tk.
+"""
+
+import tkinter as tk
+import tkinter.font
+
+VERSION = "261017"                                                              # version of this file (jjmmtt)
+
+WHEEL_LINES = 3                                                                 # lines per step of the mouse wheel
+
+
+class OutputView(tk.Frame):  # =================================================
+    """Read only text box with a scrollbar, a line and a search entry"""
+
+    def __init__(self, master, source, width=80, height=30, font=None):
+        """Initialise the viewer, <source> see above"""
+        tk.Frame.__init__(self, master)
+        self.source = source
+        self.top = 0                                                            # first shown line
+        self.rows = height                                                      # number of shown lines
+        self.found = None                                                       # line of the last search result
+        self.line = tk.StringVar(self, "", "")                                  # entry: go to line
+        self.pattern = tk.StringVar(self, "", "")                               # entry: search text
+
+        self.text = tk.Text(self, borderwidth=1, height=height, width=width, wrap=tk.NONE, font=font)
+        self.text.grid(column=0, row=0, columnspan=5, sticky="nsew")
+        self.text.tag_configure("found", background="yellow")
+        self.scrollbar = tk.Scrollbar(self, command=self.Scroll, width=15)
+        self.scrollbar.grid(column=5, row=0, sticky="ns")
+        xscrollbar = tk.Scrollbar(self, command=self.text.xview, orient=tk.HORIZONTAL, width=15)
+        xscrollbar.grid(column=0, row=1, columnspan=5, sticky="ew")
+        self.text.configure(xscrollcommand=xscrollbar.set, state=tk.DISABLED)
+        tk.Label(self, text="Line").grid(column=0, row=2, sticky="e")
+        widget = tk.Entry(self, textvariable=self.line, width=10)
+        widget.grid(column=1, row=2, sticky="w")
+        widget.bind("<Return>", lambda event: self.GotoLine())
+        tk.Label(self, text="Find").grid(column=2, row=2, sticky="e")
+        widget = tk.Entry(self, textvariable=self.pattern, width=25)
+        widget.grid(column=3, row=2, sticky="ew")
+        widget.bind("<Return>", lambda event: self.FindNext())
+        tk.Button(self, text="Next", command=self.FindNext).grid(column=4, row=2, sticky="w")
+        self.columnconfigure(3, weight=1)
+        self.rowconfigure(0, weight=1)
+
+        self.text.bind("<Configure>", self.Resize)
+        self.text.bind("<MouseWheel>", lambda event: self.Scroll("scroll", -event.delta // 120 * WHEEL_LINES, "units"))
+        self.text.bind("<Button-4>", lambda event: self.Scroll("scroll", -WHEEL_LINES, "units"))
+        self.text.bind("<Button-5>", lambda event: self.Scroll("scroll", WHEEL_LINES, "units"))
+        self.text.bind("<Up>", lambda event: self.Scroll("scroll", -1, "units"))
+        self.text.bind("<Down>", lambda event: self.Scroll("scroll", 1, "units"))
+        self.text.bind("<Prior>", lambda event: self.Scroll("scroll", -1, "pages"))
+        self.text.bind("<Next>", lambda event: self.Scroll("scroll", 1, "pages"))
+        self.text.bind("<Control-Home>", lambda event: self.See(0))
+        self.text.bind("<Control-End>", lambda event: self.End())
+        self.text.bind("<Button-1>", lambda event: self.text.focus_set())
+        self.Render()
+
+    def Resize(self, event):
+        """Adapts the number of shown lines to the height of the text box"""
+        rows = max(1, event.height // tkinter.font.Font(font=self.text["font"]).metrics("linespace"))
+        if not rows == self.rows:
+            self.rows = rows
+            self.Render()
+
+    def Scroll(self, *args):
+        """Command of the scrollbar: ("moveto", fraction) or ("scroll", n, "units"/"pages")"""
+        if args[0] == "moveto":
+            self.top = int(float(args[1]) * self.source.Lines())
+        elif args[0] == "scroll":
+            self.top += int(args[1]) * (self.rows if args[2] == "pages" else 1)
+        self.Render()
+        return "break"                                                          # no scrolling of the text box itself
+
+    def Render(self):
+        """Shows the lines of the window and sets the scrollbar"""
+        total = self.source.Lines()
+        self.top = max(0, min(self.top, total - self.rows))
+        text = self.source.GetLines(self.top, self.rows)
+        self.text.configure(state=tk.NORMAL)
+        self.text.delete("1.0", tk.END)
+        self.text.insert("1.0", text[:-1] if text.endswith("\n") else text)     # no empty line at the end
+        if self.found is not None and self.top <= self.found < self.top + self.rows:
+            row = self.found - self.top + 1
+            self.text.tag_add("found", "%d.0" % row, "%d.end" % row)
+        self.text.configure(state=tk.DISABLED)
+        if total: self.scrollbar.set(self.top / total, min(1.0, (self.top + self.rows) / total))
+        else:     self.scrollbar.set(0.0, 1.0)
+
+    def Refresh(self):
+        """Shows the current output, e.g. after an update of the source"""
+        self.found = None
+        self.Render()
+
+    def See(self, line, mark=False):
+        """Shows a line at the top of the window"""
+        self.top = line
+        self.found = line if mark else None
+        self.Render()
+
+    def End(self):
+        """Shows the end of the output"""
+        self.See(self.source.Lines())
+
+    def GotoLine(self):
+        """Shows the line of the entry (first line: 1)"""
+        try:    self.See(int(self.line.get()) - 1, mark=True)
+        except: self.bell()
+
+    def FindNext(self):
+        """Shows the next line, which contains the search text"""
+        start = self.found if self.found is not None else self.top - 1
+        line = self.source.Find(self.pattern.get(), start)
+        if line is None:
+            self.bell()
+            return
+        self.found = line
+        if not self.top <= line < self.top + self.rows: self.top = line - self.rows // 2
+        self.Render()
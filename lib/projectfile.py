@@ -0,0 +1,161 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""
+Purpose of the file:
+Saves and loads projects as zip files with a JSON manifest and one JSON file per nc-object.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+Content of a project file:
+manifest.json       format, version, hash of the program (see <resultcache.Generator>)
+                    and the index: class and name of each object
+objects/nnnn.json   variables of an object (parameters only, no g-code)
+arrays/nnnn_m.npy   numpy arrays of an object, if any
+toolpaths/key       optional: result of <Update> (see <resultcache.DiskCache>)
+Data loaded from other files (fonts, images) is not stored, it is loaded again
+by <Basemethods.Restore>. <Load> only reads the manifest, the objects are read
+when they are used (see <Body>). Projects of older versions are pickled lists of
+<sgg.ncobject>, see <sgg.LoadProject>.
+The toolpaths are pickled. Files of others (e.g. requests of <sggserver.py>) are
+loaded with <Load(filename, trusted=False)>: nothing is unpickled and the file
+names of the objects (fonts, images, see <Basemethods.files>) are cleared, so no
+other file is read.
+"""
+
+import os
+import io
+import json
+import pickle
+import zipfile
+import numpy
+
+from . import gcode as gc
+from . import ncclasses
+from . import resultcache
+
+VERSION = "261017"                                                              # version of this file (jjmmtt)
+
+FORMAT = "SimpleGcodeGenerator project"                                         # content of a project file
+FORMAT_VERSION = 1                                                              # newer files can not be loaded
+MANIFEST = "manifest.json"                                                      # name of the index
+
+
+class Body(object):  # =========================================================
+    """Loads one nc-object from a project file, when it is called"""
+
+    def __init__(self, filename, entry, generator, trusted=True):
+        """Initialise the loader with the entry of the manifest"""
+        self.filename = os.path.abspath(filename)                               # project file
+        self.entry = entry                                                      # entry of the manifest
+        self.generator = generator                                              # hash of the program, which saved the file
+        self.trusted = trusted                                                  # load the stored results (pickled) and the files of the object
+
+    def __call__(self):
+        """Returns the nc-object, a stored result of <Update> is put into the cache"""
+        with zipfile.ZipFile(self.filename) as zf:
+            data = json.loads(zf.read(self.entry["file"]).decode("utf-8"))
+            obj = CLASSES[data["class"]].__new__(CLASSES[data["class"]])
+            obj.__dict__.update({k: Decode(v, zf) for k, v in data["variables"].items()})
+            if not self.trusted: obj.__dict__.update(dict.fromkeys(obj.files, ""))  # no files of others
+            obj.Restore()
+            tp = self.entry.get("toolpath")
+            if tp and self.trusted and self.generator == resultcache.Generator() and obj.CacheKey() == self.entry["key"]:
+                resultcache.CACHE.Put(self.entry["key"], pickle.loads(zf.read(tp)))
+        return obj
+
+    def IsIn(self, filename):
+        """Returns True, if the object is loaded from the given file"""
+        return self.filename == os.path.abspath(filename)
+
+
+CLASSES = {c.__name__: c for c in ncclasses.NCCLASSES}                          # class name -> nc-class
+
+
+def IsProject(filename):  # ====================================================
+    """Returns True, if the file has the format of this module (and is no pickled project)"""
+    return zipfile.is_zipfile(filename)
+
+
+def Encode(v, arrays, prefix):  # ==============================================
+    """Returns the value as JSON data, numpy arrays are appended to <arrays> and named <prefix>n.npy"""
+    if v is None or isinstance(v, (bool, int, float, str)):
+        return v
+    if isinstance(v, numpy.generic):
+        return v.item()
+    if isinstance(v, list):
+        return [Encode(i, arrays, prefix) for i in v]
+    if isinstance(v, tuple):
+        return {"tuple": [Encode(i, arrays, prefix) for i in v]}
+    if isinstance(v, dict):
+        return {"dict": [[Encode(k, arrays, prefix), Encode(i, arrays, prefix)] for k, i in v.items()]}
+    if isinstance(v, numpy.ndarray):
+        arrays.append(v)
+        return {"array": prefix + "%d.npy" % (len(arrays) - 1)}
+    if hasattr(gc, v.__class__.__name__) and hasattr(v, "__dict__"):            # g-code object, e.g. a point of a polygon
+        return {"gcode": v.__class__.__name__, "variables": {k: Encode(i, arrays, prefix) for k, i in vars(v).items()}}
+    raise TypeError("Can not save a value of type " + v.__class__.__name__)
+
+
+def Decode(v, zf):  # ==========================================================
+    """Returns the value of the JSON data, see <Encode>"""
+    if isinstance(v, list):
+        return [Decode(i, zf) for i in v]
+    if not isinstance(v, dict):
+        return v
+    if "tuple" in v:
+        return tuple(Decode(i, zf) for i in v["tuple"])
+    if "dict" in v:
+        return {Decode(k, zf): Decode(i, zf) for k, i in v["dict"]}
+    if "array" in v:
+        return numpy.load(io.BytesIO(zf.read(v["array"])), allow_pickle=False)
+    if "gcode" in v:
+        cls = getattr(gc, v["gcode"], None)
+        if not isinstance(cls, type): raise ValueError("Unknown g-code object in project file")
+        o = cls.__new__(cls)
+        o.__dict__.update({k: Decode(i, zf) for k, i in v["variables"].items()})
+        return o
+    raise ValueError("Unknown value in project file")
+
+
+def Save(filename, objects, toolpaths=False):  # ===============================
+    """Saves the nc-objects. With <toolpaths> the results of <Update>, which are in the cache, are stored, too."""
+    manifest = {"format": FORMAT, "version": FORMAT_VERSION, "generator": resultcache.Generator(), "objects": []}
+    with zipfile.ZipFile(filename + ".tmp", "w", zipfile.ZIP_DEFLATED) as zf:
+        for n, obj in enumerate(objects):
+            arrays = []
+            variables = {k: Encode(v, arrays, "arrays/%04d_" % n) for k, v in vars(obj).items() if k not in obj.unsaved and not k == "_version"}
+            entry = {"class": obj.__class__.__name__, "name": obj.objectname, "file": "objects/%04d.json" % n}
+            for m, a in enumerate(arrays):
+                buf = io.BytesIO()
+                numpy.save(buf, a, allow_pickle=False)
+                zf.writestr("arrays/%04d_%d.npy" % (n, m), buf.getvalue())
+            zf.writestr(entry["file"], json.dumps({"class": entry["class"], "variables": variables}, indent=1))
+            if toolpaths:
+                key = obj.CacheKey()
+                if key in resultcache.CACHE:
+                    entry["key"], entry["toolpath"] = key, "toolpaths/" + key
+                    if not entry["toolpath"] in zf.namelist():                  # identical objects share one toolpath
+                        zf.writestr(entry["toolpath"], pickle.dumps(resultcache.Compact(resultcache.CACHE.entries[key][0]), pickle.HIGHEST_PROTOCOL))
+            manifest["objects"].append(entry)
+        zf.writestr(MANIFEST, json.dumps(manifest, indent=1))
+    os.replace(filename + ".tmp", filename)                                     # the old file is kept on errors
+
+
+def Load(filename, trusted=True):  # ===========================================
+    """Reads the manifest and returns [(name of the object, loader of the object), ...], see <Body>.
+    Without <trusted> the stored results and the files of the objects are not loaded."""
+    with zipfile.ZipFile(filename) as zf:
+        manifest = json.loads(zf.read(MANIFEST).decode("utf-8"))
+    if not manifest.get("format") == FORMAT or manifest.get("version", 0) > FORMAT_VERSION:
+        raise ValueError("Project file of an unknown format or a newer version: " + filename)
+    return [(e["name"], Body(filename, e, manifest.get("generator"), trusted)) for e in manifest["objects"]]
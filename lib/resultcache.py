@@ -0,0 +1,292 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""
+Purpose of the file:
+Keeps the results of <Update> of all nc-objects in one project wide cache (least recently used).
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+The key of a result is a hash of the class and all variables, which are used by
+<Update> (see <ncclasses.Basemethods.CacheKey>). The placement (posx, posy,
+rotation) is applied later, so e.g. identical pockets at different positions
+share one result. The results are read only: <toolpath.Blocks> and
+<toolpath.Transform.Apply> do not modify them. <Put> stores a copy as toolpath
+(see <Compact>), so changing the g-code objects of an nc-object later (e.g. the
+points of a polygon) does not change the cached result.
+The hash only depends on the values, not on the memory addresses, so it is the
+same in every session.
+The results are also written to a directory (see <DiskCache>), so reopening a
+project or exporting it again only reads the files. The file name contains the
+hash of the sources of all modules (see <Generator>), a new version of the
+program does not use old results. Fonts, images and subroutines are part of the
+key by their content (see <Reference>), not by their file name.
+"""
+
+import os
+import sys
+import copy
+import pickle
+import hashlib
+import tempfile
+import weakref
+import threading
+import collections
+import numpy
+
+from . import toolpath as tp
+
+VERSION = "261017"                                                              # version of this file (jjmmtt)
+
+LIMIT = 200000000                                                               # max. memory of all results (bytes)
+DISK_LIMIT = 500000000                                                          # max. size of all files of the disk cache (bytes)
+EXTENSION = ".sggtp"                                                            # file extension of the disk cache
+OBJECT_SIZE = 400                                                               # approx. memory of one g-code object (bytes)
+
+
+class Cache(object):  # ========================================================
+    """Least recently used cache for results with a memory limit"""
+
+    def __init__(self, limit=LIMIT):
+        """Initialise the cache"""
+        self.limit = limit                                                      # max. memory of all results (bytes)
+        self.size = 0                                                           # memory of all results (bytes)
+        self.hits = 0                                                           # number of found results
+        self.misses = 0                                                         # number of missing results
+        self.entries = collections.OrderedDict()                                # key -> (result, size), the oldest first
+
+    def Get(self, key):
+        """Returns the result for the key or None"""
+        try:
+            result, size = self.entries[key]
+        except KeyError:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return result
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def Put(self, key, result):
+        """Stores the result for the key and removes the oldest results above the memory limit"""
+        if key in self.entries: self.size -= self.entries.pop(key)[1]
+        size = Size(result)
+        if size > self.limit: return                                            # too large, do not keep it
+        self.entries[key] = (result, size)
+        self.size += size
+        while self.size > self.limit:
+            result, size = self.entries.popitem(last=False)[1]
+            self.size -= size
+
+    def Clear(self):
+        """Removes all results"""
+        self.entries.clear()
+        self.size = 0
+
+    def Text(self):
+        """Returns the state as text, e.g. for a status window"""
+        return "%d results, %.1f of %.1f MB, %d hits, %d misses" % (len(self.entries), self.size / 1e6, self.limit / 1e6, self.hits, self.misses)
+
+
+class DiskCache(object):  # ====================================================
+    """Results stored as files in a directory, the least recently used files are removed above the size limit"""
+
+    def __init__(self, directory="", limit=DISK_LIMIT):
+        """Initialise the cache, an empty directory turns the cache off"""
+        self.directory = directory                                              # path of the files
+        self.limit = limit                                                      # max. size of all files (bytes)
+        self.size = None                                                        # size of all files (bytes), None: not known yet
+        self.hits = 0                                                           # number of found results
+        self.misses = 0                                                         # number of missing results
+
+    def FileName(self, key):
+        """Returns the file name for the key"""
+        return os.path.join(self.directory, Key(key, Generator()) + EXTENSION)
+
+    def Get(self, key):
+        """Returns the result for the key or None"""
+        if not self.directory: return None
+        fn = self.FileName(key)
+        try:
+            with open(fn, "rb") as handle:
+                result = pickle.load(handle)
+            os.utime(fn)                                                        # recently used
+        except:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return result
+
+    def Put(self, key, result):
+        """Writes the result to a file and removes the oldest files above the size limit"""
+        if not self.directory: return
+        fn = self.FileName(key)
+        if os.path.exists(fn): return                                           # e.g. written by another process
+        tmp = None
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(".tmp", os.path.basename(fn), self.directory)  # one file per writer
+            with os.fdopen(fd, "wb") as handle:
+                pickle.dump(Compact(result), handle, pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, fn)                                                 # never a partly written file
+            tmp = None
+            if self.size is None: self.size = sum(s for _, s, _ in self.Files())
+            else:                 self.size += os.path.getsize(fn)
+        except:
+            if tmp is not None:
+                try: os.remove(tmp)
+                except: pass
+            return
+        if self.size > self.limit: self.Evict()
+
+    def Files(self):
+        """Returns (time of the last use, size, file name) of all files"""
+        files = []
+        for fn in os.listdir(self.directory):
+            if not fn.endswith(EXTENSION): continue
+            fn = os.path.join(self.directory, fn)
+            try:
+                st = os.stat(fn)
+                files.append((st.st_mtime, st.st_size, fn))
+            except: pass                                                        # removed by another process
+        return files
+
+    def Evict(self):
+        """Removes the least recently used files until the size is below the limit"""
+        files = sorted(self.Files())
+        self.size = sum(s for _, s, _ in files)
+        for _, size, fn in files:
+            if self.size <= self.limit: break
+            try:
+                os.remove(fn)
+                self.size -= size
+            except: pass
+
+    def Clear(self):
+        """Removes all files"""
+        if not self.directory: return
+        try:
+            for _, _, fn in self.Files(): os.remove(fn)
+        except: pass
+        self.size = 0
+
+    def Text(self):
+        """Returns the state as text, e.g. for a status window"""
+        if not self.directory: return "off"
+        return "%s, %d hits, %d misses" % (self.directory, self.hits, self.misses)
+
+
+CACHE = Cache()                                                                 # the cache of the project
+DISK = DiskCache()                                                              # the disk cache, see <sgg.ini>
+REFERENCES = weakref.WeakKeyDictionary()                                        # object -> hash, see <Reference>
+GENERATOR = None                                                                # hash of the sources, see <Generator>
+LOCK = threading.Lock()                                                         # <Get> and <Put> of the gui and its worker thread
+
+
+def Get(key):  # ===============================================================
+    """Returns the result for the key from the memory or the disk cache or None"""
+    with LOCK:
+        result = CACHE.Get(key)
+        if result is None:
+            result = DISK.Get(key)
+            if result is not None: CACHE.Put(key, result)
+    return result
+
+
+def Put(key, result):  # =======================================================
+    """Stores a copy of the result in the memory and the disk cache and returns the copy"""
+    result = Compact(result)
+    with LOCK:
+        CACHE.Put(key, result)
+        DISK.Put(key, result)
+    return result
+
+
+def Generator():  # ============================================================
+    """Returns the hash of the sources of all modules, which create the results"""
+    global GENERATOR
+    if GENERATOR is None:
+        h = hashlib.sha1()
+        d = os.path.dirname(os.path.abspath(__file__))
+        for fn in sorted(os.listdir(d)):
+            if not fn.endswith(".py"): continue
+            with open(os.path.join(d, fn), "rb") as handle:
+                h.update(fn.encode("utf-8") + handle.read())
+        GENERATOR = h.hexdigest()
+    return GENERATOR
+
+
+def Compact(result):  # ========================================================
+    """Returns the result for storing: a list of g-code objects as toolpath, a toolpath without unused rows"""
+    if isinstance(result, list) and not any(isinstance(o, tp.Toolpath) for o in result):
+        result = tp.Toolpath(result)                                            # the same blocks, see <toolpath.Blocks>
+        result.objects = {r: copy.copy(o) for r, o in result.objects.items()}   # moves are copied to the columns, the others here
+    if isinstance(result, tp.Toolpath) and result.capacity > result.n:
+        result = copy.copy(result)
+        result.values = list(result.values)                                     # <Trim> replaces the arrays
+        result.Trim()
+    return result
+
+
+def Size(result):  # ===========================================================
+    """Returns the approx. memory of a result (toolpath, list of g-code objects) in bytes"""
+    try:    return result.nbytes                                                # toolpath
+    except AttributeError: pass
+    return sys.getsizeof(result) + len(result) * OBJECT_SIZE
+
+
+def Key(*values):  # ===========================================================
+    """Returns the hash of the values as a hex string"""
+    h = hashlib.sha1()
+    for v in values: Feed(h, v)
+    return h.hexdigest()
+
+
+def Feed(h, v):  # =============================================================
+    """Adds the value to the hash: numbers, strings, lists, dictionaries, arrays and objects with variables"""
+    if v is None or isinstance(v, (bool, int, float, str, bytes, numpy.generic)):
+        h.update((type(v).__name__ + ":" + repr(v) + ";").encode("utf-8"))
+    elif isinstance(v, (list, tuple)):
+        h.update(b"[%d;" % len(v))
+        for i in v: Feed(h, i)
+    elif isinstance(v, dict):
+        h.update(b"{%d;" % len(v))
+        for k in sorted(v, key=repr):
+            Feed(h, k)
+            Feed(h, v[k])
+    elif isinstance(v, numpy.ndarray):
+        h.update((v.dtype.str + repr(v.shape) + ";").encode("utf-8"))
+        h.update(numpy.ascontiguousarray(v).tobytes())
+    elif hasattr(v, "__dict__"):                                                # e.g. a g-code object
+        h.update((v.__class__.__name__ + "(").encode("utf-8"))
+        Feed(h, vars(v))
+    else:
+        h.update((v.__class__.__name__ + ":" + repr(v) + ";").encode("utf-8"))
+
+
+def Reference(obj):  # =========================================================
+    """Returns the hash of an object, which is not changed after loading (a font, an image).
+    The hash is only calculated once per object."""
+    if obj is None: return None
+    try:
+        return REFERENCES[obj]
+    except (KeyError, TypeError):
+        pass
+    if hasattr(obj, "tobytes"):                                                 # image
+        key = Key(obj.__class__.__name__, getattr(obj, "mode", None), list(getattr(obj, "size", [])), obj.tobytes())
+    else:
+        key = Key(obj)
+    try:    REFERENCES[obj] = key
+    except TypeError: pass                                                      # no weak reference possible
+    return key
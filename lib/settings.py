@@ -0,0 +1,45 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""
+Purpose of the file:
+Reads the ini-files once and provides the parsed settings to all modules.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+Relative file names are relative to the current directory (the application
+directory), the same as before. <Reload> reads the files again on the next use.
+"""
+
+import os
+import configparser
+
+VERSION = "261017"                                                              # version of this file (jjmmtt)
+
+FILE = "sgg.ini"                                                                # settings of the application
+DEFAULTS = "defaults.ini"                                                       # default parameters of new objects
+PARSERS = {}                                                                    # absolute file name -> ConfigParser
+
+
+def Get(fn=FILE):  # ===========================================================
+    """Returns the parsed ini-file, it is read only once"""
+    fn = os.path.abspath(fn)
+    if fn not in PARSERS:
+        config = configparser.ConfigParser()
+        config.read(fn)
+        PARSERS[fn] = config
+    return PARSERS[fn]
+
+
+def Reload():  # ===============================================================
+    """Forgets all parsed files, e.g. after editing them"""
+    PARSERS.clear()
@@ -36,10 +36,12 @@ import datetime
 import sys
 import os
 import copy
-import subprocess
 import re
-import configparser
+import bisect
+import threading
+import numpy
 
+from . import settings                                                                 # parsed ini-files
 from . import ncclasses                                                                # import g-code shapes (outlining, pocketing, ...)
 from . import tooltable                                                                # reading the linux cnc tool table
 from . import counterbore                                                              # provides drill paraemetrs for counter bores
@@ -47,6 +49,9 @@ from . import ngcsub
 from . import utils                                                                    # common utility functions
 from . import feedsnspeeds
 from . import font2vector
+from . import formatter                                                                # production output
+from . import toolpath                                                                 # result type of <Update>
+from . import resultcache                                                              # project wide cache of the <Update> results
 
 APP = "SimpleGcodeGenerator"                                                    # name of the application
 VERSION = "230206"                                                              # version of this file (jjmmtt)
@@ -59,33 +64,266 @@ POSTAMBLE_DEFAULT = "M5\t( spindle control: stop the spindle )\nM9\t( coolant co
 GCODEFILE_EXTENSION = "ngc"                                                     # default g-code output file extension
 PROJECTFILE_EXTENSION = "sgg"                                                   # default project file extension
 PROJECTFILE_DEFAULT = "default.sgg"                                             # default project file name
+CACHE_LIMIT = 4000000                                                           # max. characters of g-code kept per object while streaming
+PARALLEL_MIN = 2                                                                # min. number of changed objects for the parallel generation
 
 class ncobject(object):  # =====================================================
     """Wrapper class for ncclasses instances, to keep track of changes"""
 
-    def __init__(self, obj):
-        """Initialise the class"""
+    def __init__(self, obj, loader=None, name=""):
+        """Initialise the class. With a <loader> the instance is loaded, when it is used (see <__getattr__>)."""
+        self.production = None                                                  # cached production output, see <GetProductionChunks>
+        if loader is not None:
+            self.loader = loader                                                # returns the ncclass instance, see <projectfile.Body>
+            self.name = name                                                    # name of the instance, until it is loaded
+            self.gcode = self.version = None
+            return
         self.obj = obj                                                          # ncclass instance
-        self.gcode = obj.GetGcode(obj.Update())                                 # g-code result of the instance
-        self.varcopy = self.CopyVars(obj)                                       # current values of the instance variables
+        self.version = obj.GetVersion()                                         # number of changes of the instance, when the g-code was created
+        self.gcode = obj.GetGcode(self.Path())                                  # g-code result of the instance
+
+    def __getattr__(self, name):
+        """Loads the instance, when it is used the first time"""
+        if name == "obj" and "loader" in self.__dict__:
+            self.obj = self.__dict__.pop("loader")()
+            return self.obj
+        raise AttributeError(name)
+
+    def IsLoaded(self):
+        """Returns False, if the instance is not loaded yet"""
+        return "obj" in self.__dict__
+
+    def GetName(self):
+        """Returns the name of the instance without loading it"""
+        if self.IsLoaded(): return self.obj.objectname
+        return self.name
+
+    def Changed(self):
+        """Returns True, if the instance was changed since the g-code was created"""
+        return not getattr(self, "version", None) == self.obj.GetVersion()      # projects of older versions have no version
+
+    def Path(self, recalculate=False):
+        """Returns the result of <Update>, which is shared with all identical objects (see <Path>)"""
+        return Path(self.obj, recalculate)
 
     def GetGcode(self, recalculate=False):
         """Returns the g-code of the object and updates the g-code only when neccessary"""
-        if recalculate:
-            self.gcode = self.obj.GetGcode(self.obj.Update())
-            self.varcopy = self.CopyVars(self.obj)
-        else:
-            if not self.varcopy==self.CopyVars(self.obj):                           # compare last to current parameters
-                self.gcode = self.obj.GetGcode(self.obj.Update())
-                self.varcopy = self.CopyVars(self.obj)
+        if recalculate or self.gcode is None or self.Changed():
+            self.version = self.obj.GetVersion()
+            self.gcode = self.obj.GetGcode(self.Path(recalculate))
         return self.gcode
 
-    def CopyVars(self, obj):
-        """Copies the variable contents of the given object into a list"""
-        p = []
-        for name in vars(obj):
-            p.append(obj.__dict__[name])
-        return p
+    def GetGcodeChunks(self, recalculate=False, modal=None):
+        """Generator, returns the g-code of the object block by block.
+        Only g-code up to <CACHE_LIMIT> characters is kept for the next call."""
+        if modal is not None:
+            yield from self.GetProductionChunks(recalculate, modal)
+            return
+        if not recalculate and self.gcode is not None and not self.Changed():
+            yield self.gcode
+            return
+        version = self.obj.GetVersion()
+        chunks, size = [], 0
+        for chunk in self.obj.GetGcodeChunks(self.Path(recalculate)):
+            if chunks is not None:
+                size += len(chunk)
+                if size <= CACHE_LIMIT: chunks.append(chunk)
+                else:                   chunks = None                           # too large, do not keep it
+            yield chunk
+        self.gcode = "".join(chunks) if chunks is not None else None            # None: create it again, when needed
+        self.version = version
+
+    def GetProductionChunks(self, recalculate, modal):
+        """Generator, returns the production output of the object block by block and updates the modal state.
+        The output depends on the modal state at the start, it is only reused for the same state."""
+        state = modal.GetState()
+        cache = getattr(self, "production", None)                               # (version, state at start, g-code, state at end)
+        if not recalculate and cache is not None and cache[1]==state and cache[0]==self.obj.GetVersion():
+            modal.SetState(cache[3])
+            yield cache[2]
+            return
+        self.production = None
+        version = self.obj.GetVersion()
+        chunks, size = [], 0
+        for chunk in self.obj.GetGcodeChunks(self.Path(recalculate), modal):
+            if chunks is not None:
+                size += len(chunk)
+                if size <= CACHE_LIMIT: chunks.append(chunk)
+                else:                   chunks = None                           # too large, do not keep it
+            yield chunk
+        if chunks is not None: self.production = (version, state, "".join(chunks), modal.GetState())
+
+
+class Assembly(object):  # =====================================================
+    """Output of the project as an ordered list of segments: the header and one segment per object.
+    <Update> replaces only the changed segments and returns the differences, so the gui does not
+    need a copy of the whole output. <GetLines> and <Find> use an index of the line starts of each
+    segment, which is created on first use (see <outputview.OutputView>)."""
+
+    def __init__(self):
+        """Initialise an empty output"""
+        self.owners = []                                                        # ncobject of each segment (None=header)
+        self.texts = []                                                         # g-code of each segment
+        self.lines = []                                                         # number of lines of each segment
+        self.offsets = None                                                     # first line and character of each segment, see <Offsets>
+        self.starts = []                                                        # index of the line starts of each segment or None, see <Starts>
+
+    def Update(self, owners, texts):
+        """Replaces the segments by the given ones and returns the differences as a list of
+        (segment index, (first, last line + 1) before, (first, last line + 1) after, new g-code).
+        The differences have to be applied in the given order."""
+        import difflib                                                          # loaded on first use (startup time)
+        if owners == self.owners: opcodes = [("equal", 0, len(owners), 0, len(owners))]
+        else:                     opcodes = difflib.SequenceMatcher(None, self.owners, owners, autojunk=False).get_opcodes()
+        diffs, lines, starts, line = [], [], [], 0
+        for tag, i1, i2, j1, j2 in opcodes:
+            if tag == "equal":
+                for i, j in zip(range(i1, i2), range(j1, j2)):
+                    old, new = self.texts[i], texts[j]
+                    n, index = self.lines[i], self.starts[i]
+                    if not (old is new or old == new):                          # changed object
+                        n, index = new.count("\n"), None
+                        diffs.append((j, (line, line + self.lines[i]), (line, line + n), new))
+                    lines.append(n)
+                    starts.append(index)
+                    line += n
+            else:                                                               # created, deleted or moved objects
+                new = texts[j1:j2]
+                n = [t.count("\n") for t in new]
+                diffs.append((j1, (line, line + sum(self.lines[i1:i2])), (line, line + sum(n)), "".join(new)))
+                lines += n
+                starts += [None] * len(new)
+                line += sum(n)
+        self.owners, self.texts, self.lines, self.starts = list(owners), list(texts), lines, starts
+        if diffs: self.offsets = None
+        return diffs
+
+    def Offsets(self):
+        """Returns the first line and the first character of each segment"""
+        if self.offsets is None:
+            line = char = 0
+            self.offsets = []
+            for t, n in zip(self.texts, self.lines):
+                self.offsets.append((line, char))
+                line += n
+                char += len(t)
+        return self.offsets
+
+    def Lines(self):
+        """Returns the number of lines of the whole output"""
+        return sum(self.lines)
+
+    def GetText(self):
+        """Returns the whole output as a string"""
+        return "".join(self.texts)
+
+    def Starts(self, segment):
+        """Returns the first character of each line of a segment (numpy array)"""
+        if self.starts[segment] is None:
+            text, n = self.texts[segment], self.lines[segment]
+            if text.isascii():                                                  # one byte per character
+                ends = numpy.flatnonzero(numpy.frombuffer(text.encode("ascii"), dtype=numpy.uint8) == 10)
+            else:
+                ends = numpy.array([m.start() for m in re.finditer("\n", text)], dtype=numpy.int64)
+            self.starts[segment] = numpy.concatenate(([0], ends[:n - 1] + 1)) if n else ends[:0]
+        return self.starts[segment]
+
+    def Segment(self, line):
+        """Returns the segment of a line and the line within this segment"""
+        offsets = self.Offsets()
+        segment = max(bisect.bisect_right(offsets, (line, float("inf"))) - 1, 0)
+        return segment, line - offsets[segment][0]
+
+    def FirstLine(self, segment):
+        """Returns the first line of a segment, e.g. of an object (segment 0 is the header)"""
+        offsets = self.Offsets()
+        return offsets[segment][0] if segment < len(offsets) else self.Lines()
+
+    def GetLines(self, first, n):
+        """Returns n lines from the given line on as a string, without the rest of the output"""
+        chunks = []
+        segment, line = self.Segment(max(first, 0))
+        while n > 0 and segment < len(self.texts):
+            if line < self.lines[segment]:
+                starts, text = self.Starts(segment), self.texts[segment]
+                last = min(line + n, self.lines[segment])
+                chunks.append(text[starts[line]:starts[last] if last < len(starts) else len(text)])
+                n -= last - line
+            segment, line = segment + 1, 0
+        return "".join(chunks)
+
+    def Find(self, pattern, line=0, case=False):
+        """Returns the first line after the given line, which contains the text, or None.
+        The search continues at the start of the output."""
+        regex = re.compile(re.escape(pattern), 0 if case else re.IGNORECASE)
+        total = self.Lines()
+        if not pattern or not total: return None
+        segment, start = self.Segment((line + 1) % total)
+        pos = int(self.Starts(segment)[start]) if start < self.lines[segment] else len(self.texts[segment])
+        others = list(range(segment + 1, len(self.texts))) + list(range(segment))
+        parts = [(segment, pos, len(self.texts[segment]))] + [(i, 0, len(self.texts[i])) for i in others] + [(segment, 0, pos)]
+        for i, begin, end in parts:
+            if not self.lines[i]: continue
+            m = regex.search(self.texts[i], begin, end)
+            if m: return self.Offsets()[i][0] + int(numpy.searchsorted(self.Starts(i), m.start(), "right")) - 1
+        return None
+
+
+def Path(obj, recalculate=False):  # ===========================================
+    """Returns the result of <Update> of the nc-object, which is shared with all identical objects (see <resultcache.py>).
+    With <recalculate> the result is created again, e.g. after changing a file."""
+    key = obj.CacheKey()
+    path = None if recalculate else resultcache.Get(key)
+    if path is None:
+        path = obj.Update()
+        if isinstance(path, (list, toolpath.Toolpath)): path = resultcache.Put(key, path)  # not a generator, the copy is shared
+    return path
+
+
+class Worker(object):  # =======================================================
+    """Runs one job at a time in a background thread, e.g. the generation of the gui (see <sgg.Prepare>).
+    The job gets an event, which is set to cancel it. <done> is called in the thread with the result
+    or the exception of the job, it has to hand it over to the gui (e.g. with <after_idle>)."""
+
+    def __init__(self):
+        """Initialise the worker"""
+        self.running = False                                                    # a job is running
+        self.cancel = threading.Event()                                         # set to cancel the running job
+
+    def Busy(self):
+        """Returns True, if a job is running"""
+        return self.running
+
+    def Start(self, job, done):
+        """Runs job(cancel) in a new thread and calls done(result)"""
+        if self.running: raise RuntimeError("The worker is busy")
+        self.running = True
+        self.cancel = threading.Event()
+        threading.Thread(target=self.Run, args=(job, done, self.cancel), name="sgg worker", daemon=True).start()
+
+    def Run(self, job, done, cancel):
+        """Runs in the thread"""
+        try:    result = job(cancel)
+        except Exception as e: result = e
+        self.running = False                                                    # the next job may be started by <done>
+        done(result)
+
+    def Cancel(self):
+        """Cancels the running job, it stops after the current object"""
+        self.cancel.set()
+
+
+def WorkerInit(cwd, cachedir, cachesize):  # ===================================
+    """Initialises a process of the parallel generation with the settings of the application"""
+    os.chdir(cwd)
+    ngcsub.Init()
+    ncclasses.Init()
+    resultcache.DISK.directory, resultcache.DISK.limit = cachedir, cachesize
+
+
+def Generate(obj):  # ==========================================================
+    """Returns the g-code of the nc-object, runs in a process of the parallel generation"""
+    return ncobject(obj).gcode
 
 
 class sgg():  # ================================================================
@@ -99,6 +337,12 @@ class sgg():  # ================================================================
         self.axis_remote_path = ""      # determined path to axis-remote
         self.preamble_found = False
         self.postamble_found = False
+        self.production = False         # production output: no redundant words and comments
+        self.decimals = 4               # number of decimals of the production output
+        self.trim = True                # remove trailing zeros in the production output
+        self.processes = 0              # number of processes for the parallel generation, 0=off
+        self.assembly = Assembly()      # output of the gui, see <UpdateAssembly>
+        self.project_toolpaths = False  # store the toolpaths in the project file, see <projectfile.py>
         self.__InitDefaults()
         self.AxisRemoteSetPath()
 
@@ -135,10 +379,17 @@ class sgg():  # ================================================================
         ncclasses.Init()                                                        # init the ncclasses module
         feedsnspeeds.Init()                                                     # init the feedsnspeeds module
 
-        config = configparser.ConfigParser()
-        config.read('sgg.ini')
+        config = settings.Get()
         global LCNC_BIN_DIR
         LCNC_BIN_DIR = config.get('LINUXCNC', 'LCNC_BIN_DIR')
+        self.production = config.getboolean('SIMPLEGCODEGENERATOR', 'SGG_PRODUCTION', fallback=self.production)
+        self.decimals = config.getint('SIMPLEGCODEGENERATOR', 'SGG_DECIMALS', fallback=self.decimals)
+        self.trim = config.getboolean('SIMPLEGCODEGENERATOR', 'SGG_TRIM', fallback=self.trim)
+        resultcache.CACHE.limit = config.getint('SIMPLEGCODEGENERATOR', 'SGG_CACHE_SIZE', fallback=resultcache.LIMIT // 1000000) * 1000000
+        resultcache.DISK.directory = config.get('SIMPLEGCODEGENERATOR', 'SGG_CACHE_DIR', fallback=resultcache.DISK.directory)
+        self.project_toolpaths = config.getboolean('SIMPLEGCODEGENERATOR', 'SGG_PROJECT_TOOLPATHS', fallback=self.project_toolpaths)
+        self.processes = config.getint('SIMPLEGCODEGENERATOR', 'SGG_PROCESSES', fallback=self.processes)
+        resultcache.DISK.limit = config.getint('SIMPLEGCODEGENERATOR', 'SGG_CACHE_DIR_SIZE', fallback=resultcache.DISK_LIMIT // 1000000) * 1000000
 
     def ObjectCreate(self, classindex, objectindex):
         """Creates a new instance and inserts the object into the objectlist after the given index. Returns the new object"""
@@ -172,27 +423,35 @@ class sgg():  # ================================================================
 
     def SaveProject(self, filename, indexes=None):
         """Save the current project"""
+        from . import projectfile                                               # loaded on first use (startup time)
         if indexes==None:
             ol = self.objlist
         else:
             ol = []
             for i in indexes:
                 ol.append(self.objlist[i])
-        with open(filename, 'wb') as handle:
-            pickle.dump(ol, handle, pickle.HIGHEST_PROTOCOL)
+        for o in self.objlist:                                                  # the file is replaced, load the instances still in it
+            if not o.IsLoaded() and o.loader.IsIn(filename): o.obj
+        projectfile.Save(filename, [o.obj for o in ol], self.project_toolpaths)
         self.fn_project = filename
 
-    def LoadProject(self, filename, index=None):
-        """Load a project"""
-        with open(filename, 'rb') as handle:
-            if index==None:                             # overwrite
-                self.objlist = pickle.load(handle)
-            else:                                       # insert
-                for o in pickle.load(handle):
-                    self.objlist.insert(index, o)
-                    index+=1
+    def LoadProject(self, filename, index=None, pickled=True):
+        """Load a project, the objects are loaded when they are used. Pickled projects of older versions are loaded at once.
+        Without <pickled> nothing is unpickled (no old projects, no stored results) and no fonts or images are read, e.g. for files of others."""
+        from . import projectfile                                               # loaded on first use (startup time)
+        if projectfile.IsProject(filename):
+            objects = [ncobject(None, loader, name) for name, loader in projectfile.Load(filename, pickled)]
+        elif not pickled:
+            raise ValueError("Not a project file of this version (pickled projects are not loaded)")
+        else:
+            with open(filename, 'rb') as handle:
+                objects = pickle.load(handle)
+            for o in objects: o.gcode = None                                    # created by an older version, use the result cache
+        if index==None:                                 # overwrite
+            self.objlist = objects
+        else:                                           # insert
+            self.objlist[index:index] = objects
         self.fn_project = filename
-        self.GetGcode(recalculate=True)
 
     def ResetProject(self):
         """Reset the current project (delete all objects)"""
@@ -204,9 +463,8 @@ class sgg():  # ================================================================
         """Write g-code of the whole project or the selected objects to a file"""
         retval = True
         try:
-            of = open(filename, 'w')
-            of.write(self.GetGcode(indexes=indexes))
-            of.close()
+            with open(filename, 'w') as of:
+                self.WriteGcode(of, indexes=indexes)
             self.fn_output = filename
         except:
             retval = False
@@ -214,23 +472,143 @@ class sgg():  # ================================================================
 
     def GetGcode(self, indexes=None, recalculate=False):
         """Return the complete g-code of all objects as a string"""
+        return "".join(self.GetGcodeChunks(indexes, recalculate))
+
+    def GetHeader(self):
+        """Returns the comments at the start of the g-code"""
         gcode = "( Project: " + self.fn_project + " )\n"
         gcode += "( Date: " + str(datetime.date.today()) + " )\n"
         gcode += "( Generator: " + APP + " v" + VERSION + " )\n\n"
-        if indexes==None:
-            for o in self.objlist:
-                gcode += o.GetGcode(recalculate)
-        else:
-            for i in indexes:
-                gcode += self.objlist[i].GetGcode(recalculate)
         return gcode
 
+    def Snapshot(self, prepared=()):
+        """Returns the objects, whose result has to be created, as [(ncobject, version, copy of the instance, modal state), ...].
+        <Prepare> creates the results of the copies in the background, the gui may change the instances meanwhile.
+        Objects in <prepared> ((id, version) of results, which were not kept, e.g. too large) are left out.
+        Only the versions are compared here, the cache keys are calculated by <Prepare>."""
+        if self.production: return self.ProductionSnapshot(prepared)
+        snapshots = []
+        for o in self.objlist:
+            version = o.obj.GetVersion()
+            if (o.gcode is None or o.Changed()) and not (id(o), version) in prepared:
+                snapshots.append((o, version, o.obj.Snapshot(), None))
+        return snapshots
+
+    def ProductionSnapshot(self, prepared):
+        """Returns the objects from the first changed object to the end, the production output depends
+        on the previous objects. The first one gets the modal state at its start."""
+        modal = formatter.Modal(self.decimals, self.trim)
+        state = modal.GetState()
+        for n, o in enumerate(self.objlist):
+            cache = getattr(o, "production", None)                              # (version, state at start, g-code, state at end)
+            if cache is None or not cache[0] == o.obj.GetVersion() or not cache[1] == state: break
+            state = cache[3]
+        else:
+            return []                                                           # all kept outputs are valid
+        objects = self.objlist[n:]
+        if all((id(o), o.obj.GetVersion()) in prepared for o in objects): return []
+        return [(o, o.obj.GetVersion(), o.obj.Snapshot(), state if i == 0 else None) for i, o in enumerate(objects)]
+
+    def Prepare(self, snapshots, cancel, progress=None):
+        """Creates the results of the copies of <Snapshot>, runs in a background thread (see <Worker>).
+        Returns [(ncobject, version, g-code or production output), ...], stops when <cancel> is set.
+        progress(number of created objects, number of objects) is called after each object."""
+        modal = formatter.Modal(self.decimals, self.trim) if self.production else None
+        results = []
+        for n, (o, version, obj, state) in enumerate(snapshots):
+            if cancel.is_set(): break
+            if modal is None:
+                results.append((o, version, obj.GetGcode(Path(obj))))
+            else:
+                if state is not None: modal.SetState(state)
+                start = modal.GetState()
+                cache = getattr(o, "production", None)
+                if cache is not None and cache[0] == version and cache[1] == start:  # unchanged object after a changed one
+                    modal.SetState(cache[3])
+                    results.append((o, version, cache))
+                else:
+                    text = "".join(obj.GetGcodeChunks(Path(obj), modal))
+                    results.append((o, version, (version, start, text, modal.GetState())))
+            if progress is not None: progress(n + 1, len(snapshots))
+        return results
+
+    def Apply(self, results):
+        """Takes the g-code of <Prepare>. Results of deleted objects or objects, which have been changed
+        in the meantime, are dropped. Returns the number of dropped results.
+        The results are kept without a size limit, the output of the gui holds them anyway (see <UpdateAssembly>)."""
+        current = set(map(id, self.objlist))
+        dropped = 0
+        for o, version, gcode in results:
+            if id(o) in current and o.obj.GetVersion() == version:
+                if isinstance(gcode, tuple):                                    # production output, see <ncobject.GetProductionChunks>
+                    o.production = gcode
+                else:
+                    o.gcode, o.version = gcode, version
+            else:
+                dropped += 1
+        return dropped
+
+    def UpdateAssembly(self):
+        """Updates the output of the gui (see <Assembly>) and returns the differences.
+        Called, when <Snapshot> returns nothing: the outputs kept by <Apply> are used, nothing is created here."""
+        if self.production: texts = [o.production[2] for o in self.objlist]
+        else:               texts = [o.gcode for o in self.objlist]
+        return self.assembly.Update([None] + self.objlist, [self.GetHeader()] + texts)
+
+    def GetGcodeChunks(self, indexes=None, recalculate=False):
+        """Generator, returns the g-code of all or the selected objects block by block"""
+        yield self.GetHeader()
+        if self.production: modal = formatter.Modal(self.decimals, self.trim)  # modal state of the whole program
+        else:               modal = None
+        if indexes==None: objects = self.objlist
+        else:             objects = [self.objlist[i] for i in indexes]
+        if modal is None and self.processes > 1:                                # the production output depends on the previous objects
+            yield from self.ParallelChunks(objects, recalculate)
+            return
+        for o in objects:
+            yield from o.GetGcodeChunks(recalculate, modal)
+
+    def ParallelChunks(self, objects, recalculate):
+        """Generator, returns the g-code of the objects, the changed objects are created in parallel processes.
+        The results are returned in the order of the objects, as soon as they are ready."""
+        parallel = []                                                           # objects, which are created by the processes
+        for o in objects:
+            stale = recalculate or o.gcode is None or o.Changed()
+            parallel.append(stale and (recalculate or not o.obj.CacheKey() in resultcache.CACHE))
+        if sum(parallel) < PARALLEL_MIN:
+            for o in objects:
+                yield from o.GetGcodeChunks(recalculate)
+            return
+        import multiprocessing                                                  # loaded on first use (startup time)
+        initargs = (os.getcwd(), resultcache.DISK.directory, resultcache.DISK.limit)
+        with multiprocessing.Pool(min(self.processes, sum(parallel)), WorkerInit, initargs) as pool:
+            results = pool.imap(Generate, [o.obj for o, p in zip(objects, parallel) if p])
+            for o, p in zip(objects, parallel):
+                if not p:
+                    yield from o.GetGcodeChunks(recalculate)
+                    continue
+                version = o.obj.GetVersion()
+                gcode = next(results)
+                yield gcode
+                o.gcode = gcode if len(gcode) <= CACHE_LIMIT else None          # None: create it again, when needed
+                o.version = version
+
+    def WriteGcode(self, out, indexes=None, recalculate=False):
+        """Write the g-code block by block to a file, stdout or a socket. Returns the number of written characters."""
+        n = 0
+        for chunk in self.GetGcodeChunks(indexes, recalculate):
+            if hasattr(out, "sendall"): out.sendall(chunk.encode("utf-8"))      # socket
+            else:                       out.write(chunk)                        # file or stdout
+            n += len(chunk)
+        return n
+
     def AxisReload(self):
         """If LinuxCNC Axis is running, let it reload the current loaded file"""
         try:
             self.__SendCommand(self.axis_remote_path + "axis-remote -r")
             return 0
         except:
+            import subprocess                                                   # loaded on first use (startup time)
             return subprocess.STDOUT
 
     def AxisLoad(self, fn=None):
@@ -249,10 +627,12 @@ class sgg():  # ================================================================
 
     def WriteGcodeToStdout(self):
         """Write the gcode to stdout"""
-        sys.stdout.write(self.GetGcode())
+        self.WriteGcode(sys.stdout)
+        sys.stdout.flush()
 
     def __SendCommand(self, cmd):
         """Send a command to STDOUT"""
+        import subprocess                                                       # loaded on first use (startup time)
         return subprocess.call(cmd, shell=True)
         #return subprocess.check_output(cmd, stderr=subprocess.STDOUT, shell=True, bufsize=1024, cwd=DIR_LINUXCNC_BIN)
 
@@ -260,7 +640,7 @@ class sgg():  # ================================================================
         """Return the names of all created objects in the objectlist"""
         l = []
         for o in self.objlist:
-            l.append(o.obj.objectname)
+            l.append(o.GetName())
         return l
 
     def GetClassIndex(self, index_objlist):
@@ -0,0 +1,147 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""
+Purpose of the file:
+Simplifies runs of G01 moves of a <toolpath.Toolpath> within a chord tolerance (Douglas-Peucker).
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+The runs are the same as for the arc fitting (see <arcfit.Runs>): G01 moves with
+x and y, a known start point and the same feed rate. The distance of the points
+to the chord is measured in 3D, so e.g. the depth of a relief is preserved.
+Douglas-Peucker is done for all runs at once: each pass splits all intervals,
+whose farthest point exceeds the tolerance, with a few numpy operations. Before,
+the runs are split at their corners (see <Split>), which saves most of the passes
+for noisy paths like a relief (500k points: 0.2s instead of 1s).
+"""
+
+import numpy
+
+from . import toolpath as tp
+from . import arcfit as af
+
+VERSION = "261017"                                                              # version of this file (jjmmtt)
+
+CORNER = 2.0                                                                    # points farther than CORNER * tolerance from their neighbours are kept
+
+
+class Stats(object):  # ========================================================
+    """Result of the simplification of one nc-object"""
+
+    def __init__(self):
+        self.lines = 0                                                          # number of lines before the simplification
+        self.saved = 0                                                          # number of removed lines
+        self.deviation = 0.0                                                    # max. distance of a removed point
+
+    def Text(self):
+        """Returns the result as text, e.g. for a comment"""
+        return "Simplification: %d of %d lines saved, max. deviation %.4f" % (self.saved, self.lines, self.deviation)
+
+
+def Distances(x, y, z, s, e, inner):  # ========================================
+    """Returns the point numbers of the inner points of the segments s-e (arrays of point numbers)
+    and their squared distances to the segments"""
+    sx, sy, sz = x[s], y[s], z[s]
+    vx, vy, vz = x[e] - sx, y[e] - sy, z[e] - sz
+    vv = vx * vx + vy * vy + vz * vz
+    vv[vv == 0] = numpy.inf                                                     # closed: distance to the start point
+    vx, vy, vz = vx / vv, vy / vv, vz / vv
+    p = numpy.arange(inner.sum()) + numpy.repeat(s + 1 - numpy.cumsum(inner) + inner, inner)
+    vv = numpy.repeat(vv, inner)                                                # from now on one value per inner point
+    wx, wy, wz = x[p] - numpy.repeat(sx, inner), y[p] - numpy.repeat(sy, inner), z[p] - numpy.repeat(sz, inner)
+    t = wx * numpy.repeat(vx, inner)
+    t += wy * numpy.repeat(vy, inner)
+    t += wz * numpy.repeat(vz, inner)
+    numpy.clip(t, 0.0, 1.0, out=t)                                              # position on the segment
+    d = wx * wx + wy * wy + wz * wz
+    t *= t
+    t *= numpy.where(numpy.isinf(vv), 0.0, vv)
+    d -= t                                                                      # pythagoras
+    return p, d
+
+
+def DouglasPeucker(x, y, z, s, e, tol):  # =====================================
+    """Simplifies the polylines s[n]..e[n] of the points x, y, z.
+    Returns the intervals (first, last point), which are replaced by one move, and their max. distance."""
+    done_s, done_e, done_d = [], [], []
+    while len(s):
+        inner = e - s - 1                                                       # number of points between first and last point
+        s, e, inner = s[inner > 0], e[inner > 0], inner[inner > 0]
+        if not len(s): break
+        p, d = Distances(x, y, z, s, e, inner)
+        starts = numpy.cumsum(inner) - inner
+        dmax = numpy.maximum.reduceat(d, starts)
+        split = dmax > tol * tol
+        done_s.append(s[~split])
+        done_e.append(e[~split])
+        done_d.append(dmax[~split])
+        if not split.any(): break
+        far = numpy.flatnonzero(d == numpy.repeat(numpy.where(split, dmax, numpy.nan), inner))[::-1]  # farthest point(s) of each interval
+        k = numpy.full(len(s), -1)
+        k[numpy.searchsorted(starts, far, side="right") - 1] = p[far]          # the first one wins
+        s, e, k = s[split], e[split], k[split]
+        s, e = numpy.concatenate((s, k)), numpy.concatenate((k, e))
+    if not done_s: return numpy.zeros(0, dtype=int), numpy.zeros(0, dtype=int), numpy.zeros(0)
+    return numpy.concatenate(done_s), numpy.concatenate(done_e), numpy.sqrt(numpy.maximum(numpy.concatenate(done_d), 0.0))
+
+
+def Split(x, y, z, s, e, tol):  # ==============================================
+    """Splits the polylines s[n]..e[n] at all points, which are far from the line between
+    their neighbours (corners, noise), and returns the new intervals. Douglas-Peucker keeps
+    nearly all of these points, but it would need many passes over all points to find them."""
+    inner = e - s - 1
+    run = numpy.repeat(numpy.arange(len(s)), inner)
+    p = numpy.arange(inner.sum()) + numpy.repeat(s + 1 - numpy.cumsum(inner) + inner, inner)
+    _, d = Distances(x, y, z, p - 1, p + 1, numpy.ones(len(p), dtype=int))
+    corner = d > (CORNER * tol) ** 2
+    run = numpy.concatenate((numpy.arange(len(s)), numpy.arange(len(s)), run[corner]))
+    p = numpy.concatenate((s, e, p[corner]))
+    order = numpy.lexsort((p, run))
+    run, p = run[order], p[order]
+    same = run[1:] == run[:-1]
+    return p[:-1][same], p[1:][same]
+
+
+def Simplify(path, tol, stats=None):  # ========================================
+    """Returns a new toolpath without the points of G01 runs, which are within the tolerance.
+    The given toolpath is not modified."""
+    path = tp.FromObjects(path)
+    if stats is None: stats = Stats()
+    stats.lines += path.n
+    if path.n < 2: return path
+    (x, y, z, f, px, py, pz), runs = af.Runs(path)
+    runs = numpy.array([(a, b) for a, b in runs if b > a], dtype=int).reshape(-1, 2)
+    if not len(runs): return path
+    z0 = numpy.where(numpy.isnan(z), 0.0, z)                                    # z unknown: the run is 2D
+    s, e = Split(x, y, z0, runs[:, 0] - 1, runs[:, 1], tol)                     # the start point of a run is the end of the previous row
+    s, e, d = DouglasPeucker(x, y, z0, s, e, tol)
+    if not len(s): return path
+
+    keep = numpy.ones(path.n, dtype=bool)
+    inner = e - s - 1
+    starts = numpy.concatenate(([0], numpy.cumsum(inner)[:-1]))
+    group = numpy.repeat(numpy.arange(len(s)), inner)
+    keep[numpy.arange(len(group)) - starts[group] + s[group] + 1] = False       # the moves to the inner points are removed
+    rows = numpy.flatnonzero(keep)
+    result = path.Select(rows)
+    new = numpy.cumsum(keep) - 1                                                # new row of each kept row
+    r = new[e]
+    for w, m, v in [(tp.Z, tp.M_Z, z), (tp.F, tp.M_F, f)]:                      # a word was set by a removed move
+        has = numpy.concatenate(([0], numpy.cumsum((path.mask[:path.n] & m) > 0)))
+        changed = has[e + 1] > has[s + 1]
+        if changed.any():
+            result.values[w][r[changed]] = v[e[changed]]
+            result.mask[r[changed]] |= m
+    stats.deviation = max(stats.deviation, float(d.max()))
+    stats.saved += path.n - result.n
+    return result
@@ -0,0 +1,433 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""
+Purpose of the file:
+Provides a column oriented container for toolpaths (lists of g-code moves).
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+Instead of one instance of <gcode.G00>, <gcode.G01>, ... per move, a <Toolpath>
+stores the moves in numpy arrays: one array with the opcode, one array per word
+(x, y, z, i, j, k, p, f) and a bitmask which tells, which words are present.
+The array of a word is only created, when the word is used for the first time.
+All other g-code objects (TEXT, COMMENT, T, M, G, G83, ...) are kept as they are
+and are referenced by their row. The same applies to the comments of moves.
+
+The container behaves like the lists used by the ncclasses (append, +=, pop,
+iteration), so existing code can fill it with g-code objects. New code should
+use the methods <G00>, <G01>, <G02>, <G03>, which do not create any objects.
+"""
+
+import math
+import copy
+import numpy
+
+from . import gcode as gc
+
+VERSION = "261017"                                                              # version of this file (jjmmtt)
+
+# opcodes
+OP_G00 = 0                                                                      # rapid move
+OP_G01 = 1                                                                      # linear move
+OP_G02 = 2                                                                      # arc clockwise
+OP_G03 = 3                                                                      # arc counter clockwise
+OP_OBJECT = 255                                                                 # any other g-code object, see <Toolpath.objects>
+
+WORDS = ["X", "Y", "Z", "I", "J", "K", "P", "F"]                                # words in the order of the g-code output
+X, Y, Z, I, J, K, P, F = range(8)                                               # column index of each word
+
+# bitmask of present words
+M_X, M_Y, M_Z, M_I, M_J, M_K, M_P, M_F = [1 << n for n in range(8)]
+M_C = 1 << 8                                                                    # comment, see <Toolpath.comments>
+
+CLASSES = {OP_G00: gc.G00, OP_G01: gc.G01, OP_G02: gc.G02, OP_G03: gc.G03}      # opcode -> g-code class
+OPCODES = {gc.G00: OP_G00, gc.G01: OP_G01, gc.G02: OP_G02, gc.G03: OP_G03}      # g-code class -> opcode
+
+CAPACITY = 64                                                                   # initial number of rows
+
+
+class Toolpath(object):  # =====================================================
+    """Column oriented list of g-code moves"""
+
+    def __init__(self, objectlist=None):
+        """Initialise an empty toolpath and append the given g-code objects"""
+        self.n = 0                                                              # number of used rows
+        self.capacity = CAPACITY                                                # number of allocated rows
+        self.op = numpy.zeros(CAPACITY, dtype=numpy.uint8)                      # opcode of each row
+        self.mask = numpy.zeros(CAPACITY, dtype=numpy.uint16)                   # present words of each row
+        self.values = [None] * 8                                                # one array per word, created on first use
+        self.objects = {}                                                       # row -> g-code object (OP_OBJECT)
+        self.comments = {}                                                      # row -> comment of a move
+        if objectlist is not None:
+            self.extend(objectlist)
+
+    # --- adding moves ---------------------------------------------------------
+
+    def Reserve(self, n):
+        """Make sure, that there is room for n additional rows"""
+        need = self.n + n
+        cap = self.capacity
+        if need <= cap: return
+        while cap < need: cap *= 2
+        self.Resize(cap)
+
+    def Resize(self, cap):
+        """Change the number of allocated rows"""
+        n = self.n
+        op = numpy.zeros(cap, dtype=numpy.uint8)
+        op[:n] = self.op[:n]
+        mask = numpy.zeros(cap, dtype=numpy.uint16)
+        mask[:n] = self.mask[:n]
+        for w, v in enumerate(self.values):
+            if v is not None:
+                self.values[w] = numpy.full(cap, numpy.nan)
+                self.values[w][:n] = v[:n]
+        self.op, self.mask = op, mask
+        self.capacity = cap
+
+    def Trim(self):
+        """Release the unused rows, e.g. before the toolpath is kept for a longer time"""
+        if self.capacity > self.n: self.Resize(max(self.n, 1))
+
+    def NewColumn(self, w):
+        """Create the array for the given word"""
+        self.values[w] = numpy.full(self.capacity, numpy.nan)
+        return self.values[w]
+
+    def Move(self, op, x=None, y=None, z=None, i=None, j=None, k=None, p=None, f=None, c=None):
+        """Append a move with the given opcode"""
+        n = self.n
+        if n == self.capacity: self.Reserve(1)
+        v = self.values
+        m = 0
+        if x is not None: (v[X] if v[X] is not None else self.NewColumn(X))[n] = x; m = M_X
+        if y is not None: (v[Y] if v[Y] is not None else self.NewColumn(Y))[n] = y; m |= M_Y
+        if z is not None: (v[Z] if v[Z] is not None else self.NewColumn(Z))[n] = z; m |= M_Z
+        if i is not None: (v[I] if v[I] is not None else self.NewColumn(I))[n] = i; m |= M_I
+        if j is not None: (v[J] if v[J] is not None else self.NewColumn(J))[n] = j; m |= M_J
+        if k is not None: (v[K] if v[K] is not None else self.NewColumn(K))[n] = k; m |= M_K
+        if p is not None: (v[P] if v[P] is not None else self.NewColumn(P))[n] = p; m |= M_P
+        if f is not None: (v[F] if v[F] is not None else self.NewColumn(F))[n] = f; m |= M_F
+        if c is not None: self.comments[n] = c; m |= M_C
+        self.op[n] = op
+        self.mask[n] = m
+        self.n = n + 1
+
+    def G00(self, x=None, y=None, z=None, f=None, c=None):
+        """Append a rapid move"""
+        self.Move(OP_G00, x, y, z, None, None, None, None, f, c)
+
+    def G01(self, x=None, y=None, z=None, f=None, c=None):
+        """Append a linear move"""
+        self.Move(OP_G01, x, y, z, None, None, None, None, f, c)
+
+    def G02(self, x=None, y=None, z=None, i=None, j=None, k=None, p=None, f=None, c=None):
+        """Append a clockwise arc"""
+        self.Move(OP_G02, x, y, z, i, j, k, p, f, c)
+
+    def G03(self, x=None, y=None, z=None, i=None, j=None, k=None, p=None, f=None, c=None):
+        """Append a counter clockwise arc"""
+        self.Move(OP_G03, x, y, z, i, j, k, p, f, c)
+
+    def Object(self, o):
+        """Append any g-code object, which is not a move"""
+        if self.n == self.capacity: self.Reserve(1)
+        self.objects[self.n] = o
+        self.op[self.n] = OP_OBJECT
+        self.mask[self.n] = 0
+        self.n += 1
+
+    def Extend(self, tp):
+        """Append all rows of another toolpath"""
+        n = self.n
+        self.Reserve(tp.n)
+        self.op[n:n + tp.n] = tp.op[:tp.n]
+        self.mask[n:n + tp.n] = tp.mask[:tp.n]
+        for w, v in enumerate(tp.values):
+            if v is not None:
+                a = self.values[w]
+                if a is None: a = self.NewColumn(w)
+                a[n:n + tp.n] = v[:tp.n]
+        for r, o in tp.objects.items(): self.objects[r + n] = o
+        for r, c in tp.comments.items(): self.comments[r + n] = c
+        self.n += tp.n
+
+    # --- list adapter (used by the ncclasses) ---------------------------------
+
+    def append(self, o):
+        """Append a g-code object, moves are stored in the columns"""
+        op = OPCODES.get(o.__class__)
+        if op is None:
+            self.Object(o)
+        elif op < OP_G02:
+            self.Move(op, o.x, o.y, o.z, None, None, None, None, o.f, o.c)
+        else:
+            self.Move(op, o.x, o.y, o.z, o.i, o.j, o.k, o.p, o.f, o.c)
+
+    def extend(self, objectlist):
+        """Append a toolpath or a list of g-code objects"""
+        if isinstance(objectlist, Toolpath):
+            self.Extend(objectlist)
+        else:
+            for o in objectlist:
+                self.append(o)
+
+    def __iadd__(self, objectlist):
+        self.extend(objectlist)
+        return self
+
+    def __len__(self):
+        return self.n
+
+    def __getitem__(self, r):
+        """Returns the given row as g-code object (a new instance for moves)"""
+        if r < 0: r += self.n
+        if not 0 <= r < self.n: raise IndexError("toolpath index out of range")
+        op = int(self.op[r])
+        if op == OP_OBJECT: return self.objects[r]
+        m = int(self.mask[r])
+        kw = {}
+        for w in range(8):
+            if m & (1 << w): kw[WORDS[w].lower()] = float(self.values[w][r])
+        if m & M_C: kw["c"] = self.comments[r]
+        return CLASSES[op](**kw)
+
+    def __iter__(self):
+        for r in range(self.n):
+            yield self[r]
+
+    def pop(self, r=-1):
+        """Removes the given row and returns it as g-code object"""
+        o = self[r]
+        self.Delete(r)
+        return o
+
+    def Delete(self, r):
+        """Removes the given row"""
+        if r < 0: r += self.n
+        n = self.n
+        self.op[r:n - 1] = self.op[r + 1:n]
+        self.mask[r:n - 1] = self.mask[r + 1:n]
+        for v in self.values:
+            if v is not None:
+                v[r:n - 1] = v[r + 1:n]
+                v[n - 1] = numpy.nan
+        self.objects = ShiftRows(self.objects, r)
+        self.comments = ShiftRows(self.comments, r)
+        self.n = n - 1
+
+    # --- whole toolpath operations --------------------------------------------
+
+    def Copy(self):
+        """Returns an independent copy"""
+        return self.Slice(0, self.n)
+
+    def Slice(self, start, end):
+        """Returns an independent copy of the rows start..end"""
+        end = min(end, self.n)
+        tp = Toolpath()
+        n = max(end - start, 0)
+        tp.Reserve(n)
+        tp.op[:n] = self.op[start:end]
+        tp.mask[:n] = self.mask[start:end]
+        for w, v in enumerate(self.values):
+            if v is not None: tp.NewColumn(w)[:n] = v[start:end]
+        tp.objects = {r - start: copy.copy(o) for r, o in self.objects.items() if start <= r < end}  # AddOffset and Rotate modify the objects
+        tp.comments = {r - start: c for r, c in self.comments.items() if start <= r < end}
+        tp.n = n
+        return tp
+
+    def Select(self, rows):
+        """Returns an independent toolpath with the given rows (sorted array of row numbers)"""
+        tp = Toolpath()
+        n = len(rows)
+        tp.Reserve(n)
+        tp.op[:n] = self.op[rows]
+        tp.mask[:n] = self.mask[rows]
+        for w, v in enumerate(self.values):
+            if v is not None: tp.NewColumn(w)[:n] = v[rows]
+        new = numpy.full(self.n, -1)
+        new[rows] = numpy.arange(n)
+        tp.objects = {int(new[r]): copy.copy(o) for r, o in self.objects.items() if new[r] >= 0}
+        tp.comments = {int(new[r]): c for r, c in self.comments.items() if new[r] >= 0}
+        tp.n = n
+        return tp
+
+    def View(self, start, end):
+        """Returns the rows start..end without copying the arrays (read only, e.g. for the output)"""
+        end = min(end, self.n)
+        if start == 0 and end == self.n: return self
+        tp = Toolpath.__new__(Toolpath)
+        tp.n = tp.capacity = max(end - start, 0)
+        tp.op = self.op[start:end]
+        tp.mask = self.mask[start:end]
+        tp.values = [v[start:end] if v is not None else None for v in self.values]
+        tp.objects = {r - start: o for r, o in self.objects.items() if start <= r < end}
+        tp.comments = {r - start: c for r, c in self.comments.items() if start <= r < end}
+        return tp
+
+    def Column(self, w):
+        """Returns the values of the given word (nan if not present)"""
+        if self.values[w] is None: return numpy.full(self.n, numpy.nan)
+        return self.values[w][:self.n]
+
+    def Has(self, m):
+        """Returns a boolean array of the rows, which contain all the given words"""
+        return (self.mask[:self.n] & m) == m
+
+    def AddOffset(self, o):
+        """Adds the offset o=[x,y,z] to all moves (see <gcode.G00.AddOffset>)"""
+        for w in [X, Y, Z]:
+            if self.values[w] is not None:
+                self.values[w][:self.n] += o[w]                                 # nan + o = nan for missing words
+        for r, obj in self.objects.items():
+            try:    obj.AddOffset(o)
+            except: pass
+
+    def Rotate(self, c, d):
+        """Rotates all moves around the point c=[x,y,z] by d degrees (see <gcode.G00.Rotate>)"""
+        sin = math.sin(d * math.pi / 180.0)
+        cos = math.cos(d * math.pi / 180.0)
+        xy = self.Has(M_X | M_Y)
+        if xy.any():
+            vx, vy = self.values[X][:self.n], self.values[Y][:self.n]
+            x, y = vx[xy], vy[xy]
+            vx[xy] = c[0] + (x - c[0]) * cos - (y - c[1]) * sin + 0.0            # + 0.0: no "-0.0000", like <mu.PointRotate>
+            vy[xy] = c[1] + (x - c[0]) * sin + (y - c[1]) * cos + 0.0
+        ij = self.Has(M_I | M_J) & (self.op[:self.n] >= OP_G02) & (self.op[:self.n] <= OP_G03)
+        if ij.any():
+            vi, vj = self.values[I][:self.n], self.values[J][:self.n]
+            i, j = vi[ij], vj[ij]
+            vi[ij] = 0 + (i - 0) * cos - (j - 0) * sin + 0.0
+            vj[ij] = 0 + (i - 0) * sin + (j - 0) * cos + 0.0
+        for r, obj in self.objects.items():
+            try:    obj.Rotate(c, d)
+            except: pass
+
+    def Scale(self, sx=1, sy=1):
+        """Scales the x- and y-values of all moves, e.g. -1 to mirror"""
+        if self.values[X] is not None: self.values[X][:self.n] *= sx
+        if self.values[Y] is not None: self.values[Y][:self.n] *= sy
+        for r, obj in self.objects.items():
+            try:    obj.x = obj.x * sx
+            except: pass
+            try:    obj.y = obj.y * sy
+            except: pass
+
+    def GetGcode(self):
+        """Returns the g-code of all rows as a list of strings"""
+        return [o.GetGcode() for o in self]
+
+    @property
+    def nbytes(self):
+        """Approximate memory usage in bytes"""
+        return self.op.nbytes + self.mask.nbytes + sum(v.nbytes for v in self.values if v is not None)
+
+
+def ShiftRows(d, r):  # ========================================================
+    """Removes row r from a dictionary row -> value and moves the following rows up by one"""
+    if not d or next(reversed(d)) < r: return d                                # nothing behind the row
+    return {(k - 1 if k > r else k): v for k, v in d.items() if not k == r}
+
+
+def Blocks(objectlist, size):  # ===============================================
+    """Generator, returns toolpaths with about <size> rows, the rows of a toolpath are not copied.
+    <objectlist> may be a toolpath or any iterable (e.g. a generator) of g-code objects and toolpaths."""
+    if isinstance(objectlist, Toolpath):
+        for start in range(0, objectlist.n, size):
+            yield objectlist.View(start, start + size)
+        return
+    block = Toolpath()
+    for o in objectlist:
+        if isinstance(o, Toolpath): block.Extend(o)
+        else:                       block.append(o)
+        if block.n >= size:
+            yield block
+            block = Toolpath()
+    if block.n: yield block
+
+
+class Transform(object):  # ====================================================
+    """Placement of a toolpath: offsets and rotations combined into one affine matrix.
+    The steps are the same as the calls of <AddOffset> and <Rotate> of the g-code objects,
+    which are still used for all other g-code objects (TEXT, G83, ...)."""
+
+    def __init__(self):
+        """Initialise the identity"""
+        self.m = [1.0, 0.0, 0.0, 0.0, 1.0, 0.0]                                 # x' = m0*x + m1*y + m2, y' = m3*x + m4*y + m5
+        self.o = [0.0, 0.0, 0.0]                                                # sum of all offsets (rows without x and y)
+        self.steps = []                                                         # (method name, arguments) for other g-code objects
+
+    def AddOffset(self, o):
+        """Adds the offset o=[x,y,z]"""
+        self.m[2] += o[0]
+        self.m[5] += o[1]
+        self.o = [self.o[0] + o[0], self.o[1] + o[1], self.o[2] + o[2]]
+        self.steps.append(("AddOffset", (o,)))
+
+    def Rotate(self, c, d):
+        """Rotates around the point c=[x,y,z] by d degrees"""
+        self.steps.append(("Rotate", (c, d)))
+        if d == 0: return
+        sin = math.sin(d * math.pi / 180.0)
+        cos = math.cos(d * math.pi / 180.0)
+        a, b, e, f, g, h = self.m
+        tx = c[0] - c[0] * cos + c[1] * sin
+        ty = c[1] - c[0] * sin - c[1] * cos
+        self.m = [cos * a - sin * f, cos * b - sin * g, cos * e - sin * h + tx,
+                  sin * a + cos * f, sin * b + cos * g, sin * e + cos * h + ty]
+
+    def Apply(self, path):
+        """Returns the transformed toolpath. New arrays are only created for x, y, z, i and j,
+        all other data is shared with the given toolpath (read only, e.g. for the output)."""
+        n = path.n
+        m = self.m
+        res = Toolpath.__new__(Toolpath)
+        res.n = res.capacity = n
+        res.op = path.op[:n]
+        res.mask = path.mask[:n]
+        res.values = [v[:n] if v is not None else None for v in path.values]
+        res.comments = path.comments
+        res.objects = {}
+        for r, obj in path.objects.items():
+            obj = copy.copy(obj)                                                # do not modify the original data
+            for name, args in self.steps:
+                try:    getattr(obj, name)(*args)
+                except: pass                                                    # not all gcode objects support AddOffset and Rotate ;-)
+            res.objects[r] = obj
+        vx, vy = res.values[X], res.values[Y]
+        if vx is not None and vy is not None:
+            xy = res.Has(M_X | M_Y)                                             # only points are rotated, see <gcode.G01.Rotate>
+            res.values[X] = numpy.where(xy, m[0] * vx + m[1] * vy + m[2], vx + self.o[0])
+            res.values[Y] = numpy.where(xy, m[3] * vx + m[4] * vy + m[5], vy + self.o[1])
+        else:
+            if vx is not None: res.values[X] = vx + self.o[0]
+            if vy is not None: res.values[Y] = vy + self.o[1]
+        if res.values[Z] is not None and any(name == "AddOffset" for name, args in self.steps):
+            res.values[Z] = res.values[Z] + self.o[2]                           # also z=-0.0 -> 0.0, like <gcode.G01.AddOffset>
+        vi, vj = res.values[I], res.values[J]
+        if vi is not None and vj is not None:
+            ij = res.Has(M_I | M_J) & (res.op >= OP_G02) & (res.op <= OP_G03)   # arc centers are relative, only rotated
+            if m[0] == 1 and m[1] == 0:                                         # no rotation
+                res.values[I] = numpy.where(ij, vi + 0.0, vi)                   # + 0.0: no "-0.0000", like <mu.PointRotate>
+                res.values[J] = numpy.where(ij, vj + 0.0, vj)
+            else:
+                res.values[I] = numpy.where(ij, m[0] * vi + m[1] * vj + 0.0, vi)
+                res.values[J] = numpy.where(ij, m[3] * vi + m[4] * vj + 0.0, vj)
+        return res
+
+
+def FromObjects(objectlist):  # ================================================
+    """Returns the given list of g-code objects as toolpath"""
+    if isinstance(objectlist, Toolpath): return objectlist
+    return Toolpath(objectlist)
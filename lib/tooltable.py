@@ -24,25 +24,35 @@ Version   Author          Changes:
 """
 
 import re
-import configparser
+
+from . import settings                                                                 # parsed ini-files
 
 VERSION = "230206"                                                              # version of this file (jjmmtt)
 
 PATH = ""                                                                       # Path to the default LinuxCNC tool table
 DIR = ""                                                                        # Directory of tool tables
-TOOLTABLE = []                                                                  # List of instances of <Tool>
+# TOOLTABLE: list of instances of <Tool>, loaded on first use (see <__getattr__>)
 
 
 def Init():  # =================================================================
-    """Initialises the module"""
-    config = configparser.ConfigParser()
-    config.read('sgg.ini')
+    """Initialises the module, the tool table is loaded on first use"""
+    config = settings.Get()
     global PATH
     PATH = config.get('LINUXCNC', 'LCNC_TOOLTABLE')
     global DIR
     DIR = config.get('LINUXCNC', 'LCNC_TOOLTABLE_DIR')
-    if not LcncLoadToolTable(""):
-        print("Error loading tool table. Check path in the file <sgg.ini>.")
+    globals().pop("TOOLTABLE", None)                                            # load it again on the next use
+
+
+def __getattr__(name):  # ======================================================
+    """Loads the tool table, when <TOOLTABLE> is used the first time (PEP 562)"""
+    if name == "TOOLTABLE":
+        global TOOLTABLE
+        TOOLTABLE = []
+        if not LcncLoadToolTable(""):
+            print("Error loading tool table. Check path in the file <sgg.ini>.")
+        return TOOLTABLE
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
 
 
 class Tool(object):  # =========================================================
@@ -0,0 +1,133 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""
+Purpose of the file:
+Creates the g-code of one or many projects without the gui (batch mode)
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+Examples:
+python3 sggbatch.py part1.sgg part2.sgg                 writes part1.ngc, part2.ngc
+python3 sggbatch.py -o out/ -j 4 projects/*.sgg         4 projects in parallel
+python3 sggbatch.py -s td=3 -s Slot_1.z1=-2 part1.sgg   overrides parameters
+The settings are read from <sgg.ini> and <defaults.ini> of the application
+directory, like the gui does. A file is replaced only when its g-code is complete.
+"""
+
+import os
+import sys
+import time
+import argparse
+import multiprocessing
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))                            # directory of the ini-files
+sys.path.insert(0, APP_DIR)
+
+from lib import sgg  # import the nc-logic
+
+VERSION = "261017"  # version of this file (jjmmdd)
+TRUE = ("1", "true", "yes", "on")  # values of a boolean parameter, which mean True
+
+
+def Override(objects, spec):  # ================================================
+    """Sets a parameter of all objects: "[OBJECT.]PARAMETER=VALUE", OBJECT is an object or class name.
+    The value is converted to the type of the current value. Returns the number of changed objects."""
+    target, value = spec.split("=", 1)
+    name, parameter = target.rsplit(".", 1) if "." in target else (None, target)
+    n = 0
+    for obj in objects:
+        if name is not None and name not in (obj.objectname, obj.__class__.__name__): continue
+        if not hasattr(obj, parameter): continue
+        old = getattr(obj, parameter)
+        if isinstance(old, bool):    setattr(obj, parameter, value.lower() in TRUE)
+        elif isinstance(old, int):   setattr(obj, parameter, int(value))
+        elif isinstance(old, float): setattr(obj, parameter, float(value))
+        else:                        setattr(obj, parameter, value)
+        n += 1
+    if n == 0: raise ValueError("No object with the parameter: " + target)
+    return n
+
+
+def Build(job, s=None):  # =====================================================
+    """Creates the g-code of one project and writes it to the output file, <s> is an initialised <sgg.sgg>
+    or None. Returns (project, output, lines, characters, seconds, error message or None)."""
+    project, output, overrides, production, processes = job
+    t = time.perf_counter()
+    lines = chars = 0
+    try:
+        if s is None: s = sgg.sgg()
+        s.processes = processes
+        if production is not None: s.production = production
+        s.LoadProject(project)
+        for spec in overrides: Override([o.obj for o in s.objlist], spec)
+        with open(output + ".tmp", "w") as of:
+            for chunk in s.GetGcodeChunks():
+                of.write(chunk)
+                lines += chunk.count("\n")
+                chars += len(chunk)
+        os.replace(output + ".tmp", output)                                     # never a partly written file
+    except Exception as e:
+        try: os.remove(output + ".tmp")
+        except: pass
+        return project, output, lines, chars, time.perf_counter() - t, str(e) or e.__class__.__name__
+    return project, output, lines, chars, time.perf_counter() - t, None
+
+
+def main():  # =================================================================
+    """Reads the arguments and creates the g-code of all projects"""
+    parser = argparse.ArgumentParser(description="Creates the g-code of SimpleGcodeGenerator projects without the gui.")
+    parser.add_argument("projects", nargs="+", help="project files (*." + sgg.PROJECTFILE_EXTENSION + ")")
+    parser.add_argument("-o", "--output", help="output directory, default: the directory of each project")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1, help="number of parallel processes")
+    parser.add_argument("-s", "--set", action="append", default=[], metavar="[OBJECT.]PARAMETER=VALUE",
+                        help="override a parameter of all objects or of the objects with the given name or class")
+    parser.add_argument("-p", "--production", action="store_true", default=None, help="production output, see <sgg.ini>")
+    parser.add_argument("-q", "--quiet", action="store_true", help="print only errors")
+    args = parser.parse_args()
+
+    jobs = []
+    for project in args.projects:
+        project = os.path.abspath(project)
+        base = os.path.splitext(os.path.basename(project))[0] + "." + sgg.GCODEFILE_EXTENSION
+        output = os.path.join(os.path.abspath(args.output) if args.output else os.path.dirname(project), base)
+        processes = args.jobs if len(args.projects) == 1 else 0                  # one project: its objects in parallel
+        jobs.append((project, output, args.set, args.production, processes))
+    if args.output: os.makedirs(os.path.abspath(args.output), exist_ok=True)
+    os.chdir(APP_DIR)                                                           # the ini-files are read from here
+
+    t = time.perf_counter()
+    if len(jobs) > 1 and args.jobs > 1:
+        with multiprocessing.Pool(min(args.jobs, len(jobs))) as pool:
+            results = list(ResultsPrinted(pool.imap(Build, jobs), args.quiet))
+    else:
+        results = list(ResultsPrinted(map(Build, jobs), args.quiet))
+    errors = sum(1 for r in results if r[5] is not None)
+    if not args.quiet:
+        lines = sum(r[2] for r in results if r[5] is None)
+        chars = sum(r[3] for r in results if r[5] is None)
+        print("%d projects, %d errors, %d lines, %.1f MB in %.2fs" % (len(results), errors, lines, chars / 1e6, time.perf_counter() - t))
+    return 1 if errors else 0
+
+
+def ResultsPrinted(results, quiet):  # =========================================
+    """Generator, prints each result of <Build> and returns it"""
+    for project, output, lines, chars, seconds, error in results:
+        if error is not None:
+            print("ERROR %s: %s" % (project, error), file=sys.stderr)
+        elif not quiet:
+            print("%s -> %s: %d lines, %d characters, %.2fs" % (project, output, lines, chars, seconds))
+        yield project, output, lines, chars, seconds, error
+
+
+if __name__ == "__main__":
+    sys.exit(main())
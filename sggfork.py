@@ -0,0 +1,227 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""
+Purpose of the file:
+Warm generator process for fast command line runs (fork server) and its client
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+The server imports the nc-logic and reads the settings, tables, subroutines and
+fonts once. For each request it forks a process, which inherits all of it (copy
+on write) and creates the g-code. The client only uses the standard library, it
+sends the request over a unix socket and writes the g-code to stdout (e.g. as
+filter program of AXIS) or lets the server write the output file. Without a
+running server the client creates the g-code itself.
+
+Examples:
+python3 sggfork.py --serve &                        starts the server
+python3 sggfork.py part1.sgg > part1.ngc            g-code to stdout
+python3 sggfork.py -o part1.ngc -s td=3 part1.sgg   output file, see <sggbatch.py>
+The server reads the settings again, when <sgg.ini>, <defaults.ini> or the tool
+table has been changed. Needs a POSIX system (fork, unix sockets).
+The socket is created in $XDG_RUNTIME_DIR or in a private directory /tmp/sgg-<uid>
+(mode 0700) and only the user may connect. The client only uses a socket of the
+user in a directory, where no other user can replace it (see <Private>).
+"""
+
+import os
+import sys
+import json
+import stat
+import codecs
+import socket
+import signal
+import argparse
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))                            # directory of the ini-files
+sys.path.insert(0, APP_DIR)
+
+VERSION = "261017"  # version of this file (jjmmdd)
+RUNTIME_DIR = os.environ.get("XDG_RUNTIME_DIR") or "/tmp/sgg-%d" % os.getuid()  # directory of the socket, only the user may write
+SOCKET = os.path.join(RUNTIME_DIR, "sgg.sock")  # default socket
+FILES = ("sgg.ini", "defaults.ini")  # settings, which are watched by the server
+BLOCKSIZE = 65536  # size of the received blocks (bytes)
+ERROR = b"\0"  # follows the sent g-code, if the generation failed, then the error message
+
+
+def Warm():  # =================================================================
+    """Returns an initialised <sgg.sgg> and loads all data, which is inherited by the forked processes"""
+    import glob
+    from lib import sgg, settings, tooltable, counterbore, feedsnspeeds, ngcsub, font2vector, ncclasses
+    settings.Reload()
+    s = sgg.sgg()
+    tooltable.TOOLTABLE, counterbore.TABLES, feedsnspeeds.TABLES, ngcsub.SUBROUTINES  # loaded on first use
+    arcres = ncclasses.Text().arcres
+    for fn in glob.glob(os.path.join(font2vector.DIR, "*.cxf")):
+        font2vector.LoadFont(fn, arcres)  # parsed fonts are kept, see <font2vector.FONTS>
+    return s
+
+
+def Stamp():  # ================================================================
+    """Returns the modification times of the settings and of the tool table"""
+    from lib import tooltable
+    stamp = []
+    for fn in FILES + (tooltable.PATH,):
+        try:    stamp.append(os.path.getmtime(fn))
+        except: stamp.append(None)
+    return stamp
+
+
+def Answer(request, s):  # =====================================================
+    """Loads the project of the request, <s> is an initialised <sgg.sgg> or None.
+    Returns (answer, chunks), the chunks of the g-code are created while they are read.
+    There are no chunks, if the g-code is written to the output file."""
+    import sggbatch
+    from lib import sgg
+    if request.get("output"):
+        job = (request["project"], request["output"], request.get("set", []), request.get("production"), 0)
+        project, output, lines, chars, seconds, error = sggbatch.Build(job, s)
+        return {"error": error, "lines": lines, "characters": chars, "seconds": seconds}, []
+    try:
+        if s is None: s = sgg.sgg()
+        if request.get("production") is not None: s.production = request["production"]
+        s.LoadProject(request["project"])
+        for spec in request.get("set", []): sggbatch.Override([o.obj for o in s.objlist], spec)
+    except Exception as e:
+        return {"error": str(e) or e.__class__.__name__}, []
+    return {"error": None}, s.GetGcodeChunks()
+
+
+def Private(path):  # ==========================================================
+    """Returns True, if the file belongs to the user and no other user can replace it (owner and mode of the directory)"""
+    st, dst = os.stat(path), os.stat(os.path.dirname(os.path.abspath(path)))
+    if not st.st_uid == os.getuid(): return False
+    if not dst.st_uid in (os.getuid(), 0): return False  # e.g. a directory of another user with the same name
+    return not dst.st_mode & (stat.S_IWGRP | stat.S_IWOTH) or bool(dst.st_mode & stat.S_ISVTX)  # e.g. /tmp
+
+
+def Handle(conn, s):  # ========================================================
+    """Runs in the forked process: reads the request, sends the answer and then the g-code block by block"""
+    request = json.loads(conn.makefile("rb").readline().decode("utf-8"))
+    answer, chunks = Answer(request, s)
+    conn.sendall(json.dumps(answer).encode("utf-8") + b"\n")
+    try:
+        for chunk in chunks: conn.sendall(chunk.encode("utf-8"))
+    except Exception as e:
+        conn.sendall(ERROR + (str(e) or e.__class__.__name__).encode("utf-8"))
+
+
+def Serve(path):  # ============================================================
+    """Runs the server until it is stopped, one forked process per request"""
+    os.chdir(APP_DIR)  # the ini-files are read from here
+    s, stamp = Warm(), Stamp()
+    os.makedirs(os.path.dirname(os.path.abspath(path)), 0o700, exist_ok=True)
+    try: os.remove(path)  # left by a stopped server
+    except FileNotFoundError: pass
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    umask = os.umask(0o177)  # only the user may connect, already while binding
+    try:     server.bind(path)
+    finally: os.umask(umask)
+    if not Private(path):
+        server.close()
+        os.remove(path)
+        raise SystemExit("The directory of the socket may be changed by other users: " + os.path.dirname(os.path.abspath(path)))
+    server.listen(16)
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)  # finished processes are removed by the system
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))  # remove the socket on kill
+    print("SimpleGcodeGenerator fork server on " + path)
+    sys.stdout.flush()
+    try:
+        while True:
+            conn, _ = server.accept()
+            if Stamp() != stamp: s, stamp = Warm(), Stamp()  # settings changed
+            if os.fork() == 0:
+                signal.signal(signal.SIGCHLD, signal.SIG_DFL)  # e.g. for the parallel generation
+                server.close()
+                code = 0
+                try:    Handle(conn, s)
+                except: code = 1
+                finally:
+                    conn.close()
+                    os._exit(code)  # never return into the loop of the server
+            conn.close()
+    finally:
+        server.close()
+        try: os.remove(path)
+        except: pass
+
+
+def Request(path, request, out):  # ============================================
+    """Sends the request to the server and writes the g-code to <out>, as it is received.
+    Returns the answer or None, if no server is running."""
+    try:
+        if not Private(path): return {"error": "The socket %s belongs to another user or may be replaced by one" % path}
+    except OSError:
+        return None
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(path)
+    except OSError:
+        client.close()
+        return None
+    with client:
+        client.sendall(json.dumps(request).encode("utf-8") + b"\n")
+        reader = client.makefile("rb")
+        header = reader.readline()
+        if not header: return {"error": "No answer from the server"}
+        answer = json.loads(header.decode("utf-8"))
+        decoder = codecs.getincrementaldecoder("utf-8")()  # a character may be split between two blocks
+        while True:
+            block = reader.read1(BLOCKSIZE)
+            if not block: break
+            block, error, message = block.partition(ERROR)
+            out.write(decoder.decode(block))
+            if error:
+                answer = {"error": (message + reader.read()).decode("utf-8", "replace")}
+                break
+        out.write(decoder.decode(b"", True))
+    return answer
+
+
+def main():  # =================================================================
+    """Reads the arguments, starts the server or sends a request"""
+    parser = argparse.ArgumentParser(description="Fork server of SimpleGcodeGenerator for fast command line runs and its client.")
+    parser.add_argument("project", nargs="?", help="project file, the g-code is written to stdout")
+    parser.add_argument("--serve", action="store_true", help="start the server")
+    parser.add_argument("--socket", default=SOCKET, help="path of the unix socket, default: " + SOCKET)
+    parser.add_argument("-o", "--output", help="output file instead of stdout")
+    parser.add_argument("-s", "--set", action="append", default=[], metavar="[OBJECT.]PARAMETER=VALUE",
+                        help="override a parameter of all objects or of the objects with the given name or class")
+    parser.add_argument("-p", "--production", action="store_true", default=None, help="production output, see <sgg.ini>")
+    args = parser.parse_args()
+    if args.serve:
+        try:
+            Serve(args.socket)
+        except KeyboardInterrupt:
+            pass
+        return 0
+    if not args.project: parser.error("a project file is required")
+
+    request = {"project": os.path.abspath(args.project), "output": os.path.abspath(args.output) if args.output else None,
+               "set": args.set, "production": args.production}
+    answer = Request(args.socket, request, sys.stdout)
+    if answer is None:  # no server, create the g-code in this process
+        os.chdir(APP_DIR)
+        answer, chunks = Answer(request, None)
+        try:
+            for chunk in chunks: sys.stdout.write(chunk)
+        except Exception as e:
+            answer = {"error": str(e) or e.__class__.__name__}
+    if answer["error"] is not None:
+        print("ERROR %s: %s" % (request["project"], answer["error"]), file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
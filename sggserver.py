@@ -0,0 +1,262 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""
+Purpose of the file:
+Local HTTP service, which creates g-code for other programs (e.g. a MES)
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+Requests:
+GET  /health      {"status": "ok", "queued": n, "running": n}
+GET  /metrics     number of requests, errors, lines, bytes, throughput (JSON)
+POST /generate    body: a project file (*.sgg, Content-Type: application/zip) or a JSON object
+                  (Content-Type: application/json)
+                  {"production": false, "objects": [{"class": "PocketRectangle", "parameters": {"a": 20, ...}}, ...]}
+                  the objects are placed between the default preamble and postamble
+                  answer: the g-code (text/plain, chunked)
+The g-code is created by a pool of processes. A full queue is answered with 503.
+The g-code is written to a temporary file by the process and then sent block by
+block, the next block is sent when the client has read the previous one.
+The service listens on 127.0.0.1 or a unix socket only, there is no authentication.
+Other content types (e.g. text/plain or a form of a web page) are answered with 415,
+so a browser does not send requests of other web sites without asking the service
+first (CORS preflight, which is not answered). Project files are only accepted in
+the zip format, nothing of a request is unpickled and no fonts or images named by
+the request are read (see <projectfile.Load>).
+
+Example: curl -H "Content-Type: application/zip" --data-binary @part1.sgg http://127.0.0.1:8765/generate
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+import concurrent.futures
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))                            # directory of the ini-files
+sys.path.insert(0, APP_DIR)
+
+from lib import sgg  # import the nc-logic
+from lib import projectfile  # nc-classes by name
+
+VERSION = "261017"  # version of this file (jjmmdd)
+HOST = "127.0.0.1"  # only local clients
+PORT = 8765  # default port
+QUEUE = 32  # max. number of waiting and running requests
+MAX_BODY = 64000000  # max. size of a request (bytes)
+BLOCKSIZE = 65536  # size of the blocks sent to the client (bytes)
+STATUS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+          413: "Payload Too Large", 415: "Unsupported Media Type", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+class Metrics(object):  # ======================================================
+    """Counters of the service"""
+
+    def __init__(self):
+        self.start = time.time()  # start of the service
+        self.requests = 0  # number of generate requests
+        self.completed = 0  # number of sent programs
+        self.errors = 0  # number of failed requests
+        self.rejected = 0  # number of requests rejected because of a full queue
+        self.unsupported = 0  # number of requests with a wrong content type, not counted as requests
+        self.queued = 0  # number of waiting requests
+        self.running = 0  # number of requests in process
+        self.lines = 0  # number of sent lines
+        self.bytes = 0  # number of sent bytes
+        self.seconds = 0.0  # sum of the generation times (s)
+
+    def Data(self):
+        """Returns the counters and the throughput as a dictionary"""
+        d = dict(vars(self))
+        d["uptime"] = time.time() - self.start
+        d["lines_per_second"] = self.lines / self.seconds if self.seconds else 0.0
+        d["programs_per_minute"] = self.completed * 60 / d["uptime"] if d["uptime"] else 0.0
+        del d["start"]
+        return d
+
+
+def WorkerInit():  # ===========================================================
+    """Initialises a process of the pool"""
+    os.chdir(APP_DIR)  # the ini-files are read from here
+
+
+def Work(body, json_request, filename):  # =====================================
+    """Creates the g-code of a project file or a JSON request and writes it to the file.
+    Runs in a process of the pool, returns (lines, seconds)."""
+    t = time.perf_counter()
+    s = sgg.sgg()
+    if json_request:
+        request = json.loads(body.decode("utf-8"))
+        if "production" in request: s.production = bool(request["production"])
+        for spec in request.get("objects", []):
+            if spec.get("class") not in projectfile.CLASSES: raise ValueError("Unknown class %s" % spec.get("class"))
+            obj = projectfile.CLASSES[spec["class"]]()
+            for name, value in spec.get("parameters", {}).items():
+                if not hasattr(obj, name): raise ValueError("Unknown parameter %s of %s" % (name, spec["class"]))
+                setattr(obj, name, value)
+            s.objlist.insert(len(s.objlist) - 1, sgg.ncobject(obj))  # before the postamble
+    else:
+        with open(filename, "wb") as f:
+            f.write(body)
+        s.LoadProject(filename, pickled=False)  # no code of the client is run
+    s.fn_project = "request." + sgg.PROJECTFILE_EXTENSION  # not the name of the temporary file
+    lines = 0
+    with open(filename + ".ngc", "w") as of:
+        for chunk in s.GetGcodeChunks():
+            of.write(chunk)
+            lines += chunk.count("\n")
+    os.replace(filename + ".ngc", filename)
+    return lines, time.perf_counter() - t
+
+
+class Service(object):  # ======================================================
+    """HTTP front end, one request per connection"""
+
+    def __init__(self, workers, queue):
+        self.pool = concurrent.futures.ProcessPoolExecutor(workers, initializer=WorkerInit)
+        self.queue = queue  # max. number of waiting and running requests
+        self.slots = asyncio.Semaphore(workers)  # number of free processes
+        self.metrics = Metrics()
+
+    async def Handle(self, reader, writer):
+        """Reads one request and sends the answer"""
+        try:
+            method, path, headers, body = await self.ReadRequest(reader)
+            if path == "/health" and method == "GET":
+                await self.SendJson(writer, 200, {"status": "ok", "queued": self.metrics.queued, "running": self.metrics.running})
+            elif path == "/metrics" and method == "GET":
+                await self.SendJson(writer, 200, self.metrics.Data())
+            elif path == "/generate":
+                if method != "POST": await self.SendJson(writer, 405, {"error": "use POST"})
+                else:                await self.Generate(writer, headers, body)
+            else:
+                await self.SendJson(writer, 404, {"error": "unknown path " + path})
+        except HttpError as e:
+            await self.SendJson(writer, e.status, {"error": e.message})
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass  # client has gone
+        finally:
+            try:
+                writer.close()
+                await writer.wait_closed()
+            except: pass
+
+    async def ReadRequest(self, reader):
+        """Returns method, path, headers and body of the request"""
+        line = (await reader.readline()).decode("latin-1").split()
+        if len(line) < 2: raise HttpError(400, "bad request line")
+        headers = {}
+        while True:
+            h = (await reader.readline()).decode("latin-1").strip()
+            if not h: break
+            k, _, v = h.partition(":")
+            headers[k.strip().lower()] = v.strip()
+        length = int(headers.get("content-length", "0") or 0)
+        if length > MAX_BODY: raise HttpError(413, "request too large")
+        body = await reader.readexactly(length) if length else b""
+        return line[0].upper(), line[1].split("?")[0], headers, body
+
+    async def Generate(self, writer, headers, body):
+        """Creates the g-code in the pool and sends it block by block"""
+        content_type = headers.get("content-type", "").split(";")[0].strip().lower()
+        if content_type not in ("application/json", "application/zip"):
+            self.metrics.unsupported += 1
+            raise HttpError(415, "use Content-Type application/json or application/zip")
+        self.metrics.requests += 1
+        if self.metrics.queued + self.metrics.running >= self.queue:
+            self.metrics.rejected += 1
+            raise HttpError(503, "queue is full")
+        json_request = content_type == "application/json"
+        fd, filename = tempfile.mkstemp(suffix="." + sgg.PROJECTFILE_EXTENSION)
+        os.close(fd)
+        try:
+            self.metrics.queued += 1
+            async with self.slots:
+                self.metrics.queued -= 1
+                self.metrics.running += 1
+                try:
+                    lines, seconds = await asyncio.get_running_loop().run_in_executor(self.pool, Work, body, json_request, filename)
+                except Exception as e:
+                    self.metrics.errors += 1
+                    raise HttpError(400 if isinstance(e, (ValueError, KeyError)) else 500, str(e) or e.__class__.__name__)
+                finally:
+                    self.metrics.running -= 1
+            self.metrics.seconds += seconds
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/plain; charset=utf-8\r\n"
+                         b"Transfer-Encoding: chunked\r\nConnection: close\r\n\r\n")
+            with open(filename, "rb") as f:
+                while True:
+                    block = f.read(BLOCKSIZE)
+                    if not block: break
+                    writer.write(b"%x\r\n%s\r\n" % (len(block), block))
+                    await writer.drain()  # backpressure: wait until the client reads
+                    self.metrics.bytes += len(block)
+            writer.write(b"0\r\n\r\n")
+            await writer.drain()
+            self.metrics.lines += lines
+            self.metrics.completed += 1
+        finally:
+            try: os.remove(filename)
+            except: pass
+
+    async def SendJson(self, writer, status, data):
+        """Sends a JSON answer"""
+        body = json.dumps(data).encode("utf-8")
+        writer.write(b"HTTP/1.1 %d %s\r\nContent-Type: application/json\r\nContent-Length: %d\r\nConnection: close\r\n\r\n"
+                     % (status, STATUS[status].encode("ascii"), len(body)) + body)
+        await writer.drain()
+
+
+class HttpError(Exception):  # =================================================
+    """Error answered with a status code"""
+
+    def __init__(self, status, message):
+        super(HttpError, self).__init__(message)
+        self.status = status
+        self.message = message
+
+
+async def Serve(args):  # ======================================================
+    """Starts the service and runs until it is stopped"""
+    service = Service(args.workers, args.queue)
+    if args.unix: server = await asyncio.start_unix_server(service.Handle, path=args.unix)
+    else:         server = await asyncio.start_server(service.Handle, HOST, args.port)
+    print("SimpleGcodeGenerator service on " + (args.unix or "http://%s:%d" % (HOST, args.port)))
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.pool.shutdown(cancel_futures=True)
+
+
+def main():  # =================================================================
+    """Reads the arguments and starts the service"""
+    parser = argparse.ArgumentParser(description="Local HTTP service, which creates g-code of SimpleGcodeGenerator projects.")
+    parser.add_argument("--port", type=int, default=PORT, help="port on 127.0.0.1")
+    parser.add_argument("--unix", help="path of a unix socket instead of the port")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="number of processes")
+    parser.add_argument("--queue", type=int, default=QUEUE, help="max. number of waiting and running requests")
+    args = parser.parse_args()
+    os.chdir(APP_DIR)
+    try:
+        asyncio.run(Serve(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
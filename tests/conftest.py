@@ -0,0 +1,126 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""
+Purpose of the file:
+Common fixtures of the tests: the program directory, a project with one object of each nc-class
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+The tests run in the program directory (the ini-files are read from there) without
+the disk cache. <data/default.ngc> and <data/placed.ngc> are the outputs of <Build>
+created by the program before the toolpath and formatter changes (version 230206).
+"""
+
+import os
+import sys
+import math
+import datetime
+import pytest
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))           # program directory
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")     # fonts, images and reference outputs
+sys.path.insert(0, APP_DIR)
+
+
+@pytest.fixture(autouse=True)
+def app_dir(monkeypatch):
+    """Runs each test in the program directory"""
+    monkeypatch.chdir(APP_DIR)
+
+
+@pytest.fixture
+def project():
+    """Returns a function, which creates a new project (see <Project>)"""
+    return Project
+
+
+def Project(placed=False):  # ==================================================
+    """Returns an <sgg.sgg> with one object of each nc-class (without <Subroutine>), the results are not cached.
+    With <placed> the objects are moved and rotated."""
+    from lib import sgg, ncclasses, resultcache
+    for c in ncclasses.NCCLASSES: c.i = 0                                       # the names of the objects are counted per class
+    s = sgg.sgg()
+    resultcache.DISK.directory = ""                                             # no files of other runs
+    resultcache.CACHE.Clear()
+    s.processes = 1
+    Build(s, ncclasses.NCCLASSES, placed)
+    return s
+
+
+def Build(s, classes, placed=False):  # ========================================
+    """Appends one object of each nc-class to the project, also used to create the reference outputs"""
+    for i, c in enumerate(classes):
+        if c.name in ("Subroutine",): continue                                  # needs the subroutines of the user
+        o = s.ObjectCreate(i, len(s.objlist) - 1)
+        if placed and hasattr(o, "posx"):
+            o.posx, o.posy, o.rx, o.ry, o.deg = 3.5, -2.25, 1, 2, 30
+        if placed and hasattr(o, "rsdeg"):
+            o.rsdeg, o.rsx = 15, 1
+        if c.name == "OutlinePolygon":
+            for p in [(0, 0), (10, 0), (10, 5), (3, 7)]:
+                o.x, o.y = p
+                o.AddG01()
+        if c.name == "Text":
+            o.LoadFont(os.path.join(DATA_DIR, "test.cxf"))
+            o.text = "AB\nC"
+        if placed and c.name == "Grill": o.peck = True
+        if c.name == "Relief":
+            o.LoadImage(os.path.join(DATA_DIR, "test.gif"))
+
+
+def Output(s):  # ==============================================================
+    """Returns the g-code of the project without the date"""
+    return s.GetGcode().replace(str(datetime.date.today()), "DATE")
+
+
+def Reference(name):  # ========================================================
+    """Returns the content of a reference output in <data>"""
+    with open(os.path.join(DATA_DIR, name)) as f:
+        return f.read()
+
+
+def Track(path):  # ============================================================
+    """Returns the moves of a toolpath as a list of (start, end, center or None, ccw), the points are (x, y, z)"""
+    moves, p = [], None
+    for r in range(len(path)):
+        o = path[r]
+        if not hasattr(o, "x"): continue
+        q = tuple(v if v is not None else (p[i] if p else 0.0) for i, v in enumerate((o.x, o.y, o.z)))
+        if p is not None and o.name in ("G01", "G02", "G03"):
+            center = (p[0] + o.i, p[1] + o.j) if o.name in ("G02", "G03") else None
+            moves.append((p, q, center, o.name == "G03"))
+        p = q
+    return moves
+
+
+def Distance(point, moves):  # =================================================
+    """Returns the distance of the point to the nearest move (arcs in the xy-plane with a linear z)"""
+    best = float("inf")
+    for a, b, center, ccw in moves:
+        if center is None:
+            d = [b[i] - a[i] for i in range(3)]
+            dd = sum(v * v for v in d)
+            t = 0.0 if dd == 0 else max(0.0, min(1.0, sum((point[i] - a[i]) * d[i] for i in range(3)) / dd))
+            best = min(best, math.dist(point, [a[i] + t * d[i] for i in range(3)]))
+            continue
+        r = math.hypot(a[0] - center[0], a[1] - center[1])
+        start = math.atan2(a[1] - center[1], a[0] - center[0])
+        sweep = math.atan2(b[1] - center[1], b[0] - center[0]) - start
+        angle = math.atan2(point[1] - center[1], point[0] - center[0]) - start
+        if ccw: t = (angle % (2 * math.pi)) / (sweep % (2 * math.pi) or 2 * math.pi)
+        else:   t = (-angle % (2 * math.pi)) / (-sweep % (2 * math.pi) or 2 * math.pi)
+        if 0 <= t <= 1:
+            z = a[2] + t * (b[2] - a[2])
+            best = min(best, math.hypot(math.hypot(point[0] - center[0], point[1] - center[1]) - r, point[2] - z))
+        best = min(best, math.dist(point, a), math.dist(point, b))
+    return best
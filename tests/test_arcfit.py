@@ -0,0 +1,124 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""
+Purpose of the file:
+Tests of the arc fitting: tolerance, end points and unchanged rows
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import math
+import random
+import pytest
+
+from lib import gcode as gc
+from lib import arcfit as af
+from lib import formatter as fmt
+from lib import toolpath as tp
+
+from conftest import Track, Distance
+
+TOL = 0.01                                                                      # tolerance of the tests (mm)
+
+
+def Polyline(rnd):  # ==========================================================
+    """Returns G01 moves along arcs of random radius and direction, lines and corners, with noise below the tolerance"""
+    x, y, z = rnd.uniform(-50, 50), rnd.uniform(-50, 50), -1.0
+    ol = [gc.G00(x, y, z)]
+    h = rnd.uniform(0, 2 * math.pi)
+    for _ in range(rnd.randint(1, 6)):
+        n = rnd.randint(2, 60)
+        if rnd.random() < 0.6:                                                  # arc
+            r = rnd.uniform(0.5, 200)
+            turn = rnd.choice([-1, 1]) * rnd.uniform(0.1, 1.5 * math.pi) / n
+            cx, cy = x - r * math.sin(h) * -turn / abs(turn), y + r * math.cos(h) * turn / abs(turn)
+            a = math.atan2(y - cy, x - cx)
+            for k in range(1, n + 1):
+                x = cx + r * math.cos(a + k * turn) + rnd.uniform(-TOL, TOL) / 4
+                y = cy + r * math.sin(a + k * turn) + rnd.uniform(-TOL, TOL) / 4
+                ol.append(gc.G01(x, y, z, 300))
+            h += n * turn
+        else:                                                                   # line
+            step = rnd.uniform(0.05, 5)
+            for k in range(n):
+                x, y = x + step * math.cos(h), y + step * math.sin(h)
+                ol.append(gc.G01(x + rnd.uniform(-TOL, TOL) / 4, y + rnd.uniform(-TOL, TOL) / 4, z, 300))
+        h += rnd.uniform(-2, 2)                                                 # corner
+    return ol
+
+
+def Check(ol, fitted, tol):  # =================================================
+    """All points and midpoints of the moves are within the tolerance of the fitted path, the last point is kept"""
+    original, moves = Track(tp.Toolpath(ol)), Track(fitted)
+    for a, b, center, ccw in original:
+        for p in (b, tuple((a[i] + b[i]) / 2 for i in range(3))):
+            assert Distance(p, moves) <= tol * 1.001
+    assert moves[-1][1] == pytest.approx(original[-1][1], abs=1e-9)
+    assert len(fitted) <= len(ol)
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_tolerance(seed):
+    """The arcs and lines are within the tolerance"""
+    rnd = random.Random(seed)
+    ol = Polyline(rnd)
+    stats = af.Stats()
+    fitted = af.Fit(ol, TOL, stats)
+    Check(ol, fitted, TOL)
+    assert stats.lines == len(ol)
+
+
+def test_circle():
+    """The points of a circle are replaced by few arcs with the center of the circle"""
+    ol = [gc.G00(10, 0, -1)] + [gc.G01(10 * math.cos(a / 20), 10 * math.sin(a / 20), -1, 100) for a in range(1, 120)]
+    fitted = af.Fit(ol, TOL)
+    Check(ol, fitted, TOL)
+    arcs = [fitted[r] for r in range(len(fitted)) if fitted[r].name == "G03"]
+    assert 1 <= len(arcs) <= 2 and len(fitted) <= 3
+    assert (arcs[0].i, arcs[0].j) == pytest.approx((-10, 0), abs=TOL)
+
+
+def test_helix():
+    """A ramp along an arc becomes a helix, z changes linearly"""
+    ol = [gc.G00(10, 0, 0)] + [gc.G01(10 * math.cos(a / 20), 10 * math.sin(a / 20), -a / 40, 100) for a in range(1, 60)]
+    fitted = af.Fit(ol, TOL)
+    Check(ol, fitted, TOL)
+    assert len(fitted) < 5
+
+
+def test_unchanged():
+    """Rapid moves, other feed rates and other g-code objects are kept, the given toolpath is not modified"""
+    ol = [gc.G00(0, 0, 5), gc.COMMENT("start"), gc.G01(1, 0, 0, 100), gc.G01(2, 0, 0, 200), gc.G00(3, 0, 0),
+          gc.M(5), gc.G01(4, 1, 0, 100)]
+    path = tp.Toolpath(ol)
+    before = fmt.Format(path)
+    assert fmt.Format(af.Fit(path, TOL)) == before
+    assert fmt.Format(path) == before
+
+
+def test_collinear():
+    """Collinear points are combined into one G01 move"""
+    ol = [gc.G00(0, 0, 0)] + [gc.G01(x * 0.5, x * 0.25, 0, 100) for x in range(1, 50)]
+    fitted = af.Fit(ol, TOL)
+    Check(ol, fitted, TOL)
+    assert len(fitted) == 2
+
+
+def test_plane(project):
+    """Arc fitting is skipped outside the xy-plane"""
+    s = project()
+    o = [o.obj for o in s.objlist if o.obj.name == "OutlineCircle"][0]
+    o.arcfit = True
+    o.plane = 1
+    o.preamble_plane = True
+    assert "Arc fitting skipped" in "".join(s.GetGcodeChunks())
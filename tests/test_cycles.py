@@ -0,0 +1,71 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""
+Purpose of the file:
+Tests of the drilling with canned cycles (G81, G83, G73) and the ordering of the holes
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import pytest
+
+from lib import toolpath as tp
+
+CYCLES = {0: "G81", 1: "G83", 2: "G73"}                                         # peck -> canned cycle
+
+
+def Drilling(s, name):  # ======================================================
+    """Returns the nc-object of the class <name> of the project"""
+    return [o.obj for o in s.objlist if o.obj.name == name][0]
+
+
+@pytest.mark.parametrize("name", ["Grill", "DrillMatrix"])
+@pytest.mark.parametrize("peck", [0, 1, 2])
+@pytest.mark.parametrize("retract", [0, 1])
+def test_cycle(project, name, peck, retract):
+    """One cycle with the R-plane at z0 + zsh0 drills the same holes in the same order as the single moves"""
+    o = Drilling(project(), name)
+    o.peck = peck
+    single = [(p.x, p.y) for p in o.Update() if p.name == "G00" and p.x is not None and p.y is not None][1:]  # without the start point
+    o.cycle, o.retract = True, retract
+    ol = o.Update()
+    names = [p.name for p in ol]
+    first = names.index(CYCLES[peck])
+    assert ol[first - 1].name == "G" and ol[first - 1].GetGcode().startswith("G%d" % (98 if retract == 0 else 99))
+    assert ol[first].r == o.z0 + o.zsh0 and ol[first].z == o.z1
+    assert names[first + 1:first + len(single)] == ["XY"] * (len(single) - 1)
+    assert ol[first + len(single)].GetGcode().startswith("G80")
+    assert [(p.x, p.y) for p in ol[first:first + len(single)]] == single
+    assert len("\n".join(p.GetGcode() for p in o.DrillCycle(single))) < len("\n".join(p.GetGcode() for p in o.Drill(single)))
+
+
+def test_posz(project):
+    """The placement moves the R-plane and the depth of the cycle with posz"""
+    o = Drilling(project(), "DrillMatrix")
+    o.cycle, o.posz = True, 2.5
+    path = o.GetTransform().Apply(tp.Toolpath(o.Update()))
+    cycle = [path[r] for r in range(len(path)) if path[r].name == "G81"][0]
+    assert cycle.r == pytest.approx(o.z0 + o.zsh0 + 2.5)
+    assert cycle.z == pytest.approx(o.z1 + 2.5)
+
+
+def test_output(project):
+    """The whole project with cycles and ordered holes is written without errors, the default output has no cycles"""
+    s = project(True)
+    assert "G80" not in s.GetGcode()
+    s = project(True)
+    for name in ("Grill", "DrillMatrix"):
+        o = Drilling(s, name)
+        o.cycle = o.order = True
+    text = s.GetGcode()
+    assert text.count("G80") == 2 and "Order (" in text
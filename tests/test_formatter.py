@@ -0,0 +1,95 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""
+Purpose of the file:
+Tests of the vectorized formatter against the g-code of the single g-code objects
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import random
+import pytest
+
+from lib import gcode as gc
+from lib import toolpath as tp
+from lib import formatter as fmt
+
+SPECIAL = [0.0, -0.0, 1e-9, -1e-9, 0.00005, -0.00005, 0.99995, -0.99995, 123456.78905, 1e15, -1e17, 1e30,
+           float("nan"), float("inf"), float("-inf")]                           # rounding, sign and python formatted values
+
+
+def Value(rnd):  # =============================================================
+    """Returns a random coordinate, sometimes a special value"""
+    if rnd.random() < 0.2: return rnd.choice(SPECIAL)
+    return round(rnd.uniform(-500, 500), rnd.randint(0, 7))
+
+
+def Objects(rnd, n):  # ========================================================
+    """Returns a random list of g-code objects, as created by the nc-classes"""
+    ol = []
+    for _ in range(n):
+        k = rnd.randint(0, 6)
+        w = dict((a, Value(rnd) if rnd.random() < 0.6 else None) for a in "xyzf")
+        c = rnd.choice([None, None, "comment", "with ( brackets )"])
+        if k == 0:   ol.append(gc.G00(w["x"], w["y"], w["z"], c=c))
+        elif k == 1: ol.append(gc.G01(w["x"], w["y"], w["z"], w["f"], c=c))
+        elif k == 2: ol.append(gc.G02(w["x"], w["y"], w["z"], Value(rnd), Value(rnd), f=w["f"], c=c))
+        elif k == 3: ol.append(gc.G03(w["x"], w["y"], w["z"], Value(rnd), Value(rnd), p=rnd.choice([None, 2]), f=w["f"], c=c))
+        elif k == 4: ol.append(gc.COMMENT("text %d" % rnd.randint(0, 99)))
+        elif k == 5: ol.append(gc.G83(w["x"], w["y"], Value(rnd), r=Value(rnd), q=1.0, f=w["f"]))
+        else:        ol.append(gc.M(rnd.choice([3, 5, 8])))
+    return ol
+
+
+def Reference(ol):  # ==========================================================
+    """Returns the g-code of the objects one by one (the output before the formatter)"""
+    return "".join(o.GetGcode() + "\n" for o in ol)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_random(seed):
+    """The formatter writes the same text as the g-code objects"""
+    rnd = random.Random(seed)
+    ol = Objects(rnd, rnd.randint(1, 300))
+    assert fmt.Format(tp.Toolpath(ol)).decode("utf-8") == Reference(ol)
+
+
+@pytest.mark.parametrize("v", SPECIAL)
+def test_special(v):
+    """Special values in every word and next to other words (no digits of a longer placeholder are left)"""
+    ol = [gc.G01(v, 1.5, v, v), gc.G02(v, -v, 2.0, v, v, f=100), gc.G00(z=v), gc.COMMENT("next")]
+    assert fmt.Format(tp.Toolpath(ol)).decode("utf-8") == Reference(ol)
+
+
+def test_blocks():
+    """The g-code of the blocks is the g-code of the whole toolpath"""
+    ol = Objects(random.Random(1), 1000)
+    path = tp.Toolpath(ol)
+    assert b"".join(fmt.FormatBlocks(path, 64)) == fmt.Format(path)
+    assert "".join(fmt.Format(b).decode("utf-8") for b in tp.Blocks(ol, 100)) == Reference(ol)
+    assert fmt.Format(path, 10, 20).decode("utf-8") == Reference(ol[10:20])
+    assert fmt.Format(tp.Toolpath()) == b""
+
+
+def test_modal():
+    """The production output only leaves out words, which keep their value"""
+    ol = [gc.G00(x=1, y=2, z=5), gc.G01(z=-1, f=100), gc.G01(x=3, f=100), gc.G01(x=3, y=4, f=100),
+          gc.M(6), gc.G01(x=3, y=4, f=100), gc.G(91), gc.G01(x=1, f=100), gc.G(90), gc.G01(x=5, f=100)]
+    modal = fmt.Modal()
+    text = fmt.Format(tp.Toolpath(ol), modal=modal).decode("utf-8")
+    assert text.splitlines() == ["G00 X1 Y2 Z5", "G01 Z-1 F100", "X3", "Y4", "M6", "G01 X3 Y4 F100",
+                                 "G91", "G01 X1 F100", "G90", "G01 X5 F100"]
+    state = modal.GetState()
+    assert fmt.Format(tp.Toolpath([gc.G01(x=5, f=100)]), modal=modal) == b""    # nothing changed
+    modal.SetState(state)
+    assert fmt.Format(tp.Toolpath([gc.G01(x=6, f=100)]), modal=modal) == b"X6\n"
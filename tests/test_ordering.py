@@ -0,0 +1,71 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""
+Purpose of the file:
+Tests of the ordering of holes and cuts: permutation, reproducibility and rapid distance
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import random
+import pytest
+
+from lib import ordering as od
+
+
+def Points(rnd, n):  # =========================================================
+    """Returns n random holes [x, y]"""
+    return [[rnd.uniform(-100, 100), rnd.uniform(-100, 100)] for _ in range(n)]
+
+
+@pytest.mark.parametrize("n", [0, 1, 2, 3, 10, 200, 2000])
+def test_order(n):
+    """The result contains each hole once, is reproducible and not longer than the given order"""
+    plist = Points(random.Random(n), n)
+    stats = od.Stats()
+    result = od.Order(plist, [0, 0], stats=stats)
+    assert sorted(map(tuple, result)) == sorted(map(tuple, plist))
+    assert stats.after <= stats.before + 1e-9
+    assert od.Order(plist, [0, 0]) == result
+    if n > 10: assert stats.method == "2-opt" and stats.after < stats.before * 0.5
+
+
+def test_grid():
+    """Holes on a grid are drilled in rows of alternating direction, starting at the nearest corner"""
+    plist = [[x * 2.0, y * 3.0] for x in range(10) for y in range(5)]
+    random.Random(1).shuffle(plist)
+    stats = od.Stats()
+    result = od.Order(plist, [-1, -1], stats=stats)
+    assert stats.method == "serpentine"
+    assert result[0] == [0.0, 0.0]
+    assert stats.after == pytest.approx(2.0 ** 0.5 + 9 * 2 * 5 + 4 * 3)      # to the corner, the rows and the steps between them
+
+
+def test_budget():
+    """The number of tries (not the time) limits the work, so the result does not depend on the machine"""
+    plist = Points(random.Random(5), 500)
+    assert od.Order(plist, [0, 0], work=100) == od.Order(plist, [0, 0], budget=1000.0, work=100)
+
+
+def test_segments():
+    """The cuts are kept, some are reversed, the rapid distance is not longer"""
+    rnd = random.Random(3)
+    slist = [[rnd.uniform(-50, 50), rnd.uniform(-50, 50), rnd.uniform(-50, 50), rnd.uniform(-50, 50), k] for k in range(50)]
+    stats = od.Stats()
+    result = od.OrderSegments(slist, [0, 0], stats)
+    assert sorted(s[4] for s in result) == list(range(50))
+    for s in result:
+        o = slist[s[4]]
+        assert s[:4] in (o[:4], [o[2], o[3], o[0], o[1]])
+    assert stats.after <= stats.before
+    assert stats.after == pytest.approx(od.SegmentsLength(result, [0, 0]))
@@ -0,0 +1,128 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""
+Purpose of the file:
+Tests of the g-code of whole projects: reference outputs, streaming, parallel and production output
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import re
+import threading
+import pytest
+
+from conftest import Output, Reference
+
+MOTION = {0: "G00", 1: "G01", 2: "G02", 3: "G03", 73: "G73", 81: "G81", 83: "G83"}     # modal motion codes
+AXES = "XYZ"                                                                    # words, which start a move in the motion mode
+WORD = re.compile(r"([A-Z])\s*(-?[0-9.]+|nan|inf)")
+
+
+def Moves(gcode):  # ===========================================================
+    """Returns the moves of the g-code as a list of (motion, X, Y, Z, I, J, R, Q, P, F), read like a machine:
+    the motion and X, Y, Z, F are modal, comments and moves to the current position are ignored"""
+    moves, state, position = [], dict((w, None) for w in "GXYZF"), None
+    for line in gcode.splitlines():
+        line = re.sub(r"\(.*?\)", "", line)
+        words = WORD.findall(line)
+        if not words: continue
+        other = dict((w, None) for w in "IJRQP")
+        move = False
+        for w, v in words:
+            if w == "G":
+                n = int(float(v))
+                if n in MOTION: state["G"] = MOTION[n]
+                elif n == 80:   state["G"] = None
+                else:           continue
+                move = True
+            elif w in AXES or w == "F":
+                state[w] = round(float(v), 4)
+                move = move or w in AXES
+            elif w in other:
+                other[w] = round(float(v), 4)
+            elif w in "MT":
+                moves.append((w + v,))
+        if move and any(w in AXES for w, v in words):
+            m = tuple(state[w] for w in "GXYZ") + tuple(other[w] for w in "IJRQP") + (state["F"],)
+            if m[0] in ("G00", "G01") and position == m[1:4]: continue      # to the current position, left out in production
+            position = m[1:4]
+            moves.append(m)
+    return moves
+
+
+@pytest.mark.parametrize("placed, reference", [(False, "default.ngc"), (True, "placed.ngc")])
+def test_reference(project, placed, reference):
+    """The output is identical to the output of the program before the toolpath changes"""
+    assert Output(project(placed)) == Reference(reference)
+
+
+def test_chunks(project):
+    """Streaming returns the same g-code as a whole"""
+    s = project(True)
+    assert "".join(s.GetGcodeChunks()) == s.GetGcode()
+    n = s.WriteGcode(_Sink())
+    assert n == len(s.GetGcode())
+
+
+def test_cached(project):
+    """The second output (from the result cache and the kept g-code) is identical"""
+    s = project(True)
+    first = Output(s)
+    for o in s.objlist: o.gcode = None
+    assert Output(s) == first
+
+
+def test_parallel(project):
+    """The parallel generation returns the same g-code"""
+    s = project(True)
+    expected = Output(s)
+    s = project(True)
+    s.processes = 2
+    assert Output(s) == expected
+
+
+@pytest.mark.parametrize("placed", [False, True])
+def test_production(project, placed):
+    """The production output makes the same moves with less text"""
+    normal = Output(project(placed))
+    s = project(placed)
+    s.production = True
+    production = Output(s)
+    assert len(production) < len(normal)
+    assert Moves(production) == Moves(normal)
+
+
+def test_assembly(project):
+    """The gui output (created in the background, see <sgg.Prepare>) is identical to the export"""
+    for production in (False, True):
+        s = project(True)
+        s.production = production
+        prepared = set()
+        while True:
+            snapshots = s.Snapshot(prepared)
+            if not snapshots: break
+            results = s.Prepare(snapshots, threading.Event())
+            assert s.Apply(results) == 0
+            prepared = set((id(o), version) for o, version, gcode in results)
+        s.UpdateAssembly()
+        assert s.assembly.GetLines(0, s.assembly.Lines()) == s.GetGcode()
+
+
+class _Sink(object):  # ========================================================
+    """File, which only counts the written characters"""
+
+    def __init__(self):
+        self.n = 0
+
+    def write(self, text):
+        self.n += len(text)
@@ -0,0 +1,118 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""
+Purpose of the file:
+Tests of the project files: saving and loading, stored toolpaths, files of others
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import pickle
+import zipfile
+import pytest
+
+from lib import sgg
+from lib import projectfile as pf
+from lib import resultcache as rc
+
+from conftest import Output, Reference
+
+
+def Variables(obj):  # =========================================================
+    """Returns the saved variables of an nc-object"""
+    return {k: v for k, v in vars(obj).items() if k not in obj.unsaved and not k == "_version"}
+
+
+@pytest.mark.parametrize("placed, reference", [(False, "default.ngc"), (True, "placed.ngc")])
+def test_round_trip(project, tmp_path, placed, reference):
+    """A saved and loaded project has the same variables and writes the same g-code"""
+    s = project(placed)
+    fn = str(tmp_path / "project.sgg")
+    s.SaveProject(fn)
+    assert pf.IsProject(fn)
+    loaded = project()
+    loaded.LoadProject(fn)
+    assert not any(o.IsLoaded() for o in loaded.objlist)                        # loaded on first use
+    assert [o.GetName() for o in loaded.objlist] == [o.GetName() for o in s.objlist]
+    for a, b in zip(s.objlist, loaded.objlist):
+        assert b.obj.__class__ is a.obj.__class__
+        assert rc.Key(Variables(b.obj)) == rc.Key(Variables(a.obj))            # by value, also the g-code objects of a polygon
+        assert b.obj.CacheKey() == a.obj.CacheKey()
+    loaded.fn_project = sgg.PROJECTFILE_DEFAULT                                 # written in the header
+    assert Output(loaded) == Reference(reference)
+
+
+def test_insert(project, tmp_path):
+    """A project is inserted at the index, the objects of a replaced file are loaded before"""
+    s = project()
+    fn = str(tmp_path / "project.sgg")
+    s.SaveProject(fn, [0, 1])
+    n = len(s.objlist)
+    s.LoadProject(fn, 1)
+    assert len(s.objlist) == n + 2
+    s.SaveProject(fn)                                                           # the file of the inserted objects
+    loaded = project()
+    loaded.LoadProject(fn)
+    assert Output(loaded) == Output(s)
+
+
+def test_toolpaths(project, tmp_path):
+    """The stored results are put into the cache when the objects are loaded"""
+    s = project(True)
+    s.project_toolpaths = True
+    fn = str(tmp_path / "project.sgg")
+    Output(s)                                                                   # the results are in the cache
+    s.SaveProject(fn)
+    expected = Output(s)                                                        # with the file name in the header
+    with zipfile.ZipFile(fn) as zf:
+        assert any(n.startswith("toolpaths/") for n in zf.namelist())
+    loaded = project()
+    rc.CACHE.Clear()
+    loaded.LoadProject(fn)
+    for o in loaded.objlist: o.obj
+    assert len(rc.CACHE.entries) > 0
+    assert Output(loaded) == expected
+
+
+def test_untrusted(project, tmp_path):
+    """Files of others: no stored results, no fonts or images, no pickled projects"""
+    s = project()
+    s.project_toolpaths = True
+    Output(s)
+    fn = str(tmp_path / "project.sgg")
+    s.SaveProject(fn)
+    loaded = project()
+    rc.CACHE.Clear()
+    loaded.LoadProject(fn, pickled=False)
+    objects = [o.obj for o in loaded.objlist]
+    assert len(rc.CACHE.entries) == 0
+    for o in objects:
+        for name in o.files: assert getattr(o, name) == ""
+    assert [o.fontfile for o in objects if o.name == "Text"] == [""]
+    Output(loaded)                                                              # no error without the files
+    old = str(tmp_path / "old.sgg")
+    with open(old, "wb") as handle:
+        pickle.dump([], handle)
+    with pytest.raises(ValueError):
+        loaded.LoadProject(old, pickled=False)
+
+
+def test_format(tmp_path):
+    """Files of other formats or newer versions are not loaded"""
+    fn = str(tmp_path / "project.sgg")
+    with zipfile.ZipFile(fn, "w") as zf:
+        zf.writestr(pf.MANIFEST, '{"format": "%s", "version": %d, "objects": []}' % (pf.FORMAT, pf.FORMAT_VERSION + 1))
+    with pytest.raises(ValueError):
+        pf.Load(fn)
+    with pytest.raises(TypeError):
+        pf.Encode(sgg, [], "")
@@ -0,0 +1,101 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""
+Purpose of the file:
+Tests of the result cache: keys, copies of the results, memory and disk cache
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import os
+import copy
+import numpy
+
+from lib import gcode as gc
+from lib import toolpath as tp
+from lib import formatter as fmt
+from lib import resultcache as rc
+
+
+def test_key():
+    """The key depends on the values (also their types), not on the objects"""
+    assert rc.Key(1, "a", [1.5, None]) == rc.Key(1, "a", [1.5, None])
+    assert rc.Key(1) != rc.Key(1.0) and rc.Key([1, 2]) != rc.Key([2, 1])
+    assert rc.Key({"a": 1, "b": 2}) == rc.Key({"b": 2, "a": 1})
+    assert rc.Key(gc.G01(1, 2, 3, 100)) == rc.Key(gc.G01(1, 2, 3, 100)) != rc.Key(gc.G01(1, 2, 3, 200))
+    assert rc.Key(numpy.arange(3)) == rc.Key(numpy.arange(3)) != rc.Key(numpy.arange(3.0))
+
+
+def test_cache_key(project):
+    """Objects, which differ only in the name and placement, share a result"""
+    s = project()
+    for o in s.objlist:
+        o = o.obj
+        other = copy.deepcopy(o)
+        other.objectname = "other"
+        if "posx" in o.uncached: other.posx, other.deg = 10.0, 45
+        assert other.CacheKey() == o.CacheKey()
+        if not hasattr(o, "z1"): continue                                       # e.g. <CustomCode>
+        other.z1 = o.z1 - 1
+        assert other.CacheKey() != o.CacheKey()
+
+
+def test_put_copy():
+    """The cache keeps a copy, which does not change with the g-code objects of the nc-object"""
+    rc.CACHE.Clear()
+    ol = [gc.G00(0, 0, 5), gc.COMMENT("a"), gc.G83(1, 2, -3, r=1, q=0.5, f=50), gc.G01(3, 4, -1, 100)]
+    before = fmt.Format(tp.Toolpath(ol))
+    result = rc.Put("test", ol)
+    assert isinstance(result, tp.Toolpath) and rc.Get("test") is result
+    ol[1].text = "b"
+    ol[2].x = 10
+    ol[3].x = 10
+    assert fmt.Format(result) == before
+
+
+def test_limit():
+    """The least recently used results are removed above the memory limit"""
+    path = tp.Toolpath([gc.G01(x, 0, 0, 100) for x in range(100)])
+    path.Trim()
+    cache = rc.Cache(limit=path.nbytes * 2)
+    cache.Put("a", path)
+    cache.Put("b", path)
+    cache.Get("a")
+    cache.Put("c", path)
+    assert "a" in cache and "c" in cache and "b" not in cache
+    assert cache.size == path.nbytes * 2
+    cache.Put("d", tp.Toolpath([gc.G01(x, 0, 0, 100) for x in range(1000)]))   # too large
+    assert "d" not in cache
+
+
+def test_disk(tmp_path):
+    """Results are read again from the directory, a second write does not change the size"""
+    disk = rc.DiskCache(str(tmp_path))
+    path = rc.Compact([gc.G00(0, 0, 5), gc.COMMENT("a"), gc.G01(1, 2, -1, 100)])
+    disk.Put("key", path)
+    size = disk.size
+    disk.Put("key", path)
+    assert disk.size == size == sum(s for _, s, _ in disk.Files())
+    assert fmt.Format(disk.Get("key")) == fmt.Format(path)
+    assert disk.Get("other") is None
+    assert [fn for fn in os.listdir(str(tmp_path)) if not fn.endswith(rc.EXTENSION)] == []  # no temporary files
+    disk.limit = 0
+    disk.Put("key2", path)
+    assert disk.Files() == [] and disk.size == 0
+
+
+def test_disk_off():
+    """Without a directory nothing is written"""
+    disk = rc.DiskCache("")
+    disk.Put("key", [gc.G00(0, 0, 5)])
+    assert disk.Get("key") is None and disk.size is None
@@ -0,0 +1,96 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""
+Purpose of the file:
+Tests of the simplification of G01 runs: tolerance, end points and kept words
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import math
+import random
+import pytest
+
+from lib import gcode as gc
+from lib import simplify as sp
+from lib import formatter as fmt
+from lib import toolpath as tp
+
+from conftest import Track, Distance
+
+TOL = 0.01                                                                      # tolerance of the tests (mm)
+
+
+def Relief(rnd):  # ============================================================
+    """Returns G01 moves like a line of a relief: a slow curve in x, y, z with noise and steps"""
+    ol = [gc.G00(0, 0, 2), gc.G01(0, 0, -1, 100)]
+    for k in range(1, rnd.randint(10, 800)):
+        z = -1 + 0.5 * math.sin(k / 37.0) + rnd.gauss(0, TOL / 2) + (0.3 if (k // 50) % 2 else 0.0)
+        ol.append(gc.G01(k * 0.05, 2 * math.sin(k / 100.0), z, 100))
+    return ol
+
+
+def Check(ol, result, tol):  # =================================================
+    """All removed points are within the tolerance of the simplified path, the end points are kept"""
+    original, moves = Track(tp.Toolpath(ol)), Track(result)
+    for a, b, center, ccw in original:
+        assert Distance(b, moves) <= tol * (1 + 1e-6)
+    assert moves[0][0] == original[0][0] and moves[-1][1] == original[-1][1]
+    assert len(result) <= len(ol)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_tolerance(seed):
+    """The removed points are within the tolerance, also in z"""
+    rnd = random.Random(seed)
+    ol = Relief(rnd)
+    stats = sp.Stats()
+    result = sp.Simplify(ol, TOL, stats)
+    Check(ol, result, TOL)
+    assert stats.deviation <= TOL
+    assert stats.saved == len(ol) - len(result)
+
+
+def test_line():
+    """The points of a line are removed"""
+    ol = [gc.G00(0, 0, 1)] + [gc.G01(x, 2 * x, -x / 10.0, 100) for x in range(20)]
+    result = sp.Simplify(ol, TOL)
+    Check(ol, result, TOL)
+    assert len(result) == 3                                                     # G00, the first and the last G01
+
+
+def test_closed():
+    """A closed polyline is kept as a polygon"""
+    ol = [gc.G00(10, 0, 0)] + [gc.G01(10 * math.cos(a / 10.0), 10 * math.sin(a / 10.0), 0, 100) for a in range(64)]
+    ol.append(gc.G01(10, 0, 0, 100))
+    result = sp.Simplify(ol, TOL)
+    Check(ol, result, TOL)
+    assert len(result) > 10
+
+
+def test_unchanged():
+    """Rapid moves, arcs, other feed rates and other g-code objects are kept, the given toolpath is not modified"""
+    ol = [gc.G00(0, 0, 5), gc.G01(1, 0, 0, 100), gc.COMMENT("x"), gc.G01(2, 0, 0, 200), gc.G02(3, 1, None, 0, 1, f=200),
+          gc.G00(4, 0, 0), gc.M(5)]
+    path = tp.Toolpath(ol)
+    before = fmt.Format(path)
+    assert fmt.Format(sp.Simplify(path, TOL)) == before
+    assert fmt.Format(path) == before
+
+
+def test_words():
+    """A word, which was only set by a removed move, is set by the next kept move"""
+    ol = [gc.G00(0, 0, 0), gc.G01(1, 0, None, 100), gc.G01(2, 0, -1, 100), gc.G01(3, 0, None, 100),
+          gc.G01(4, 0, None, 100)]
+    result = sp.Simplify(ol, 2.0)
+    assert fmt.Format(result).decode("utf-8").splitlines()[-1] == gc.G01(4, 0, -1, 100).GetGcode()
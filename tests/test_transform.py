@@ -0,0 +1,125 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""
+Purpose of the file:
+Tests of the placement of toolpaths (one affine transform) against the g-code objects
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import copy
+import math
+import random
+import pytest
+
+from lib import gcode as gc
+from lib import toolpath as tp
+from lib import formatter as fmt
+
+WORDS = ("x", "y", "z", "i", "j", "r")                                          # compared variables
+
+
+def Objects(rnd, n):  # ========================================================
+    """Returns random moves, arcs, drilling cycles and comments"""
+    def v(): return rnd.uniform(-100, 100) if rnd.random() < 0.7 else None
+    ol = []
+    for _ in range(n):
+        k = rnd.randint(0, 4)
+        if k == 0:   ol.append(gc.G00(v(), v(), v()))
+        elif k == 1: ol.append(gc.G01(v(), v(), v(), 100))
+        elif k == 2: ol.append(gc.G02(v(), v(), v(), v(), v(), f=100))
+        elif k == 3: ol.append(gc.G81(v(), v(), -3.0, r=1.0, f=50))
+        else:        ol.append(gc.COMMENT("text"))
+    return ol
+
+
+def Steps(rnd):  # =============================================================
+    """Returns random placement steps like <Basemethods.GetTransform>"""
+    c = [rnd.uniform(-10, 10), rnd.uniform(-10, 10), 0]
+    return [("Rotate", (c, rnd.choice([0, 15, 30, 90, 180, rnd.uniform(-360, 360)]))),
+            ("AddOffset", ([rnd.uniform(-50, 50), rnd.uniform(-50, 50), rnd.choice([0, 2.5])],)),
+            ("Rotate", (c, rnd.choice([0, 45, rnd.uniform(-360, 360)])))]
+
+
+def Scalar(ol, steps):  # ======================================================
+    """Returns copies of the objects placed one by one (the method before the transform)"""
+    res = []
+    for o in ol:
+        o = copy.copy(o)
+        for name, args in steps:
+            try:    getattr(o, name)(*args)
+            except: pass
+        res.append(o)
+    return res
+
+
+def Compare(path, ol):  # ======================================================
+    """Checks the rows of the toolpath against the g-code objects"""
+    assert len(path) == len(ol)
+    for r, o in enumerate(ol):
+        p = path[r]
+        assert p.__class__ is o.__class__
+        for w in WORDS:
+            a, b = getattr(p, w, None), getattr(o, w, None)
+            assert (a is None) == (b is None)
+            if a is not None: assert a == pytest.approx(b, abs=1e-9)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_apply(seed):
+    """The transform places the rows like the g-code objects"""
+    rnd = random.Random(seed)
+    ol, steps = Objects(rnd, 200), Steps(rnd)
+    t = tp.Transform()
+    for name, args in steps: getattr(t, name)(*args)
+    path = tp.Toolpath(ol)
+    before = fmt.Format(path)
+    Compare(t.Apply(path), Scalar(ol, steps))
+    assert fmt.Format(path) == before                                           # the toolpath is not modified
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_toolpath(seed):
+    """<Toolpath.AddOffset> and <Toolpath.Rotate> place the rows like the g-code objects"""
+    rnd = random.Random(seed)
+    ol, steps = Objects(rnd, 100), Steps(rnd)
+    expected = Scalar(ol, steps)
+    path = tp.Toolpath(copy.deepcopy(ol))                                       # the objects of the toolpath are changed in place
+    for name, args in steps: getattr(path, name)(*args)
+    Compare(path, expected)
+
+
+def test_zero():
+    """A coordinate of -0.0 is written like the g-code objects write it after a placement: "0.0000" """
+    ol = [gc.G01(-0.0, 0.0, -0.0, 100), gc.G02(1, 1, None, -0.0, -0.0, f=100), gc.G03(-0.0, -0.0, None, 0.0, -0.0)]
+    t = tp.Transform()
+    t.AddOffset([0, 0, 0])
+    assert "-0.0000" not in fmt.Format(t.Apply(tp.Toolpath(ol))).decode("utf-8")
+    for d in (0, 90, 180, 360):
+        expected = "".join(o.GetGcode() + "\n" for o in Scalar(ol, [("Rotate", ([0, 0, 0], d))]))
+        t = tp.Transform()
+        t.Rotate([0, 0, 0], d)
+        assert fmt.Format(t.Apply(tp.Toolpath(ol))).decode("utf-8") == expected
+        path = tp.Toolpath(ol)
+        path.Rotate([0, 0, 0], d)
+        assert fmt.Format(path).decode("utf-8") == expected
+
+
+def test_cycle_offset():
+    """The R-plane of a drilling cycle moves with z"""
+    t = tp.Transform()
+    t.AddOffset([1, 2, 2.5])
+    path = t.Apply(tp.Toolpath([gc.G81(0, 0, -3, r=1, f=50), gc.G83(0, 0, -3, r=1, q=0.5, f=50)]))
+    assert [path[r].r for r in range(2)] == [3.5, 3.5]
+    assert [path[r].z for r in range(2)] == [-0.5, -0.5]
+    assert math.isclose(path[0].x, 1) and math.isclose(path[0].y, 2)